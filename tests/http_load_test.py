@@ -0,0 +1,140 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+XMind MCP HTTP 压测脚本
+
+每个连接一个线程循环发送同一请求，报告请求/秒和延迟分位数。默认复用连接（keep-alive），
+--no-keepalive 时每个请求新建连接，便于对比。
+
+用法:
+    python xmind_mcp_server.py --mode http --workers 4
+    python tests/http_load_test.py --path /health --connections 16 --duration 10
+    python tests/http_load_test.py --method POST --path /tools/list_xmind_files --body '{"directory": "output"}'
+"""
+
+import sys
+import time
+import argparse
+import threading
+import http.client
+from collections import Counter
+from typing import Any, Dict, Optional
+from urllib.parse import urlsplit
+
+
+def percentile(values, fraction):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * fraction))] if values else 0.0
+
+
+def run_load_test(url: str = "http://127.0.0.1:8080", path: str = "/health", method: str = "GET",
+                  body: Optional[bytes] = None, headers: Optional[Dict[str, str]] = None,
+                  connections: int = 8, duration: Optional[float] = 5.0, requests: Optional[int] = None,
+                  keepalive: bool = True, timeout: float = 30.0) -> Dict[str, Any]:
+    """压测一个端点
+
+    requests 指定时每个连接发送 requests 个请求，否则持续 duration 秒。
+    返回请求数、错误数（非2xx或连接异常）、状态码分布、请求/秒和延迟分位数（毫秒）。
+    """
+    target = urlsplit(url)
+    host, port = target.hostname or "127.0.0.1", target.port or 80
+    headers = dict(headers or {})
+    if body is not None and "Content-Type" not in headers:
+        headers["Content-Type"] = "application/json"
+    if not keepalive:
+        headers["Connection"] = "close"
+    latencies, statuses, errors = [], Counter(), Counter()
+    lock = threading.Lock()
+    start_barrier = threading.Barrier(connections + 1)
+
+    def worker():
+        local_latencies, local_statuses, local_errors = [], Counter(), Counter()
+        connection = None
+        start_barrier.wait()
+        deadline = time.perf_counter() + duration if requests is None else None
+        sent = 0
+        while (requests is None and time.perf_counter() < deadline) or (requests is not None and sent < requests):
+            sent += 1
+            begin = time.perf_counter()
+            try:
+                if connection is None:
+                    connection = http.client.HTTPConnection(host, port, timeout=timeout)
+                connection.request(method, path, body=body, headers=headers)
+                response = connection.getresponse()
+                response.read()
+                local_latencies.append(time.perf_counter() - begin)
+                local_statuses[response.status] += 1
+                if not 200 <= response.status < 300:
+                    local_errors[f"HTTP {response.status}"] += 1
+                if not keepalive or response.will_close:
+                    connection.close()
+                    connection = None
+            except Exception as e:
+                local_errors[type(e).__name__] += 1
+                if connection is not None:
+                    connection.close()
+                connection = None
+        if connection is not None:
+            connection.close()
+        with lock:
+            latencies.extend(local_latencies)
+            statuses.update(local_statuses)
+            errors.update(local_errors)
+
+    threads = [threading.Thread(target=worker, daemon=True) for _ in range(connections)]
+    for thread in threads:
+        thread.start()
+    start_barrier.wait()
+    started = time.perf_counter()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - started
+    total = len(latencies) + sum(count for name, count in errors.items() if not name.startswith("HTTP"))
+    return {
+        "url": f"{url.rstrip('/')}{path}",
+        "method": method,
+        "connections": connections,
+        "keepalive": keepalive,
+        "requests": total,
+        "errors": sum(errors.values()),
+        "error_types": dict(errors),
+        "statuses": dict(statuses),
+        "elapsed_seconds": elapsed,
+        "requests_per_second": len(latencies) / elapsed if elapsed > 0 else 0.0,
+        "p50_ms": percentile(latencies, 0.5) * 1000,
+        "p90_ms": percentile(latencies, 0.9) * 1000,
+        "p99_ms": percentile(latencies, 0.99) * 1000,
+        "max_ms": max(latencies) * 1000 if latencies else 0.0
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description='XMind MCP HTTP 压测')
+    parser.add_argument('--url', default="http://127.0.0.1:8080", help='服务器地址')
+    parser.add_argument('--path', default="/health", help='请求路径')
+    parser.add_argument('--method', default="GET", help='请求方法')
+    parser.add_argument('--body', help='请求体（JSON字符串）')
+    parser.add_argument('--connections', type=int, default=8, help='并发连接数')
+    parser.add_argument('--duration', type=float, default=5.0, help='持续秒数')
+    parser.add_argument('--requests', type=int, help='每个连接的请求数（指定时忽略 --duration）')
+    parser.add_argument('--no-keepalive', action='store_true', help='每个请求新建连接')
+    args = parser.parse_args()
+
+    result = run_load_test(
+        args.url, args.path, args.method.upper(), args.body.encode('utf-8') if args.body else None,
+        connections=args.connections, duration=args.duration, requests=args.requests,
+        keepalive=not args.no_keepalive
+    )
+    print(f"{result['method']} {result['url']}  连接数 {result['connections']}  "
+          f"{'keep-alive' if result['keepalive'] else '每请求新建连接'}")
+    print(f"  请求数: {result['requests']}  错误: {result['errors']}  状态码: {result['statuses']}")
+    if result['error_types']:
+        print(f"  错误类型: {result['error_types']}")
+    print(f"  吞吐量: {result['requests_per_second']:.1f} 请求/秒  耗时 {result['elapsed_seconds']:.2f} 秒")
+    print(f"  延迟: p50 {result['p50_ms']:.2f} ms  p90 {result['p90_ms']:.2f} ms  "
+          f"p99 {result['p99_ms']:.2f} ms  max {result['max_ms']:.2f} ms")
+    return 0 if result['errors'] == 0 else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
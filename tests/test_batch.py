@@ -124,6 +124,37 @@ class BatchConversionTester:
         
         return success_rate
     
+    def test_parallel_batch_conversion(self):
+        """测试核心引擎并行批量转换（batch_convert）"""
+        title = "⚡ 并行批量转换测试" if self.use_chinese else "⚡ Parallel Batch Conversion Test"
+        self.log(f"\n{title}")
+        
+        examples_dir = self.project_root / "examples"
+        output_dir = self.project_root / "output" / "batch"
+        
+        def report(result):
+            name = Path(result.get("source_file", "")).name
+            if result.get("status") == "success":
+                self.log(f"  ✅ {name} ({result.get('seconds', 0) * 1000:.0f} ms)")
+            else:
+                self.log(f"  ❌ {name}: {result.get('error')}")
+        
+        result = self.core_engine.batch_convert(str(examples_dir), str(output_dir), recursive=False,
+                                                workers=2, on_result=report)
+        if result.get("status") != "success" or not result["total_files"]:
+            self.log(f"❌ 批量转换失败: {result.get('error')}" if self.use_chinese else f"❌ Batch conversion failed: {result.get('error')}")
+            return 0.0
+        
+        success_rate = result["succeeded"] / result["total_files"] * 100
+        self.log(
+            f"  总文件数: {result['total_files']}  成功: {result['succeeded']}  超时: {result['timed_out']}  "
+            f"进程数: {result['workers']}  耗时: {result['elapsed_seconds']:.2f}秒  速度: {result['files_per_second']:.2f} 文件/秒"
+            if self.use_chinese else
+            f"  Files: {result['total_files']}  succeeded: {result['succeeded']}  timed out: {result['timed_out']}  "
+            f"workers: {result['workers']}  time: {result['elapsed_seconds']:.2f}s  speed: {result['files_per_second']:.2f} files/s"
+        )
+        return success_rate
+    
     def test_server_batch_conversion(self):
         """测试服务器批量转换"""
         title = "🌐 服务器批量转换测试" if self.use_chinese else "🌐 Server Batch Conversion Test"
@@ -224,6 +255,9 @@ class BatchConversionTester:
         # 运行核心引擎批量转换测试
         batch_success_rate = self.test_batch_conversion()
         
+        # 运行核心引擎并行批量转换测试
+        parallel_success_rate = self.test_parallel_batch_conversion()
+        
         # 运行服务器批量转换测试
         server_batch_success_rate = self.test_server_batch_conversion()
         
@@ -233,11 +267,12 @@ class BatchConversionTester:
         self.log(final_title)
         
         # 计算总体通过率
-        overall_success_rate = (batch_success_rate + server_batch_success_rate) / 2
+        overall_success_rate = (batch_success_rate + parallel_success_rate + server_batch_success_rate) / 3
         
         # 显示详细结果
         self.log(f"\n📊 综合测试结果:")
         self.log(f"  核心引擎测试: {batch_success_rate:.1f}%")
+        self.log(f"  并行批量测试: {parallel_success_rate:.1f}%")
         self.log(f"  服务器测试: {server_batch_success_rate:.1f}%")
         self.log(f"  总体通过率: {overall_success_rate:.1f}%")
         
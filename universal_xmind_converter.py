@@ -8,32 +8,54 @@ Supports automatic format detection and extensible parser architecture.
 Version: 2.0
 """
 
-import json
 import zipfile
 import re
 import os
+import shutil
+import stat
+import tempfile
+import uuid
+import hashlib
+import itertools
+import contextvars
+import importlib
+from contextlib import contextmanager
 from datetime import datetime
 from pathlib import Path
 import mimetypes
 
-# 可选依赖，用于处理Word和Excel文件
-try:
-    import docx
-    WORD_AVAILABLE = True
-except ImportError:
-    WORD_AVAILABLE = False
+import xmind_json
 
-try:
-    import openpyxl
-    EXCEL_AVAILABLE = True
-except ImportError:
-    EXCEL_AVAILABLE = False
+# 解析/写入输出格式版本，修改解析器或写入器输出时递增（转换缓存键的一部分）
+PARSER_VERSION = "2.1"
+
+# 可选依赖，用于处理HTML、Word和Excel文件。这些库导入很慢（合计约0.2秒），
+# 因此在首次解析对应格式时才导入，只列举/读取XMind文件的进程不会加载它们
+OPTIONAL_DEPENDENCIES = {
+    "bs4": "beautifulsoup4",
+    "docx": "python-docx",
+    "openpyxl": "openpyxl",
+}
+_optional_modules = {}
+
+
+def import_optional(module_name):
+    """按需导入可选依赖，未安装时抛出带安装提示的 ImportError
+
+    只缓存导入成功的模块：未安装时每次调用都重新查找，服务器运行期间安装依赖后无需重启即可使用。
+    """
+    module = _optional_modules.get(module_name)
+    if module is None:
+        try:
+            module = importlib.import_module(module_name)
+        except ImportError as e:
+            # 清除查找器缓存的目录列表，下次调用能找到刚安装的包
+            importlib.invalidate_caches()
+            package = OPTIONAL_DEPENDENCIES.get(module_name, module_name)
+            raise ImportError(f"需要安装{package}: pip install {package}") from e
+        _optional_modules[module_name] = module
+    return module
 
-try:
-    from bs4 import BeautifulSoup
-    HTML_AVAILABLE = True
-except ImportError:
-    HTML_AVAILABLE = False
 
 
 def escape_xml_text(text):
@@ -47,14 +69,145 @@ def escape_xml_text(text):
                .replace("'", "&apos;"))
 
 
+# ==============================================
+# 主题ID生成器
+# ==============================================
+
+ID_LENGTH = 26
+# 每个字节取低5位映射为32进制字符，26个字符约130位随机性
+_ID_ALPHABET = b'0123456789abcdefghijklmnopqrstuv'
+_ID_TRANSLATION = bytes(_ID_ALPHABET[b & 31] for b in range(256))
+
+
+class RandomIdGenerator:
+    """Fast random 26-char IDs cut from a buffered os.urandom pool
+    
+    list.pop() is atomic under the GIL, so the pool can be shared between
+    threads without a lock; a concurrent refill only wastes one batch.
+    """
+    
+    mode = 'fast'
+    
+    def __init__(self, pool_ids=8192):
+        self.pool_ids = pool_ids
+        self._pool = []
+    
+    def _refill(self):
+        text = os.urandom(self.pool_ids * ID_LENGTH).translate(_ID_TRANSLATION).decode('ascii')
+        self._pool = [text[i:i + ID_LENGTH] for i in range(0, len(text), ID_LENGTH)]
+    
+    def __call__(self):
+        try:
+            return self._pool.pop()
+        except IndexError:
+            self._refill()
+            return self._pool.pop()
+
+
+def _hash_id(text):
+    """Derive a 26-char ID from text"""
+    digest = hashlib.blake2b(text.encode('utf-8'), digest_size=ID_LENGTH).digest()
+    return digest.translate(_ID_TRANSLATION).decode('ascii')
+
+
+class SequentialIdGenerator:
+    """Deterministic 26-char IDs hashed from a seed and a counter (reproducible builds)"""
+    
+    mode = 'sequential'
+    
+    def __init__(self, seed=''):
+        self.seed = str(seed)
+        self._counter = itertools.count()
+    
+    def __call__(self):
+        return _hash_id(f'{self.seed}:{next(self._counter)}')
+
+
+class UUIDIdGenerator:
+    """32-char uuid4 hex IDs (the original behaviour)"""
+    
+    mode = 'uuid'
+    
+    def __call__(self):
+        return uuid.uuid4().hex
+
+
+ID_GENERATORS = {
+    RandomIdGenerator.mode: RandomIdGenerator,
+    SequentialIdGenerator.mode: SequentialIdGenerator,
+    UUIDIdGenerator.mode: UUIDIdGenerator,
+}
+
+DEFAULT_ID_MODE = RandomIdGenerator.mode
+
+_default_id_generator = RandomIdGenerator()
+_active_id_generator = contextvars.ContextVar('xmind_id_generator', default=_default_id_generator)
+
+
+def create_id_generator(mode=DEFAULT_ID_MODE, seed=None):
+    """Create an ID generator for the given mode (fast/sequential/uuid)"""
+    if mode not in ID_GENERATORS:
+        raise ValueError(f"不支持的ID生成模式: {mode}，可选: {', '.join(ID_GENERATORS)}")
+    if mode == SequentialIdGenerator.mode:
+        return SequentialIdGenerator(seed or '')
+    return ID_GENERATORS[mode]()
+
+
+@contextmanager
+def use_id_generator(mode=DEFAULT_ID_MODE, seed=None):
+    """Use an ID generator for every generate_id() call in the current context
+    
+    mode may also be a ready-made generator (any zero-argument callable).
+    The selection is stored in a context variable, so concurrent conversions
+    in other threads or tasks are not affected.
+    """
+    generator = mode if callable(mode) else create_id_generator(mode, seed)
+    token = _active_id_generator.set(generator)
+    try:
+        yield generator
+    finally:
+        _active_id_generator.reset(token)
+
+
 def generate_id():
     """Generate unique ID"""
-    import uuid
-    return str(uuid.uuid4()).replace('-', '')
+    return _active_id_generator.get()()
 
 
-def create_json_structure(title, children):
-    """Create JSON structure"""
+def assign_path_ids(json_structure):
+    """Replace every ID in one or more sheets with an ID derived from its position
+    
+    A topic ID hashes its parent's ID, its index among its siblings and its
+    title, so the same input always yields the same IDs (used for
+    deterministic, content-addressed builds). Modifies the structure in place.
+    """
+    sheets = json_structure if isinstance(json_structure, list) else [json_structure]
+    for sheet_index, sheet in enumerate(sheets):
+        root_topic = sheet.get('rootTopic') or {}
+        sheet_id = _hash_id(f"sheet/{sheet_index}/{sheet.get('title', '')}/{root_topic.get('title', '')}")
+        sheet['id'] = sheet_id
+        
+        theme = sheet.get('theme')
+        if isinstance(theme, dict):
+            for key, entry in theme.items():
+                if isinstance(entry, dict) and 'id' in entry:
+                    entry['id'] = _hash_id(f"{sheet_id}/theme/{key}")
+        
+        if not root_topic:
+            continue
+        root_topic['id'] = _hash_id(f"{sheet_id}/root/{root_topic.get('title', '')}")
+        stack = [root_topic]
+        while stack:
+            parent = stack.pop()
+            parent_id = parent['id']
+            for index, topic in enumerate(_attached_topics(parent)):
+                topic['id'] = _hash_id(f"{parent_id}/{index}/{topic.get('title', '')}")
+                stack.append(topic)
+    return json_structure
+
+
+def create_json_structure(title, children, sheet_title="画布 1"):
+    """Create JSON structure (one sheet)"""
     return {
         "id": generate_id(),
         "class": "sheet",
@@ -67,7 +220,7 @@ def create_json_structure(title, children):
                 "attached": children
             }
         },
-        "title": "画布 1",
+        "title": sheet_title,
         "extensions": [{
             "provider": "org.xmind.ui.skeleton.structure.style",
             "content": {
@@ -366,15 +519,14 @@ class HtmlParser(BaseParser):
     
     def __init__(self, file_path):
         super().__init__(file_path)
-        if not HTML_AVAILABLE:
-            raise ImportError("需要安装BeautifulSoup4: pip install beautifulsoup4")
+        self.bs4 = import_optional("bs4")
     
     def parse(self):
         """解析HTML文件"""
         with open(self.file_path, 'r', encoding='utf-8') as f:
             content = f.read()
         
-        soup = BeautifulSoup(content, 'html.parser')
+        soup = self.bs4.BeautifulSoup(content, 'html.parser')
         title = self.extract_title(soup)
         
         # 查找标题结构 (h1-h6)
@@ -423,23 +575,27 @@ class HtmlParser(BaseParser):
     
     def parse_lists(self, soup):
         """解析列表结构"""
-        def parse_list_items(items, level=0):
+        def parse_list_items(items):
             topics = []
-            for item in items:
+            # 显式栈：(列表项, 所属主题列表, 所属主题)，嵌套列表再深也不会递归
+            stack = [(item, topics, None) for item in reversed(items)]
+            while stack:
+                item, siblings, owner = stack.pop()
                 text = item.get_text().strip()
-                if text:
-                    topic = create_topic(text)
-                    
-                    # 查找子列表
-                    sublist = item.find(['ul', 'ol'])
-                    if sublist:
-                        sub_items = sublist.find_all('li', recursive=False)
-                        if sub_items:
-                            sub_topics = parse_list_items(sub_items, level + 1)
-                            if sub_topics:
-                                topic["children"] = {"attached": sub_topics}
-                    
-                    topics.append(topic)
+                if not text:
+                    continue
+                topic = create_topic(text)
+                if not siblings and owner is not None:
+                    owner["children"] = {"attached": siblings}
+                siblings.append(topic)
+                
+                # 查找子列表
+                sublist = item.find(['ul', 'ol'])
+                if sublist:
+                    sub_items = sublist.find_all('li', recursive=False)
+                    if sub_items:
+                        sub_topics = []
+                        stack.extend((sub_item, sub_topics, topic) for sub_item in reversed(sub_items))
             return topics
         
         # 查找顶级列表
@@ -463,12 +619,11 @@ class WordParser(BaseParser):
     
     def __init__(self, file_path):
         super().__init__(file_path)
-        if not WORD_AVAILABLE:
-            raise ImportError("需要安装python-docx: pip install python-docx")
+        self.docx = import_optional("docx")
     
     def parse(self):
         """解析Word文档"""
-        doc = docx.Document(self.file_path)
+        doc = self.docx.Document(self.file_path)
         title = self.extract_title(doc)
         
         # 按段落解析
@@ -545,12 +700,11 @@ class ExcelParser(BaseParser):
     
     def __init__(self, file_path):
         super().__init__(file_path)
-        if not EXCEL_AVAILABLE:
-            raise ImportError("需要安装openpyxl: pip install openpyxl")
+        self.openpyxl = import_optional("openpyxl")
     
     def parse(self):
         """解析Excel文件"""
-        wb = openpyxl.load_workbook(self.file_path)
+        wb = self.openpyxl.load_workbook(self.file_path)
         
         # 使用第一个工作表
         ws = wb.active
@@ -683,14 +837,19 @@ class ParserFactory:
             return '.txt'
     
     @classmethod
-    def get_parser(cls, file_path):
-        """根据文件路径获取相应的解析器"""
+    def get_parser_class(cls, file_path):
+        """根据文件路径获取相应的解析器类"""
         file_ext = cls.detect_file_type(file_path)
         
         if file_ext not in cls.PARSERS:
             raise ValueError(f"不支持的文件格式: {file_ext}")
         
-        parser_class = cls.PARSERS[file_ext]
+        return cls.PARSERS[file_ext]
+    
+    @classmethod
+    def get_parser(cls, file_path):
+        """根据文件路径获取相应的解析器"""
+        parser_class = cls.get_parser_class(file_path)
         return parser_class(file_path)
     
     @classmethod
@@ -725,77 +884,113 @@ class ParserFactory:
 # XMind文件生成器（复用原有代码）
 # ==============================================
 
-def generate_content_xml(json_structure):
-    """Generate content.xml content"""
-    # 获取基本信息
-    sheet_id = json_structure.get('id', 'default-sheet-id')
-    sheet_title = json_structure.get('title', 'Sheet 1')
-    root_topic = json_structure.get('rootTopic', {})
-    
-    # 生成XML头部
-    xml_parts = [
-        '<?xml version="1.0" encoding="UTF-8" standalone="no"?>',
-        '<xmap-content xmlns="urn:xmind:xmap:xmlns:content:2.0" '
-        'xmlns:fo="http://www.w3.org/1999/XSL/Format" '
-        'xmlns:svg="http://www.w3.org/2000/svg" '
-        'xmlns:xhtml="http://www.w3.org/1999/xhtml" '
-        'xmlns:xlink="http://www.w3.org/1999/xlink" '
-        'modified-by="Vana" timestamp="1503058545540" version="2.0">',
-        f'<sheet id="{sheet_id}" modified-by="Vana" theme="0kdeemiijde6nuk97e4t0vpp54" timestamp="1503058545540">'
-    ]
-    
-    # 生成根主题
-    if root_topic:
-        topic_id = root_topic.get('id', 'default-topic-id')
-        topic_title = root_topic.get('title', 'Root Topic')
-        
-        xml_parts.append(
-            f'<topic id="{topic_id}" modified-by="Vana" timestamp="1503058545484">'
-            f'<title>{escape_xml_text(topic_title)}</title>'
-        )
-        
-        # 递归生成子主题
-        def generate_topics(topics, indent=0):
-            if not topics:
-                return []
-            
-            result = []
-            result.append('<children><topics type="attached">')
-            
-            for topic in topics:
-                topic_id = topic.get('id', f'topic-{hash(str(topic))}')
-                title = topic.get('title', 'Topic')
-                children = topic.get('children', {}).get('attached', [])
-                
-                result.append(f'<topic id="{topic_id}" modified-by="Vana" timestamp="1503058545484">')
-                result.append(f'<title svg:width="500">{escape_xml_text(title)}</title>')
-                
-                if children:
-                    result.extend(generate_topics(children, indent + 1))
-                
-                result.append('</topic>')
-            
-            result.append('</topics></children>')
-            return result
-        
-        # 生成子主题
-        attached_topics = root_topic.get('children', {}).get('attached', [])
-        if attached_topics:
-            xml_parts.extend(generate_topics(attached_topics))
-        
-        xml_parts.append('</topic>')
-    
-    # 添加扩展和标题
-    xml_parts.extend([
+XML_HEADER = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="no"?>',
+    '<xmap-content xmlns="urn:xmind:xmap:xmlns:content:2.0" '
+    'xmlns:fo="http://www.w3.org/1999/XSL/Format" '
+    'xmlns:svg="http://www.w3.org/2000/svg" '
+    'xmlns:xhtml="http://www.w3.org/1999/xhtml" '
+    'xmlns:xlink="http://www.w3.org/1999/xlink" '
+    'modified-by="Vana" timestamp="1503058545540" version="2.0">'
+)
+XML_FOOTER = '</xmap-content>'
+XML_CHILDREN_OPEN = '<children><topics type="attached">'
+XML_CHILDREN_CLOSE = '</topics></children>'
+XML_TOPIC_CLOSE = '</topic>'
+
+_END = object()
+
+
+def _xml_sheet_open(sheet):
+    """Opening tag of a sheet"""
+    sheet_id = sheet.get('id', 'default-sheet-id')
+    return f'<sheet id="{sheet_id}" modified-by="Vana" theme="0kdeemiijde6nuk97e4t0vpp54" timestamp="1503058545540">'
+
+
+def _xml_sheet_close(sheet):
+    """Closing parts of a sheet (extensions and title)"""
+    sheet_title = sheet.get('title', 'Sheet 1')
+    return (
         '<extensions><extension provider="org.xmind.ui.map.unbalanced">',
         '<content><right-number>-1</right-number></content>',
         '</extension></extensions>',
         f'<title>{escape_xml_text(sheet_title)}</title>',
-        '</sheet>',
-        '</xmap-content>'
-    ])
+        '</sheet>'
+    )
+
+
+def _xml_topic_open(topic, is_root=False):
+    """Opening tag and title of a topic"""
+    if is_root:
+        topic_id = topic.get('id', 'default-topic-id')
+        title = topic.get('title', 'Root Topic')
+        return (
+            f'<topic id="{topic_id}" modified-by="Vana" timestamp="1503058545484">'
+            f'<title>{escape_xml_text(title)}</title>'
+        )
+    topic_id = topic.get('id') or generate_id()
+    title = topic.get('title', 'Topic')
+    return (
+        f'<topic id="{topic_id}" modified-by="Vana" timestamp="1503058545484">',
+        f'<title svg:width="500">{escape_xml_text(title)}</title>'
+    )
+
+
+def _attached_topics(topic):
+    """Attached child topics of a topic"""
+    children = topic.get('children')
+    if isinstance(children, dict):
+        return children.get('attached') or []
+    return []
+
+
+def iter_content_xml_parts(json_structure):
+    """Yield content.xml parts (joined with newlines by the caller) for one sheet or a list of sheets"""
+    sheets = json_structure if isinstance(json_structure, list) else [json_structure]
+    yield from XML_HEADER
+    for sheet in sheets:
+        yield from _iter_sheet_xml_parts(sheet)
+    yield XML_FOOTER
+
+
+def _iter_sheet_xml_parts(json_structure):
+    """Yield the content.xml parts of one sheet"""
+    yield _xml_sheet_open(json_structure)
+    
+    root_topic = json_structure.get('rootTopic', {})
+    if root_topic:
+        yield _xml_topic_open(root_topic, is_root=True)
+        
+        # 使用显式栈生成子主题，每个栈帧为子主题迭代器
+        attached = _attached_topics(root_topic)
+        stack = []
+        if attached:
+            yield XML_CHILDREN_OPEN
+            stack.append(iter(attached))
+        while stack:
+            topic = next(stack[-1], _END)
+            if topic is _END:
+                stack.pop()
+                yield XML_CHILDREN_CLOSE
+                if stack:
+                    yield XML_TOPIC_CLOSE
+                continue
+            yield from _xml_topic_open(topic)
+            children = _attached_topics(topic)
+            if children:
+                yield XML_CHILDREN_OPEN
+                stack.append(iter(children))
+            else:
+                yield XML_TOPIC_CLOSE
+        
+        yield XML_TOPIC_CLOSE
     
-    return '\n'.join(xml_parts)
+    yield from _xml_sheet_close(json_structure)
+
+
+def generate_content_xml(json_structure):
+    """Generate content.xml content"""
+    return '\n'.join(iter_content_xml_parts(json_structure))
 
 
 def create_metadata():
@@ -822,28 +1017,318 @@ def create_manifest():
     }
 
 
-def create_xmind_file(json_structure, output_file):
-    """Create XMind file"""
+THUMBNAIL_PNG = b'\x89PNG\r\n\x1a\n\x00\x00\x00\rIHDR\x00\x00\x00\x01\x00\x00\x00\x01\x08\x02\x00\x00\x00\x90wS\xde\x00\x00\x00\x0cIDATx\x9cc\xf8\x0f\x00\x00\x01\x01\x00\x05\x18\xd4c\x00\x00\x00\x00IEND\xaeB`\x82'
+
+# 流式写入时每次刷入zip条目的文本缓冲大小（字符数）
+STREAM_BUFFER_SIZE = 256 * 1024
+# content.xml在内存中暂存的上限，超出后溢出到临时文件
+XML_SPOOL_SIZE = 8 * 1024 * 1024
+
+
+# 确定性构建使用固定的zip条目时间戳和属性
+FIXED_ZIP_DATE_TIME = (1980, 1, 1, 0, 0, 0)
+
+
+def _json_separators(compact):
+    """JSON separators for indented or compact output"""
+    return (',', ':') if compact else (',', ': ')
+
+
+def _zip_entry(name, deterministic=False):
+    """Zip entry name, or a ZipInfo with fixed timestamp/attributes for deterministic builds"""
+    if not deterministic:
+        return name
+    info = zipfile.ZipInfo(name, date_time=FIXED_ZIP_DATE_TIME)
+    info.create_system = 3
+    if name.endswith('/'):
+        info.external_attr = (0o40755 << 16) | 0x10
+        info.compress_type = zipfile.ZIP_STORED
+    else:
+        info.external_attr = 0o644 << 16
+        info.compress_type = zipfile.ZIP_DEFLATED
+    return info
+
+
+def _write_static_entries(zip_file, compact=False, deterministic=False):
+    """Write metadata.json, manifest.json and the thumbnail"""
+    indent = None if compact else 2
+    
+    # 添加metadata.json
+    zip_file.writestr(_zip_entry('metadata.json', deterministic), xmind_json.dumps(create_metadata(), indent=indent))
+    
+    # 添加manifest.json
+    zip_file.writestr(_zip_entry('manifest.json', deterministic), xmind_json.dumps(create_manifest(), indent=indent))
+    
+    # 添加空缩略图目录
+    zip_file.writestr(_zip_entry('Thumbnails/', deterministic), b'')
+    
+    # 添加默认缩略图（透明PNG）
+    zip_file.writestr(_zip_entry('Thumbnails/thumbnail.png', deterministic), THUMBNAIL_PNG)
+
+
+def create_xmind_file(json_structure, output_file, streaming=False, compact=False, deterministic=False):
+    """Create XMind file
+    
+    json_structure is one sheet or a list of sheets (all written into the
+    same archive). streaming=True walks the topic tree once and writes content.json and
+    content.xml incrementally (see stream_xmind_file); compact=True drops
+    JSON indentation. deterministic=True produces byte-identical output for
+    identical input (see write_deterministic_xmind_file) and returns its
+    {"content_hash", "written"} result; otherwise returns None.
+    """
+    if deterministic:
+        return write_deterministic_xmind_file(json_structure, output_file, streaming=streaming, compact=compact)
+    with _staged_output(output_file) as (temp_file, publish):
+        if streaming:
+            stream_xmind_file(json_structure, temp_file, compact=compact)
+        else:
+            _write_xmind_archive(json_structure, temp_file, compact=compact)
+        publish()
+    return None
+
+
+def published_file_mode(output_file):
+    """Permission bits for a file about to replace output_file
+    
+    An existing file keeps its mode; a new one gets what open() would have
+    created, i.e. 0o666 masked by the process umask.
+    """
+    if os.path.exists(output_file):
+        return stat.S_IMODE(os.stat(output_file).st_mode)
+    umask = os.umask(0)
+    os.umask(umask)
+    return 0o666 & ~umask
+
+
+@contextmanager
+def _staged_output(output_file):
+    """Stage an archive in a private temp file next to output_file
+    
+    Yields (temp_file, publish); publish() atomically moves the temp file
+    over output_file, otherwise it is removed on exit. Concurrent writers to
+    the same path never expose a half-written archive: the last complete
+    write wins.
+    """
+    output_dir = os.path.dirname(os.path.abspath(output_file))
+    fd, temp_file = tempfile.mkstemp(prefix=f".{os.path.basename(output_file)}.", suffix='.tmp', dir=output_dir)
+    os.close(fd)
+    
+    def publish():
+        # mkstemp创建的文件权限为0600，保持与普通写入一致的权限
+        os.chmod(temp_file, published_file_mode(output_file))
+        os.replace(temp_file, output_file)
+    
+    try:
+        yield temp_file, publish
+    finally:
+        if os.path.exists(temp_file):
+            os.remove(temp_file)
+
+
+def _write_xmind_archive(json_structure, output_file, compact=False, deterministic=False):
+    """Write an XMind archive from fully serialised content.json and content.xml"""
+    indent = None if compact else 2
+    sheets = json_structure if isinstance(json_structure, list) else [json_structure]
+    try:
+        content_json = xmind_json.dumps(sheets, indent=indent)
+    except RecursionError:
+        # 主题树过深时JSON编码超出递归限制，改用显式栈的流式写入器；
+        # 缩进长度随深度线性增长（总输出随深度平方增长），因此同时改为紧凑JSON
+        stream_xmind_file(json_structure, output_file, compact=True, deterministic=deterministic)
+        return
+    
     with zipfile.ZipFile(output_file, 'w', zipfile.ZIP_DEFLATED) as zip_file:
         # 添加content.json - 注意：正常文件使用数组格式
-        zip_file.writestr('content.json', json.dumps([json_structure], ensure_ascii=False, indent=2))
+        zip_file.writestr(_zip_entry('content.json', deterministic), content_json)
         
         # 添加content.xml
         content_xml = generate_content_xml(json_structure)
-        zip_file.writestr('content.xml', content_xml)
-        
-        # 添加metadata.json
-        zip_file.writestr('metadata.json', json.dumps(create_metadata(), ensure_ascii=False, indent=2))
-        
-        # 添加manifest.json
-        zip_file.writestr('manifest.json', json.dumps(create_manifest(), ensure_ascii=False, indent=2))
+        zip_file.writestr(_zip_entry('content.xml', deterministic), content_xml)
         
-        # 添加空缩略图目录
-        zip_file.writestr('Thumbnails/', b'')
-        
-        # 添加默认缩略图（透明PNG）
-        thumbnail_data = b'\x89PNG\r\n\x1a\n\x00\x00\x00\rIHDR\x00\x00\x00\x01\x00\x00\x00\x01\x08\x02\x00\x00\x00\x90wS\xde\x00\x00\x00\x0cIDATx\x9cc\xf8\x0f\x00\x00\x01\x01\x00\x05\x18\xd4c\x00\x00\x00\x00IEND\xaeB`\x82'
-        zip_file.writestr('Thumbnails/thumbnail.png', thumbnail_data)
+        _write_static_entries(zip_file, compact, deterministic)
+
+
+def file_sha256(file_path, chunk_size=1024 * 1024):
+    """SHA-256 hex digest of a file"""
+    digest = hashlib.sha256()
+    with open(file_path, 'rb') as f:
+        for chunk in iter(lambda: f.read(chunk_size), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def write_deterministic_xmind_file(json_structure, output_file, streaming=False, compact=False):
+    """Write a byte-reproducible XMind file, skipping the write when the output is unchanged
+    
+    IDs are reassigned from each topic's path and title (assign_path_ids,
+    in place) and zip entries get fixed timestamps, so identical input yields
+    an identical archive. The archive is built next to output_file and only
+    moved into place when its SHA-256 differs from the existing file.
+    
+    Returns {"content_hash": <sha256 hex>, "written": bool}.
+    """
+    assign_path_ids(json_structure)
+    
+    with _staged_output(output_file) as (temp_file, publish):
+        if streaming:
+            stream_xmind_file(json_structure, temp_file, compact=compact, deterministic=True)
+        else:
+            _write_xmind_archive(json_structure, temp_file, compact=compact, deterministic=True)
+        
+        content_hash = file_sha256(temp_file)
+        if (os.path.isfile(output_file)
+                and os.path.getsize(output_file) == os.path.getsize(temp_file)
+                and file_sha256(output_file) == content_hash):
+            return {"content_hash": content_hash, "written": False}
+        
+        publish()
+        return {"content_hash": content_hash, "written": True}
+
+
+class _BufferedTextWriter:
+    """Collect text chunks and flush them to a binary stream as UTF-8"""
+    
+    def __init__(self, stream, buffer_size=STREAM_BUFFER_SIZE, separator=''):
+        self.stream = stream
+        self.buffer_size = buffer_size
+        self.separator = separator
+        self.parts = []
+        self.size = 0
+        self.started = False
+    
+    def write(self, text):
+        if self.separator:
+            if self.started:
+                self.parts.append(self.separator)
+            self.started = True
+        self.parts.append(text)
+        self.size += len(text)
+        if self.size >= self.buffer_size:
+            self.flush()
+    
+    def flush(self):
+        if self.parts:
+            self.stream.write(''.join(self.parts).encode('utf-8'))
+            self.parts = []
+            self.size = 0
+
+
+def _iter_content_json_chunks(sheets, write_xml, compact=False):
+    """Yield content.json text for a list of sheets, emitting content.xml parts on the way
+    
+    Topic containers are walked with an explicit stack; leaf topics and all
+    non-topic values are serialised with a single xmind_json.dumps call. Indented
+    output is byte-identical to json.dumps(sheets, indent=2).
+    """
+    indent = None if compact else 2
+    item_sep, key_sep = _json_separators(compact)
+    
+    def newline(depth):
+        return '' if indent is None else '\n' + ' ' * (indent * depth)
+    
+    def dump(value, depth):
+        text = xmind_json.dumps(value, indent=indent)
+        if indent is not None and depth and '\n' in text:
+            text = text.replace('\n', newline(depth))
+        return text
+    
+    # 栈帧: [迭代器, 是否为字典, 深度, 是否首项, 角色, 原值]
+    stack = []
+    
+    def begin(value, depth, role):
+        """Return the full text of value, or push a frame and return its opening bracket"""
+        if role == 'sheets' and isinstance(value, list) and value:
+            stack.append([iter(value), False, depth, True, role, value])
+            return '['
+        if role == 'sheet' and isinstance(value, dict) and value:
+            write_xml(_xml_sheet_open(value))
+        elif role in ('root', 'topic') and isinstance(value, dict) and value:
+            if role == 'root':
+                write_xml(_xml_topic_open(value, is_root=True))
+            else:
+                for part in _xml_topic_open(value):
+                    write_xml(part)
+            if not _attached_topics(value):
+                write_xml(XML_TOPIC_CLOSE)
+                return dump(value, depth)
+        elif role == 'children' and isinstance(value, dict) and value.get('attached'):
+            pass
+        elif role == 'attached' and isinstance(value, list) and value:
+            write_xml(XML_CHILDREN_OPEN)
+            stack.append([iter(value), False, depth, True, role, value])
+            return '['
+        else:
+            return dump(value, depth)
+        stack.append([iter(value.items()), True, depth, True, role, value])
+        return '{'
+    
+    item_roles = {'sheets': 'sheet', 'attached': 'topic'}
+    key_roles = {
+        'sheet': {'rootTopic': 'root'},
+        'root': {'children': 'children'},
+        'topic': {'children': 'children'},
+        'children': {'attached': 'attached'},
+    }
+    
+    yield begin(sheets, 0, 'sheets')
+    while stack:
+        frame = stack[-1]
+        iterator, is_dict, depth, first, role, value = frame
+        item = next(iterator, _END)
+        if item is _END:
+            stack.pop()
+            if role == 'attached':
+                write_xml(XML_CHILDREN_CLOSE)
+            elif role in ('root', 'topic'):
+                write_xml(XML_TOPIC_CLOSE)
+            elif role == 'sheet':
+                for part in _xml_sheet_close(value):
+                    write_xml(part)
+            yield newline(depth) + ('}' if is_dict else ']')
+            continue
+        
+        frame[3] = False
+        prefix = ('' if first else item_sep) + newline(depth + 1)
+        if is_dict:
+            key, child = item
+            child_role = key_roles.get(role, {}).get(key)
+            yield prefix + xmind_json.dumps(key) + key_sep
+            yield begin(child, depth + 1, child_role)
+        else:
+            yield prefix
+            yield begin(item, depth + 1, item_roles.get(role))
+
+
+def stream_xmind_file(json_structure, output_file, compact=False, deterministic=False):
+    """Create XMind file by streaming content.json and content.xml into the archive
+    
+    The topic tree is walked once: content.json is written straight into its
+    zip entry while content.xml parts go to a spooled temporary file (kept in
+    memory up to XML_SPOOL_SIZE) that is copied into the archive afterwards,
+    since a zip archive can only have one entry open for writing at a time.
+    Neither document is ever built as a single string.
+    """
+    sheets = json_structure if isinstance(json_structure, list) else [json_structure]
+    
+    with tempfile.SpooledTemporaryFile(max_size=XML_SPOOL_SIZE) as xml_spool:
+        xml_writer = _BufferedTextWriter(xml_spool, separator='\n')
+        for part in XML_HEADER:
+            xml_writer.write(part)
+        
+        with zipfile.ZipFile(output_file, 'w', zipfile.ZIP_DEFLATED) as zip_file:
+            with zip_file.open(_zip_entry('content.json', deterministic), 'w') as json_entry:
+                json_writer = _BufferedTextWriter(json_entry)
+                for chunk in _iter_content_json_chunks(sheets, xml_writer.write, compact):
+                    json_writer.write(chunk)
+                json_writer.flush()
+            
+            xml_writer.write(XML_FOOTER)
+            xml_writer.flush()
+            xml_spool.seek(0)
+            with zip_file.open(_zip_entry('content.xml', deterministic), 'w') as xml_entry:
+                shutil.copyfileobj(xml_spool, xml_entry, STREAM_BUFFER_SIZE)
+            
+            _write_static_entries(zip_file, compact, deterministic)
 
 
 # ==============================================
@@ -5,161 +5,438 @@ XMind文件结构验证工具
 用于检测转换后的XMind文件格式是否正确，节点数量和关系是否正确
 """
 
+import io
 import os
+import logging
 import zipfile
-import json
 import xml.etree.ElementTree as ET
+from dataclasses import dataclass, field
 from pathlib import Path
+from typing import Any, Dict, List
+
+import xmind_json
+
+logger = logging.getLogger(__name__)
+
+# XMind 8 content.xml 命名空间
+XMIND_XML_NS = '{urn:xmind:xmap:xmlns:content:2.0}'
+
+
+def _local_name(tag):
+    """去掉命名空间前缀的标签名"""
+    return tag.rsplit('}', 1)[-1]
+
+
+@dataclass
+class TreeStats:
+    """主题树统计信息 - 一次遍历得到的所有统计量
+
+    level_widths[d] 为深度d的节点数（根为深度0）；branch_sizes[i] 为根节点
+    第i个子主题所在分支（含该子主题）的节点数。
+    """
+    node_count: int = 0
+    leaf_count: int = 0
+    max_depth: int = 0
+    level_widths: List[int] = field(default_factory=list)
+    branch_sizes: List[int] = field(default_factory=list)
+    titles: List[str] = field(default_factory=list)
+
+    def visit(self, depth: int, branch: int, title: str, child_count: int):
+        """记录一个节点；branch为所属根分支序号，根节点为-1
+
+        节点可以按先序或后序访问（流式解析时子节点先于父节点结束）。
+        """
+        self.node_count += 1
+        if not child_count:
+            self.leaf_count += 1
+        while depth >= len(self.level_widths):
+            self.level_widths.append(0)
+        if depth > self.max_depth:
+            self.max_depth = depth
+        self.level_widths[depth] += 1
+        if branch < 0:
+            if child_count > len(self.branch_sizes):
+                self.branch_sizes.extend([0] * (child_count - len(self.branch_sizes)))
+        else:
+            if branch >= len(self.branch_sizes):
+                self.branch_sizes.extend([0] * (branch + 1 - len(self.branch_sizes)))
+            self.branch_sizes[branch] += 1
+        if title:
+            self.titles.append(title)
+
+    def to_dict(self, include_titles: bool = False) -> Dict[str, Any]:
+        """转换为字典（默认不包含标题列表）"""
+        result = {
+            "node_count": self.node_count,
+            "leaf_count": self.leaf_count,
+            "max_depth": self.max_depth,
+            "level_widths": list(self.level_widths),
+            "branch_sizes": list(self.branch_sizes)
+        }
+        if include_titles:
+            result["titles"] = list(self.titles)
+        return result
+
+
+def compute_tree_stats(structure: Dict[str, Any]) -> TreeStats:
+    """对已解析的主题结构（title/children 字典）做一次迭代遍历并计算统计信息"""
+    stats = TreeStats()
+    if not structure:
+        return stats
+    stack = [(structure, 0, -1)]
+    while stack:
+        node, depth, branch = stack.pop()
+        children = node.get('children') or []
+        stats.visit(depth, branch, node.get('title'), len(children))
+        # 逆序入栈，保证按文档顺序访问（标题顺序与递归实现一致）
+        for index in range(len(children) - 1, -1, -1):
+            stack.append((children[index], depth + 1, index if depth == 0 else branch))
+    return stats
+
+
+# 条目尚未读取的标记（条目不存在时缓存为None）
+_NOT_LOADED = object()
+
 
 class XMindValidator:
-    def __init__(self, xmind_file):
+    def __init__(self, xmind_file, structure_only=False):
         self.xmind_file = xmind_file
-        self.content_json = None
-        self.content_xml = None
-        self.metadata = None
+        self.structure_only = structure_only  # 只读取解析结构所需的条目
         self.structure = {}
-        
+        self.stats = None  # 解析时同步计算的TreeStats
+        self.sheets = []  # parse_all_sheets 解析出的所有工作表
+        self.bytes_decompressed = 0  # 累计解压的字节数
+        self._names = None  # 缓存的zip条目名集合
+        self._content_json = _NOT_LOADED
+        self._content_xml = _NOT_LOADED
+        self._metadata = _NOT_LOADED
+    
+    def _read_entries(self, *names):
+        """按需读取并解码指定条目，返回 {条目名: 文本或None}"""
+        with zipfile.ZipFile(str(self.xmind_file), 'r') as zip_file:
+            if self._names is None:
+                self._names = frozenset(zip_file.namelist())
+            result = {}
+            for name in names:
+                if name in self._names:
+                    data = zip_file.read(name)
+                    self.bytes_decompressed += len(data)
+                    # JSON条目保留原始字节，由JSON后端直接解析（省去一次解码）
+                    result[name] = data if name.endswith('.json') else data.decode('utf-8')
+                else:
+                    result[name] = None
+            return result
+    
+    def _load_content_json(self, text):
+        if text is None:
+            self._content_json = None
+            return
+        try:
+            self._content_json = xmind_json.loads(text)
+        except RecursionError:
+            # 嵌套过深时JSON解码器会超出递归限制，改用content.xml
+            logger.warning("content.json嵌套过深，改用content.xml解析")
+            self._content_json = None
+    
+    @property
+    def content_json(self):
+        if self._content_json is _NOT_LOADED:
+            self._load_content_json(self._read_entries('content.json')['content.json'])
+        return self._content_json
+    
+    @content_json.setter
+    def content_json(self, value):
+        self._content_json = value
+    
+    @property
+    def content_xml(self):
+        if self._content_xml is _NOT_LOADED:
+            self._content_xml = self._read_entries('content.xml')['content.xml']
+        return self._content_xml
+    
+    @content_xml.setter
+    def content_xml(self, value):
+        self._content_xml = value
+    
+    @property
+    def metadata(self):
+        if self._metadata is _NOT_LOADED:
+            text = self._read_entries('metadata.json')['metadata.json']
+            self._metadata = xmind_json.loads(text) if text is not None else None
+        return self._metadata
+    
+    @metadata.setter
+    def metadata(self, value):
+        self._metadata = value
+    
     def extract_xmind_content(self):
-        """提取XMind文件内容"""
+        """提取XMind文件内容（structure_only时只解压content.json，其余条目在访问时再读取）"""
         try:
             # 确保文件路径正确
             file_path = Path(self.xmind_file)
             if not file_path.exists():
-                print(f"[ERROR] 文件不存在: {self.xmind_file}")
+                logger.error(f"文件不存在: {self.xmind_file}")
                 return False
-                
-            # 使用Path对象处理文件路径，避免编码问题
-            with zipfile.ZipFile(str(file_path), 'r') as zip_file:
-                # 提取content.json
-                if 'content.json' in zip_file.namelist():
-                    json_content = zip_file.read('content.json').decode('utf-8')
-                    self.content_json = json.loads(json_content)
-                
+            
+            names = ['content.json'] if self.structure_only else ['content.json', 'content.xml', 'metadata.json']
+            entries = self._read_entries(*names)
+            
+            # 提取content.json
+            self._load_content_json(entries['content.json'])
+            
+            if not self.structure_only:
                 # 提取content.xml
-                if 'content.xml' in zip_file.namelist():
-                    xml_content = zip_file.read('content.xml').decode('utf-8')
-                    self.content_xml = xml_content
+                self._content_xml = entries['content.xml']
                 
                 # 提取metadata.json
-                if 'metadata.json' in zip_file.namelist():
-                    metadata_content = zip_file.read('metadata.json').decode('utf-8')
-                    self.metadata = json.loads(metadata_content)
-                    
-                return True
+                metadata_content = entries['metadata.json']
+                self._metadata = xmind_json.loads(metadata_content) if metadata_content is not None else None
+            
+            return True
         except zipfile.BadZipFile as e:
-            print(f"[ERROR] 无效的XMind文件格式: {e}")
+            logger.error(f"无效的XMind文件格式: {e}")
             return False
         except UnicodeDecodeError as e:
-            print(f"[ERROR] 文件编码错误: {e}")
+            logger.error(f"文件编码错误: {e}")
             return False
         except Exception as e:
-            print(f"[ERROR] 提取XMind内容失败: {e}")
-            print(f"   文件路径: {self.xmind_file}")
+            logger.error(f"提取XMind内容失败: {e}（文件路径: {self.xmind_file}）")
             return False
     
     def parse_json_structure(self):
-        """解析JSON结构"""
-        if not self.content_json:
+        """解析第一个工作表的结构（content.json缺失或无法解码时退回content.xml）"""
+        try:
+            sheet = next(self.iter_sheets(), None)
+        except Exception as e:
+            logger.error(f"解析JSON结构失败: {e}")
             return False
-            
+        if sheet is None:
+            logger.error("无法找到根主题节点")
+            return False
+        self.structure, self.stats = sheet['structure'], sheet['stats']
+        return True
+    
+    def parse_all_sheets(self):
+        """一次解码解析所有工作表，结果保存在 self.sheets，第一个工作表同时作为 self.structure"""
         try:
-            # XMind文件结构是数组格式
-            if isinstance(self.content_json, list) and len(self.content_json) > 0:
-                sheet = self.content_json[0]  # 第一个工作表
-                
-                # 获取根主题
-                if 'rootTopic' in sheet:
-                    root_topic = sheet['rootTopic']
-                    self.structure = self._parse_topic_recursive(root_topic)
-                    return True
-                elif 'primaryTopic' in sheet:
-                    primary_topic = sheet['primaryTopic']
-                    self.structure = self._parse_topic_recursive(primary_topic)
-                    return True
-                    
-            # 备用：直接检查rootTopic
-            if 'rootTopic' in self.content_json:
-                root_topic = self.content_json['rootTopic']
-                self.structure = self._parse_topic_recursive(root_topic)
-                return True
-                
-            # 备用：直接检查primaryTopic
-            if 'primaryTopic' in self.content_json:
-                primary_topic = self.content_json['primaryTopic']
-                self.structure = self._parse_topic_recursive(primary_topic)
-                return True
-                
-            print("[ERROR] 无法找到根主题节点")
+            self.sheets = list(self.iter_sheets())
+        except Exception as e:
+            logger.error(f"解析工作表失败: {e}")
             return False
-            
+        if not self.sheets:
+            logger.error("无法找到根主题节点")
+            return False
+        self.structure, self.stats = self.sheets[0]['structure'], self.sheets[0]['stats']
+        return True
+    
+    def iter_sheets(self):
+        """逐个解析工作表，生成 {'index','id','title','structure','stats'}
+
+        惰性生成：每次只解析一个工作表；没有根主题的工作表会被跳过，index 为跳过后的序号，
+        与按位置选择工作表（sheet_index）一致。
+        """
+        content_json = self.content_json
+        # XMind 8 文件只有content.xml，直接从zip条目流式解析
+        sheets = self._iter_json_sheets(content_json) if content_json else self._iter_xml_sheets()
+        for index, sheet in enumerate(sheets):
+            sheet['index'] = index
+            yield sheet
+    
+    def _iter_json_sheets(self, content_json):
+        # XMind文件结构是数组格式；兼容直接以工作表对象为根的旧格式
+        sheets = content_json if isinstance(content_json, list) else [content_json]
+        for index, sheet in enumerate(sheets):
+            if not isinstance(sheet, dict):
+                continue
+            root_topic = sheet.get('rootTopic') or sheet.get('primaryTopic')
+            if not root_topic:
+                continue
+            structure, stats = self._parse_topic_tree(root_topic)
+            yield {
+                'index': index,
+                'id': sheet.get('id', ''),
+                'title': sheet.get('title', ''),
+                'structure': structure,
+                'stats': stats
+            }
+    
+    def _parse_topic_tree(self, root_topic):
+        """解析主题结构，同时在同一次遍历中计算统计信息"""
+        stats = TreeStats()
+        visit = stats.visit
+        root = None
+        stack = [(root_topic, 0, -1, None)]
+        pop = stack.pop
+        push = stack.append
+        while stack:
+            topic, level, branch, parent_children = pop()
+            title = topic.get('title', '')
+            result = {'level': level, 'title': title, 'id': topic.get('id', ''), 'children': []}
+            if parent_children is None:
+                root = result
+            else:
+                parent_children.append(result)
+
+            # 检查子主题（逆序入栈、顺序出栈，append顺序即文档顺序）
+            children = topic.get('children')
+            attached = children.get('attached') if isinstance(children, dict) else None
+            if not attached:
+                visit(level, branch, title, 0)
+                continue
+            visit(level, branch, title, len(attached))
+            child_level = level + 1
+            child_list = result['children']
+            for index in range(len(attached) - 1, -1, -1):
+                push((attached[index], child_level, index if level == 0 else branch, child_list))
+
+        return root, stats
+
+    def parse_xml_structure(self):
+        """解析content.xml中第一个工作表的结构（XMind 8格式）"""
+        try:
+            sheet = next(self._iter_xml_sheets(), None)
         except Exception as e:
-            print(f"[ERROR] 解析JSON结构失败: {e}")
+            logger.error(f"解析XML结构失败: {e}")
+            return False
+        if sheet is None:
+            logger.error("无法找到根主题节点")
             return False
+        self.structure, self.stats = sheet['structure'], sheet['stats']
+        return True
     
-    def _parse_topic_recursive(self, topic, level=0):
-        """递归解析主题结构"""
-        result = {
-            'level': level,
-            'title': topic.get('title', ''),
-            'id': topic.get('id', ''),
-            'children': []
-        }
-        
-        # 检查子主题
-        if 'children' in topic and 'attached' in topic['children']:
-            for child in topic['children']['attached']:
-                child_structure = self._parse_topic_recursive(child, level + 1)
-                result['children'].append(child_structure)
+    def _iter_xml_sheets(self):
+        """从content.xml流式解析工作表
+
+        直接从zip条目流式解析，已处理完的元素随即释放，内存占用与XML树大小无关。
+        """
+        if self._content_xml is not _NOT_LOADED and self._content_xml is not None:
+            yield from self._iterparse_sheets(io.BytesIO(self._content_xml.encode('utf-8')))
+            return
+        with zipfile.ZipFile(str(self.xmind_file), 'r') as zip_file:
+            if self._names is None:
+                self._names = frozenset(zip_file.namelist())
+            if 'content.xml' not in self._names:
+                logger.error("文件中没有content.json或content.xml")
+                return
+            try:
+                with zip_file.open('content.xml') as stream:
+                    yield from self._iterparse_sheets(stream)
+            finally:
+                self.bytes_decompressed += zip_file.getinfo('content.xml').file_size
+    
+    def _iterparse_sheets(self, stream):
+        """用iterparse流式解析各工作表的主题树，逐个生成与 iter_sheets 相同格式的字典
+
+        只收录 children/topics[type=attached] 下的子主题（与content.json的
+        children.attached一致）；每个主题元素结束时即从父元素中移除。
+        """
+        elements = []  # 当前打开的元素路径
+        open_topics = []  # [(元素, 结果字典, 分支序号)]
+        skip_depth = None  # 处于未收录子树中时，记录子树根在路径中的位置
+        local_names = {}  # 标签 -> 去掉命名空间的标签名
+        sheet = None  # 当前工作表: {'index','id','title','structure','stats'}
+        sheet_index = -1
         
-        return result
+        for event, element in ET.iterparse(stream, events=('start', 'end')):
+            tag = local_names.get(element.tag)
+            if tag is None:
+                tag = local_names[element.tag] = _local_name(element.tag)
+            if event == 'start':
+                elements.append(element)
+                if skip_depth is not None:
+                    continue
+                if tag == 'sheet':
+                    sheet_index += 1
+                    sheet = {'index': sheet_index, 'id': element.get('id', ''), 'title': '',
+                             'structure': None, 'stats': TreeStats()}
+                    continue
+                if tag != 'topic' or sheet is None:
+                    continue
+                parent = elements[-2] if len(elements) > 1 else None
+                parent_tag = local_names[parent.tag] if parent is not None else None
+                if not open_topics and sheet['structure'] is None and parent_tag == 'sheet':
+                    result = {'level': 0, 'title': '', 'id': element.get('id', ''), 'children': []}
+                    sheet['structure'] = result
+                    open_topics.append((element, result, -1))
+                elif (open_topics and parent_tag == 'topics' and parent.get('type') == 'attached'
+                      and len(elements) > 3 and elements[-4] is open_topics[-1][0]):
+                    owner_element, owner, owner_branch = open_topics[-1]
+                    level = owner['level'] + 1
+                    branch = len(owner['children']) if level == 1 else owner_branch
+                    result = {'level': level, 'title': '', 'id': element.get('id', ''), 'children': []}
+                    owner['children'].append(result)
+                    open_topics.append((element, result, branch))
+                else:
+                    skip_depth = len(elements) - 1
+                continue
+            
+            # end事件
+            elements.pop()
+            if skip_depth is not None:
+                if len(elements) == skip_depth:
+                    skip_depth = None
+                    if elements:
+                        elements[-1].remove(element)
+                continue
+            if tag == 'title' and elements:
+                if open_topics and elements[-1] is open_topics[-1][0]:
+                    # 标题先于子主题出现，此时记录可保持先序的标题顺序
+                    title = element.text or ''
+                    open_topics[-1][1]['title'] = title
+                    if title:
+                        sheet['stats'].titles.append(title)
+                elif sheet is not None and local_names[elements[-1].tag] == 'sheet':
+                    sheet['title'] = element.text or ''
+            elif tag == 'topic' and open_topics and element is open_topics[-1][0]:
+                _, result, branch = open_topics.pop()
+                sheet['stats'].visit(result['level'], branch, None, len(result['children']))
+                element.clear()
+                elements[-1].remove(element)
+            elif tag == 'sheet':
+                element.clear()
+                if elements:
+                    elements[-1].remove(element)
+                if sheet['structure'] is not None:
+                    yield sheet
+                sheet = None
+    
+    def get_stats(self, structure=None):
+        """获取统计信息；未指定结构时直接返回解析时计算好的结果"""
+        if structure is None and self.stats is not None:
+            return self.stats
+        return compute_tree_stats(self.structure if structure is None else structure)
     
     def count_nodes(self, structure=None):
         """统计节点数量"""
-        if structure is None:
-            structure = self.structure
-            
-        count = 1  # 当前节点
-        for child in structure.get('children', []):
-            count += self.count_nodes(child)
-        return count
+        return self.get_stats(structure).node_count
     
     def get_all_titles(self, structure=None, titles=None):
         """获取所有标题"""
-        if structure is None:
-            structure = self.structure
-            titles = []
-        
-        if structure.get('title'):
-            titles.append(structure['title'])
-        
-        for child in structure.get('children', []):
-            self.get_all_titles(child, titles)
-        
+        all_titles = self.get_stats(structure).titles
+        if titles is None:
+            return list(all_titles)
+        titles.extend(all_titles)
         return titles
     
     def get_max_depth(self, structure=None):
         """获取最大深度"""
         if structure is None:
             structure = self.structure
-            
-        max_depth = structure.get('level', 0)
-        for child in structure.get('children', []):
-            child_depth = self.get_max_depth(child)
-            max_depth = max(max_depth, child_depth)
-        return max_depth
+        return structure.get('level', 0) + self.get_stats(structure).max_depth
     
     def print_structure(self, structure=None, indent=0):
         """打印结构树"""
         if structure is None:
             structure = self.structure
-            
-        prefix = "  " * indent
-        title = structure.get('title', '')
-        level = structure.get('level', 0)
-        print(f"{prefix}Level {level}: {title}")
         
-        for child in structure.get('children', []):
-            self.print_structure(child, indent + 1)
+        stack = [(structure, indent)]
+        while stack:
+            node, node_indent = stack.pop()
+            prefix = "  " * node_indent
+            print(f"{prefix}Level {node.get('level', 0)}: {node.get('title', '')}")
+            
+            children = node.get('children', [])
+            stack.extend((child, node_indent + 1) for child in reversed(children))
     
     def validate(self):
         """完整验证流程"""
@@ -170,23 +447,25 @@ class XMindValidator:
         if not self.extract_xmind_content():
             return False
         
-        # 2. 解析结构
-        if not self.parse_json_structure():
+        # 2. 解析结构（所有工作表）
+        if not self.parse_all_sheets():
             print("[ERROR] 无法解析JSON结构")
             return False
         
         # 3. 基本验证
         print("[SUCCESS] 文件格式验证通过")
         
-        # 4. 统计信息
-        total_nodes = self.count_nodes()
-        all_titles = self.get_all_titles()
-        max_depth = self.get_max_depth()
+        # 4. 统计信息（解析时已一次性计算）
+        stats = self.get_stats()
         
         print(f"[STATS] 统计信息:")
-        print(f"  • 总节点数: {total_nodes}")
-        print(f"  • 标题数量: {len(all_titles)}")
-        print(f"  • 最大深度: {max_depth}")
+        if len(self.sheets) > 1:
+            print(f"  • 工作表数量: {len(self.sheets)}（以下为第一个工作表）")
+        print(f"  • 总节点数: {stats.node_count}")
+        print(f"  • 标题数量: {len(stats.titles)}")
+        print(f"  • 最大深度: {stats.max_depth}")
+        print(f"  • 叶子节点: {stats.leaf_count}")
+        print(f"  • 各层节点数: {stats.level_widths}")
         
         # 5. 结构展示
         print(f"\n[STRUCTURE] 结构树:")
@@ -256,6 +535,8 @@ def validate_all_xmind_files():
 if __name__ == "__main__":
     import sys
     
+    logging.basicConfig(level=logging.INFO, format='[%(levelname)s] %(message)s')
+    
     if len(sys.argv) > 1:
         # 验证指定文件
         filename = sys.argv[1]
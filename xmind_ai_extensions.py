@@ -562,19 +562,25 @@ class XMindAIExtensions:
     
     def _count_nodes(self, data: Dict[str, Any]) -> int:
         """计算节点数量"""
-        count = 1  # 当前节点
-        if "children" in data:
-            for child in data["children"]:
-                count += self._count_nodes(child)
+        count = 0
+        stack = [data]
+        while stack:
+            node = stack.pop()
+            count += 1
+            if "children" in node:
+                stack.extend(node["children"])
         return count
     
     def _calculate_max_depth(self, data: Dict[str, Any], current_depth: int = 0) -> int:
         """计算最大深度"""
         max_depth = current_depth
-        if "children" in data:
-            for child in data["children"]:
-                child_depth = self._calculate_max_depth(child, current_depth + 1)
-                max_depth = max(max_depth, child_depth)
+        stack = [(data, current_depth)]
+        while stack:
+            node, depth = stack.pop()
+            if depth > max_depth:
+                max_depth = depth
+            if "children" in node:
+                stack.extend((child, depth + 1) for child in node["children"])
         return max_depth
     
     def _calculate_balance_score(self, data: Dict[str, Any]) -> float:
@@ -0,0 +1,252 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+XMind批量转换组件
+在进程池中并行解析源文件并写入XMind，按完成顺序逐个返回结果；
+目录同步时用清单文件记录已转换的源文件，只重新转换有变化的文件
+"""
+
+import os
+import glob
+import json
+import tempfile
+import math
+import signal
+import logging
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, wait
+from contextlib import contextmanager
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
+
+from universal_xmind_converter import ParserFactory
+
+logger = logging.getLogger(__name__)
+
+# 单个文件默认转换超时（秒）
+DEFAULT_FILE_TIMEOUT = 120.0
+# 每个工作进程最多排队的任务块数，限制一次提交到进程池的任务量
+CHUNKS_PER_WORKER = 2
+# 工作进程无法自行超时（无SIGALRM）时，父进程额外等待的宽限时间（秒）
+STALL_GRACE_SECONDS = 30.0
+
+GLOB_CHARS = '*?['
+
+# 目录同步清单的默认文件名（位于输出目录中）及格式版本
+SYNC_MANIFEST_NAME = ".xmind-sync.json"
+SYNC_MANIFEST_VERSION = 1
+
+
+class FileTimeout(BaseException):
+    """单个文件转换超时
+
+    继承BaseException，避免被convert_to_xmind内部的 except Exception 吞掉。
+    """
+
+
+def _glob_base(pattern: str) -> str:
+    """glob模式中不含通配符的目录前缀，用于计算输出文件的相对路径"""
+    head = pattern
+    while any(char in head for char in GLOB_CHARS):
+        head = os.path.dirname(head)
+    return os.path.abspath(head or os.curdir)
+
+
+def collect_sources(source: str, recursive: bool = True) -> Tuple[str, List[str]]:
+    """收集待转换的源文件，返回 (基准目录, 文件列表)
+
+    source 可以是目录（按支持的扩展名筛选）、glob模式或单个文件。
+    """
+    if os.path.isdir(source):
+        base = os.path.abspath(source)
+        files = []
+        if recursive:
+            for root, dirs, names in os.walk(base):
+                dirs.sort()
+                files.extend(os.path.join(root, name) for name in sorted(names))
+        else:
+            files = sorted(entry.path for entry in os.scandir(base) if entry.is_file())
+        files = [path for path in files if os.path.splitext(path)[1].lower() in ParserFactory.PARSERS]
+        return base, files
+
+    if any(char in source for char in GLOB_CHARS):
+        files = sorted(os.path.abspath(path) for path in glob.glob(source, recursive=recursive) if os.path.isfile(path))
+        return _glob_base(source), files
+
+    if os.path.isfile(source):
+        path = os.path.abspath(source)
+        return os.path.dirname(path), [path]
+
+    raise FileNotFoundError(f"源路径不存在: {source}")
+
+
+def plan_outputs(base: str, files: Iterable[str], output_dir: str) -> List[Tuple[str, str]]:
+    """为每个源文件确定输出路径（保留相对基准目录的子目录结构，避免重名覆盖）"""
+    output_dir = os.path.abspath(output_dir)
+    tasks = []
+    for path in files:
+        relative = os.path.splitext(os.path.relpath(path, base))[0]
+        tasks.append((path, os.path.join(output_dir, relative + '.xmind')))
+    return tasks
+
+
+def default_chunk_size(task_count: int, workers: int) -> int:
+    """默认任务块大小：每个工作进程约分到8块，单块不超过32个文件"""
+    if task_count <= 0:
+        return 1
+    return max(1, min(32, math.ceil(task_count / (max(1, workers) * 8))))
+
+
+@contextmanager
+def _time_limit(seconds: Optional[float]):
+    """在当前进程主线程中用SIGALRM限制耗时；平台不支持时不做限制"""
+    if (
+        not seconds
+        or not hasattr(signal, 'SIGALRM')
+        or threading.current_thread() is not threading.main_thread()
+    ):
+        yield
+        return
+
+    def _on_alarm(signum, frame):
+        raise FileTimeout()
+
+    previous = signal.signal(signal.SIGALRM, _on_alarm)
+    signal.setitimer(signal.ITIMER_REAL, seconds)
+    try:
+        yield
+    finally:
+        signal.setitimer(signal.ITIMER_REAL, 0)
+        signal.signal(signal.SIGALRM, previous)
+
+
+def convert_chunk(tasks: Sequence[Tuple[str, str]], id_mode: Optional[str] = None,
+                  deterministic: bool = False, timeout: Optional[float] = DEFAULT_FILE_TIMEOUT,
+                  engine=None) -> List[Dict[str, Any]]:
+    """转换一块源文件（通常在工作进程中执行），返回每个文件的结果"""
+    if engine is None:
+        # 延迟导入：xmind_core_engine 本身依赖本模块
+        from xmind_core_engine import get_engine
+        engine = get_engine()
+
+    results = []
+    for source, output in tasks:
+        start = time.perf_counter()
+        try:
+            with _time_limit(timeout):
+                os.makedirs(os.path.dirname(output), exist_ok=True)
+                result = engine.convert_to_xmind(source, output, id_mode, deterministic, use_cache=False)
+        except FileTimeout:
+            # 输出先写临时文件再原子替换，超时中断时临时文件由 _staged_output 清理，原有输出保持不变
+            result = {
+                "status": "error",
+                "error": f"转换超时（超过 {timeout} 秒）",
+                "source_file": source,
+                "timed_out": True
+            }
+        result["seconds"] = time.perf_counter() - start
+        results.append(result)
+    return results
+
+
+def _failed_chunk(tasks: Sequence[Tuple[str, str]], error: str, timed_out: bool = False) -> List[Dict[str, Any]]:
+    results = []
+    for source, _ in tasks:
+        result = {"status": "error", "error": error, "source_file": source}
+        if timed_out:
+            result["timed_out"] = True
+        results.append(result)
+    return results
+
+
+def iter_convert(tasks: Sequence[Tuple[str, str]], workers: int = 1, chunk_size: Optional[int] = None,
+                 timeout: Optional[float] = DEFAULT_FILE_TIMEOUT, id_mode: Optional[str] = None,
+                 deterministic: bool = False, engine=None) -> Iterator[Dict[str, Any]]:
+    """按完成顺序逐个产出转换结果
+
+    workers <= 1 时用 engine 在当前进程内顺序转换；否则按 chunk_size 分块提交到
+    ProcessPoolExecutor，同时在途的任务块不超过 workers * CHUNKS_PER_WORKER。
+    """
+    chunk_size = chunk_size or default_chunk_size(len(tasks), workers)
+    chunks = [tasks[i:i + chunk_size] for i in range(0, len(tasks), chunk_size)]
+
+    if workers <= 1:
+        for chunk in chunks:
+            yield from convert_chunk(chunk, id_mode, deterministic, timeout, engine)
+        return
+
+    # 工作进程通过SIGALRM自行中断超时文件；没有SIGALRM的平台由父进程兜底
+    stall_limit = timeout * chunk_size + STALL_GRACE_SECONDS if timeout else None
+    # 进程池（连带multiprocessing）只在并行转换时导入，不拖慢服务器启动
+    from concurrent.futures import ProcessPoolExecutor
+    from xmind_executor import process_pool_context
+    from xmind_core_engine import init_worker
+    # 不用fork启动工作进程（调用方通常是多线程的服务器）；工作进程不使用转换缓存，由父进程查询和写入
+    executor = ProcessPoolExecutor(max_workers=workers, mp_context=process_pool_context(), initializer=init_worker)
+    pending = {}
+    chunk_iter = iter(chunks)
+    stalled = False
+    try:
+        while True:
+            while len(pending) < workers * CHUNKS_PER_WORKER:
+                chunk = next(chunk_iter, None)
+                if chunk is None:
+                    break
+                try:
+                    pending[executor.submit(convert_chunk, chunk, id_mode, deterministic, timeout)] = chunk
+                except Exception as e:
+                    yield from _failed_chunk(chunk, f"工作进程失败: {e}")
+            if not pending:
+                break
+
+            done, _ = wait(pending, timeout=stall_limit, return_when=FIRST_COMPLETED)
+            if not done:
+                stalled = True
+                logger.warning(f"批量转换在 {stall_limit} 秒内没有任何进展，剩余文件按超时处理")
+                for future, chunk in pending.items():
+                    future.cancel()
+                    yield from _failed_chunk(chunk, "转换超时（工作进程无响应）", timed_out=True)
+                for chunk in chunk_iter:
+                    yield from _failed_chunk(chunk, "转换超时（工作进程无响应）", timed_out=True)
+                break
+
+            for future in done:
+                chunk = pending.pop(future)
+                try:
+                    yield from future.result()
+                except Exception as e:
+                    # 工作进程崩溃（如BrokenProcessPool）时整块记为失败
+                    yield from _failed_chunk(chunk, f"工作进程失败: {e}")
+    finally:
+        for future in pending:
+            future.cancel()
+        executor.shutdown(wait=not stalled)
+
+
+def load_manifest(manifest_path: str) -> Dict[str, Any]:
+    """读取目录同步清单；不存在或损坏时返回空清单"""
+    try:
+        with open(manifest_path, 'r', encoding='utf-8') as f:
+            manifest = json.load(f)
+    except FileNotFoundError:
+        return {"version": SYNC_MANIFEST_VERSION, "files": {}}
+    except Exception as e:
+        logger.warning(f"同步清单损坏，将全部重新转换: {e}")
+        return {"version": SYNC_MANIFEST_VERSION, "files": {}}
+    if manifest.get("version") != SYNC_MANIFEST_VERSION or not isinstance(manifest.get("files"), dict):
+        return {"version": SYNC_MANIFEST_VERSION, "files": {}}
+    return manifest
+
+
+def save_manifest(manifest_path: str, manifest: Dict[str, Any]):
+    """原子写入目录同步清单（先写临时文件再替换）"""
+    directory = os.path.dirname(os.path.abspath(manifest_path))
+    os.makedirs(directory, exist_ok=True)
+    fd, temp_path = tempfile.mkstemp(prefix=".manifest.", suffix=".tmp", dir=directory)
+    try:
+        with os.fdopen(fd, 'w', encoding='utf-8') as f:
+            json.dump(manifest, f, ensure_ascii=False, separators=(',', ':'))
+        os.replace(temp_path, manifest_path)
+    finally:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
@@ -0,0 +1,473 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+XMind缓存组件
+提供转换结果的磁盘缓存、已解析思维导图的进程内缓存和分页读取会话
+"""
+
+import os
+import json
+import shutil
+import hashlib
+import logging
+import tempfile
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# 转换缓存默认容量上限（字节）
+DEFAULT_CONVERSION_CACHE_BYTES = 512 * 1024 * 1024
+# 已解析思维导图缓存默认内存预算（字节）
+DEFAULT_PARSED_CACHE_BYTES = 256 * 1024 * 1024
+# 估算内存占用时每个已解析节点的字节数（字典、子节点列表和标题字符串）
+PARSED_NODE_COST_BYTES = 512
+# 按需建立并随缓存条目保存的派生数据，每个节点追加的字节数：
+# 完整结构（新的 {"title","children"} 字典和列表，标题字符串与解析树共用）和主题ID索引（字典槽位和元组）
+STRUCTURE_NODE_COST_BYTES = 256
+TOPIC_INDEX_COST_BYTES = 128
+# 分页读取会话的数量上限和空闲超时（秒）
+DEFAULT_READ_SESSIONS = 32
+DEFAULT_READ_SESSION_TTL = 600.0
+
+
+def default_cache_dir(*parts: str) -> str:
+    """默认缓存目录（遵循 XDG_CACHE_HOME）"""
+    base = os.environ.get("XDG_CACHE_HOME") or os.path.join(os.path.expanduser("~"), ".cache")
+    return os.path.join(base, "xmind-mcp", *parts)
+
+
+def hash_file(file_path: str, chunk_size: int = 1024 * 1024) -> str:
+    """计算文件内容的SHA-256"""
+    digest = hashlib.sha256()
+    with open(file_path, 'rb') as f:
+        for chunk in iter(lambda: f.read(chunk_size), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class ConversionCache:
+    """转换结果磁盘缓存 - 以源文件内容哈希+解析器版本+选项为键，按LRU淘汰
+
+    缓存条目为完整的.xmind文件，命中时复制（或硬链接）到输出路径。
+    不另存索引：条目大小和最近访问时间直接取自条目文件本身（命中时更新其修改时间），
+    多个进程共用同一缓存目录时互相可见，命中也不需要改写任何共享文件。
+    """
+
+    # 早期版本保存在缓存目录中的索引文件，启动时删除
+    LEGACY_INDEX_FILE = "index.json"
+
+    def __init__(self, directory: Optional[str] = None, max_bytes: int = DEFAULT_CONVERSION_CACHE_BYTES,
+                 link: bool = False):
+        self.directory = os.path.abspath(directory or default_cache_dir("conversions"))
+        self.max_bytes = max_bytes
+        self.link = link
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._lock = threading.Lock()
+        os.makedirs(self.directory, exist_ok=True)
+        try:
+            os.remove(os.path.join(self.directory, self.LEGACY_INDEX_FILE))
+        except OSError:
+            pass
+
+    def _entry_path(self, key: str) -> str:
+        return os.path.join(self.directory, f"{key}.xmind")
+
+    def _scan(self) -> List[Tuple[int, int, str]]:
+        """缓存目录中的条目 [(最近访问时间ns, 大小, 键)]，从最久未访问到最近访问排列"""
+        entries = []
+        try:
+            with os.scandir(self.directory) as it:
+                for entry in it:
+                    name = entry.name
+                    # 跳过写入中的临时文件（以 . 开头）
+                    if name.startswith('.') or not name.endswith('.xmind'):
+                        continue
+                    try:
+                        st = entry.stat()
+                    except OSError:
+                        # 扫描期间被其他进程淘汰
+                        continue
+                    entries.append((st.st_mtime_ns, st.st_size, name[:-len('.xmind')]))
+        except FileNotFoundError:
+            return []
+        entries.sort()
+        return entries
+
+    def total_bytes(self) -> int:
+        return sum(size for _, size, _ in self._scan())
+
+    def make_key(self, source_path: str, parser_version: str, options: Optional[Dict[str, Any]] = None) -> str:
+        """由源文件内容、解析器版本和转换选项计算缓存键"""
+        digest = hashlib.sha256()
+        digest.update(hash_file(source_path).encode('ascii'))
+        digest.update(b"\0" + parser_version.encode('utf-8'))
+        digest.update(b"\0" + json.dumps(options or {}, sort_keys=True, ensure_ascii=False).encode('utf-8'))
+        return digest.hexdigest()
+
+    def fetch(self, key: str, output_path: str) -> bool:
+        """命中时把缓存条目放到输出路径并返回True
+
+        命中只更新条目文件的修改时间作为最近访问时间（硬链接模式下输出文件与条目是同一文件，
+        修改时间一起更新）。
+        """
+        cached_path = self._entry_path(key)
+        try:
+            os.utime(cached_path)
+            self._materialize(cached_path, output_path)
+        except FileNotFoundError:
+            if os.path.exists(cached_path):
+                raise
+            # 未缓存，或刚被其他进程淘汰
+            with self._lock:
+                self.misses += 1
+            return False
+        with self._lock:
+            self.hits += 1
+        return True
+
+    def _materialize(self, cached_path: str, output_path: str):
+        """复制或硬链接缓存条目到输出路径（先写临时文件再原子替换）"""
+        if os.path.exists(output_path) and os.path.samefile(cached_path, output_path):
+            return
+        output_dir = os.path.dirname(os.path.abspath(output_path))
+        fd, temp_path = tempfile.mkstemp(prefix=f".{os.path.basename(output_path)}.", suffix=".tmp", dir=output_dir)
+        os.close(fd)
+        try:
+            linked = False
+            if self.link:
+                os.remove(temp_path)
+                try:
+                    os.link(cached_path, temp_path)
+                    linked = True
+                except OSError:
+                    # 跨设备等无法硬链接时退回复制
+                    shutil.copyfile(cached_path, temp_path)
+            else:
+                shutil.copyfile(cached_path, temp_path)
+            if not linked:
+                # mkstemp创建的文件权限为0600，与正常转换的输出保持一致；硬链接与缓存条目共用inode，不改权限
+                from universal_xmind_converter import published_file_mode
+                os.chmod(temp_path, published_file_mode(output_path))
+            os.replace(temp_path, output_path)
+        finally:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+
+    def store(self, key: str, built_path: str):
+        """把刚生成的.xmind文件存入缓存，并按LRU淘汰超出容量的条目"""
+        size = os.path.getsize(built_path)
+        if size > self.max_bytes:
+            return
+        fd, temp_path = tempfile.mkstemp(prefix=f".{key}.", suffix=".tmp", dir=self.directory)
+        os.close(fd)
+        try:
+            shutil.copyfile(built_path, temp_path)
+            os.replace(temp_path, self._entry_path(key))
+        finally:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+
+        # 按目录中的实际条目淘汰（包括其他进程存入的条目），刚存入的条目保留
+        entries = self._scan()
+        total = sum(size for _, size, _ in entries)
+        for _, old_size, old_key in entries:
+            if total <= self.max_bytes:
+                break
+            if old_key == key:
+                continue
+            total -= old_size
+            try:
+                os.remove(self._entry_path(old_key))
+            except FileNotFoundError:
+                # 已被其他进程淘汰
+                continue
+            with self._lock:
+                self.evictions += 1
+
+    def stats(self) -> Dict[str, Any]:
+        """缓存统计信息（条目数和占用为缓存目录的当前状态，命中等计数为当前进程）"""
+        entries = self._scan()
+        with self._lock:
+            return {
+                "directory": self.directory,
+                "entries": len(entries),
+                "total_bytes": sum(size for _, size, _ in entries),
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+            }
+
+
+def file_signature(file_path: str) -> Tuple[int, int]:
+    """文件签名 (mtime_ns, size)，用于判断文件是否变化"""
+    st = os.stat(file_path)
+    return st.st_mtime_ns, st.st_size
+
+
+class ParsedMapCache:
+    """已解析思维导图的进程内LRU缓存 - 以(路径, mtime, 大小)为键，按估算内存预算淘汰
+
+    文件未变化时重复读取/分析可以跳过解压和JSON解码。缓存值由调用方
+    视为只读，需要修改时应先复制；之后附加到缓存值上的派生数据用 add_cost 计入占用。
+    """
+
+    def __init__(self, max_bytes: int = DEFAULT_PARSED_CACHE_BYTES):
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.current_bytes = 0
+        self._lock = threading.Lock()
+        self._entries: "OrderedDict[str, Tuple[Tuple[int, int], Any, int]]" = OrderedDict()
+
+    def get(self, file_path: str, signature: Tuple[int, int]) -> Optional[Any]:
+        """文件签名一致时返回缓存值，否则返回None（并丢弃过期条目）"""
+        key = os.path.abspath(file_path)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] == signature:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry[1]
+            if entry is not None:
+                del self._entries[key]
+                self.current_bytes -= entry[2]
+            self.misses += 1
+            return None
+
+    def put(self, file_path: str, signature: Tuple[int, int], value: Any, cost: int):
+        """存入缓存值，cost为估算的内存占用（字节）"""
+        if cost > self.max_bytes:
+            return
+        key = os.path.abspath(file_path)
+        with self._lock:
+            previous = self._entries.pop(key, None)
+            if previous is not None:
+                self.current_bytes -= previous[2]
+            self._entries[key] = (signature, value, cost)
+            self.current_bytes += cost
+            self._evict()
+
+    def add_cost(self, file_path: str, signature: Tuple[int, int], extra: int):
+        """为已缓存的值追加内存占用（如按需建立的结构或索引），超出预算时按LRU淘汰；条目已失效时忽略"""
+        key = os.path.abspath(file_path)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[0] != signature:
+                return
+            self._entries[key] = (signature, entry[1], entry[2] + extra)
+            self.current_bytes += extra
+            self._evict()
+
+    def _evict(self):
+        while self.current_bytes > self.max_bytes and self._entries:
+            _, (_, _, old_cost) = self._entries.popitem(last=False)
+            self.current_bytes -= old_cost
+            self.evictions += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.current_bytes = 0
+
+    def stats(self) -> Dict[str, Any]:
+        """缓存统计信息"""
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "estimated_bytes": self.current_bytes,
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+            }
+
+
+class ReadSessionStore:
+    """分页读取会话 - 在多次调用之间保存遍历状态，按数量上限（LRU）和空闲超时淘汰
+
+    会话状态持有已解析主题树的引用，解析缓存淘汰该文件后分页仍可继续。
+    """
+
+    def __init__(self, max_sessions: int = DEFAULT_READ_SESSIONS, ttl: float = DEFAULT_READ_SESSION_TTL):
+        self.max_sessions = max_sessions
+        self.ttl = ttl
+        self.created = 0
+        self.expired = 0
+        self.evictions = 0
+        self._lock = threading.Lock()
+        self._sessions: "OrderedDict[str, Tuple[float, Any]]" = OrderedDict()
+
+    def _expire(self, now: float):
+        while self._sessions:
+            session_id, (last_access, _) = next(iter(self._sessions.items()))
+            if now - last_access <= self.ttl:
+                break
+            del self._sessions[session_id]
+            self.expired += 1
+
+    def create(self, state: Any) -> str:
+        """保存新会话状态，返回会话ID"""
+        session_id = uuid.uuid4().hex
+        now = time.monotonic()
+        with self._lock:
+            self._expire(now)
+            self._sessions[session_id] = (now, state)
+            self.created += 1
+            while len(self._sessions) > self.max_sessions:
+                self._sessions.popitem(last=False)
+                self.evictions += 1
+        return session_id
+
+    def get(self, session_id: str) -> Optional[Any]:
+        """返回会话状态并刷新访问时间；不存在或已过期时返回None"""
+        now = time.monotonic()
+        with self._lock:
+            self._expire(now)
+            entry = self._sessions.get(session_id)
+            if entry is None:
+                return None
+            self._sessions[session_id] = (now, entry[1])
+            self._sessions.move_to_end(session_id)
+            return entry[1]
+
+    def discard(self, session_id: str):
+        with self._lock:
+            self._sessions.pop(session_id, None)
+
+    def stats(self) -> Dict[str, Any]:
+        """会话统计信息"""
+        with self._lock:
+            self._expire(time.monotonic())
+            return {
+                "active": len(self._sessions),
+                "max_sessions": self.max_sessions,
+                "ttl": self.ttl,
+                "created": self.created,
+                "expired": self.expired,
+                "evictions": self.evictions,
+            }
+
+
+def scan_directory(directory: str, suffix: str) -> Tuple[List[List[Any]], List[str]]:
+    """用一次os.scandir读取目录，返回 ([[文件名, 大小, mtime_ns], ...], [子目录名, ...])
+
+    文件类型来自目录项本身（d_type），只对匹配后缀的文件调用一次stat；
+    Windows上DirEntry.stat()直接使用目录读取时带回的信息，不再额外调用系统。
+    """
+    files: List[List[Any]] = []
+    dirs: List[str] = []
+    with os.scandir(directory) as entries:
+        for entry in entries:
+            try:
+                if entry.is_dir(follow_symlinks=False):
+                    dirs.append(entry.name)
+                elif entry.name.lower().endswith(suffix) and entry.is_file():
+                    st = entry.stat()
+                    files.append([entry.name, st.st_size, st.st_mtime_ns])
+            except FileNotFoundError:
+                continue
+    return files, dirs
+
+
+class DirectoryIndex:
+    """持久化的目录索引 - 记录每个目录的mtime和其中的XMind文件，重复列举时只重新读取有变化的目录
+
+    目录的mtime只在其中的条目增删或重命名时变化，因此未变化的目录直接使用索引中的
+    文件列表。原地改写（不经过重命名）的文件，其大小和修改时间在所在目录发生变化前
+    可能是旧值。
+    """
+
+    def __init__(self, root: str, suffix: str = ".xmind", path: Optional[str] = None):
+        self.root = os.path.abspath(root)
+        self.suffix = suffix
+        digest = hashlib.sha256(f"{self.root}\0{suffix}".encode('utf-8')).hexdigest()
+        self.path = path or os.path.join(default_cache_dir("directory-index"), f"{digest}.json")
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._dirs: Dict[str, Dict[str, Any]] = {}
+        self._dirty = False
+        self._load()
+
+    def _load(self):
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            if data.get("root") == self.root and data.get("suffix") == self.suffix:
+                self._dirs = data.get("dirs") or {}
+        except FileNotFoundError:
+            pass
+        except Exception as e:
+            logger.warning(f"目录索引损坏，已重建: {e}")
+
+    def save(self):
+        """索引有变化时原子写入磁盘"""
+        with self._lock:
+            if not self._dirty:
+                return
+            directory = os.path.dirname(self.path)
+            os.makedirs(directory, exist_ok=True)
+            fd, temp_path = tempfile.mkstemp(prefix=".index.", suffix=".tmp", dir=directory)
+            try:
+                with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                    json.dump({"root": self.root, "suffix": self.suffix, "dirs": self._dirs},
+                              f, ensure_ascii=False, separators=(',', ':'))
+                os.replace(temp_path, self.path)
+            finally:
+                if os.path.exists(temp_path):
+                    os.remove(temp_path)
+            self._dirty = False
+
+    def walk(self, recursive: bool = True):
+        """遍历目录树，逐个目录产出 (目录路径, [[文件名, 大小, mtime_ns], ...])"""
+        visited = set()
+        stack = [self.root]
+        while stack:
+            directory = stack.pop()
+            try:
+                mtime_ns = os.stat(directory).st_mtime_ns
+            except FileNotFoundError:
+                continue
+            visited.add(directory)
+            with self._lock:
+                cached = self._dirs.get(directory)
+            if cached is not None and cached["mtime_ns"] == mtime_ns:
+                self.hits += 1
+                files, dirs = cached["files"], cached["dirs"]
+            else:
+                self.misses += 1
+                try:
+                    files, dirs = scan_directory(directory, self.suffix)
+                except (FileNotFoundError, NotADirectoryError, PermissionError):
+                    continue
+                with self._lock:
+                    self._dirs[directory] = {"mtime_ns": mtime_ns, "files": files, "dirs": dirs}
+                    self._dirty = True
+            yield directory, files
+            if recursive:
+                stack.extend(os.path.join(directory, name) for name in reversed(dirs))
+
+        if recursive:
+            # 完整遍历后丢弃已删除目录的条目
+            with self._lock:
+                stale = [directory for directory in self._dirs if directory not in visited]
+                for directory in stale:
+                    del self._dirs[directory]
+                self._dirty = self._dirty or bool(stale)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "path": self.path,
+                "directories": len(self._dirs),
+                "hits": self.hits,
+                "misses": self.misses,
+            }
@@ -8,24 +8,91 @@ XMind核心引擎
 import json
 import os
 import sys
+import base64
+import fnmatch
+import heapq
+import time
 import logging
+import threading
+from collections import deque
+from contextlib import nullcontext
+from json.encoder import encode_basestring
 from pathlib import Path
-from typing import Any, Dict, List, Optional
+from typing import Any, Callable, Dict, Iterator, List, Optional
 
 # 导入现有的转换器组件
-from universal_xmind_converter import ParserFactory, create_xmind_file
+from universal_xmind_converter import (
+    ParserFactory, create_xmind_file, create_json_structure, create_topic,
+    use_id_generator, ID_GENERATORS, PARSER_VERSION
+)
 from validate_xmind_structure import XMindValidator
+from xmind_batch import (
+    collect_sources, plan_outputs, default_chunk_size, iter_convert, load_manifest, save_manifest,
+    DEFAULT_FILE_TIMEOUT, SYNC_MANIFEST_NAME
+)
+from xmind_watch import (
+    DirectoryWatcher, DEFAULT_DEBOUNCE_SECONDS, DEFAULT_POLL_INTERVAL, DEFAULT_QUEUE_SIZE, DEFAULT_WATCH_WORKERS
+)
+from xmind_cache import (
+    ConversionCache, ParsedMapCache, DirectoryIndex, ReadSessionStore, file_signature, hash_file, scan_directory,
+    DEFAULT_CONVERSION_CACHE_BYTES, DEFAULT_PARSED_CACHE_BYTES, PARSED_NODE_COST_BYTES,
+    STRUCTURE_NODE_COST_BYTES, TOPIC_INDEX_COST_BYTES
+)
+from xmind_search import SearchIndex, INDEXED_NONE
+import xmind_json
 
 # 配置日志
 logger = logging.getLogger(__name__)
 
+# list_xmind_files 的排序键（相对路径作为并列时的次序，保证分页游标唯一）
+LIST_SORT_KEYS = {
+    "path": lambda item: (item["relative_path"],),
+    "name": lambda item: (item["name"], item["relative_path"]),
+    "size": lambda item: (item["size"], item["relative_path"]),
+    "modified": lambda item: (item["modified"], item["relative_path"]),
+}
+
+# read_xmind_page 默认每页的节点数上限和字节数上限（按节点记录的JSON大小累计）
+DEFAULT_PAGE_NODES = 2000
+DEFAULT_PAGE_BYTES = 256 * 1024
+# read_xmind_file 支持的结构格式：嵌套字典、扁平数组、缩进大纲文本
+STRUCTURE_FORMATS = ("nested", "flat", "outline")
+# flat 格式每行的列（parent 为父主题所在行号，根为 -1）；按范围读取时在最前面加 id 列
+FLAT_COLUMNS = ("parent", "depth", "title")
+# 节点记录中键名、引号和分隔符的固定字节数（服务端输出为紧凑格式；不含两个数字和标题的引号）
+PAGE_RECORD_OVERHEAD = len(xmind_json.dumps({"id": "", "parent_id": "", "title": "", "depth": 0, "child_count": 0})) - 4
+PAGE_ROW_OVERHEAD = len(xmind_json.dumps(["", "", 0, "", 0])) - 4
+# 同一文件并发解析时只解析一次：按路径哈希分到固定数量的锁上
+LOAD_LOCK_STRIPES = 64
+# read_xmind_page 在 flat 格式下每行的列
+PAGE_COLUMNS = ("id", "parent_id", "depth", "title", "child_count")
+
+
+def _encode_cursor(data: Dict[str, Any]) -> str:
+    """把分页状态编码为不透明的游标字符串"""
+    token = xmind_json.dumps(data)
+    return base64.urlsafe_b64encode(token.encode('utf-8')).decode('ascii')
+
+
+def _decode_cursor(cursor: str) -> Dict[str, Any]:
+    """解码游标字符串（格式错误时抛出异常）"""
+    return xmind_json.loads(base64.urlsafe_b64decode(cursor.encode('ascii')))
+
 
 class XMindCoreEngine:
     """XMind核心引擎 - 处理XMind文件的核心业务逻辑"""
     
     def __init__(self):
-        self.validator = None  # 将在需要时创建
-        self.active_files = {}  # 缓存活跃的XMind文件
+        self.conversion_cache = None  # 转换结果磁盘缓存，通过configure_conversion_cache启用
+        self.parsed_cache = ParsedMapCache()  # 已解析思维导图的进程内缓存，文件未变化时跳过解析
+        self.watchers: Dict[str, DirectoryWatcher] = {}  # 源目录 -> 目录监视器
+        self.directory_indexes: Dict[str, DirectoryIndex] = {}  # 目录 -> 持久化目录索引（list_xmind_files）
+        self.search_index = None  # 主题标题搜索索引，通过configure_search_index启用（search_xmind首次调用时自动启用）
+        self.read_sessions = ReadSessionStore()  # 分页读取会话（read_xmind_page）
+        # 引擎可被多个线程同时调用：每次调用的验证器和缓冲区都是局部变量，
+        # 共享状态只有上面的缓存/索引（各自带锁）；以下锁只保护延迟创建和同一文件的并发解析
+        self._lock = threading.RLock()
+        self._load_locks = [threading.Lock() for _ in range(LOAD_LOCK_STRIPES)]
     
     def get_tools(self):
         """获取可用工具列表 - 兼容MCP服务器"""
@@ -36,7 +103,17 @@ class XMindCoreEngine:
                 "input_schema": {
                     "type": "object",
                     "properties": {
-                        "filepath": {"type": "string", "description": "XMind文件路径"}
+                        "filepath": {"type": "string", "description": "XMind文件路径"},
+                        "sheet_index": {"type": "integer", "description": "可选。返回结构的工作表索引，默认 0"},
+                        "all_sheets": {"type": "boolean", "description": "可选。在工作表摘要中同时返回每个工作表的结构，默认 false"},
+                        "topic_id": {"type": "string", "description": "可选。只返回该主题ID对应的子树"},
+                        "topic_path": {"type": "string", "description": "可选。只返回该标题路径对应的子树（从根主题开始，用 `/` 分隔）"},
+                        "max_depth": {"type": "integer", "description": "可选。最多返回的层数，0 表示只返回该主题本身"},
+                        "child_counts": {"type": "boolean", "description": "可选。为被截断的主题返回 child_count，默认 true"},
+                        "cursor": {"type": "string", "description": "可选。分页读取：上一页返回的 next_cursor"},
+                        "page_size": {"type": "integer", "description": f"可选。分页读取（广度优先、扁平节点记录）：每页最多节点数，默认 {DEFAULT_PAGE_NODES}"},
+                        "page_bytes": {"type": "integer", "description": f"可选。分页读取：每页节点记录的最大JSON字节数，默认 {DEFAULT_PAGE_BYTES}"},
+                        "structure_format": {"type": "string", "enum": list(STRUCTURE_FORMATS), "description": "可选。结构格式：nested（默认，嵌套字典）、flat（[父行号, 深度, 标题] 数组）、outline（缩进大纲文本），大型思维导图用 flat/outline 可显著减小响应"}
                     },
                     "required": ["filepath"]
                 }
@@ -63,6 +140,13 @@ class XMindCoreEngine:
                             "type": "string",
                             "description": "可选。输出文件的绝对路径；未指定时使用配置 `default_output_dir`。",
                             "examples": ["D:/project/XmindMcp/output/demo.xmind"]
+                        },
+                        "id_mode": {"type": "string", "enum": list(ID_GENERATORS), "description": "可选。主题ID生成模式：fast（默认，快速随机）、sequential（确定性，可复现构建）、uuid"},
+                        "deterministic": {"type": "boolean", "description": "可选。确定性构建：相同输入生成字节完全相同的文件，内容未变化时跳过写入，默认 false"},
+                        "sheets_json": {
+                            "type": "string",
+                            "description": "可选。追加工作表的JSON数组，每项包含中心主题`title`、可选的工作表标题`sheet_title`和`topics`/`children`；所有工作表写入同一文件",
+                            "examples": ["[{\"title\":\"第二页\",\"topics\":[{\"title\":\"要点\"}]}]"]
                         }
                     },
                     "required": ["title", "topics_json"]
@@ -70,11 +154,12 @@ class XMindCoreEngine:
             },
             {
                 "name": "analyze_mind_map",
-                "description": "分析思维导图结构（统计节点数、最大层级等）",
+                "description": "分析思维导图结构（统计节点数、最大层级等，多工作表时逐个分析）",
                 "input_schema": {
                     "type": "object",
                     "properties": {
-                        "filepath": {"type": "string", "description": "XMind文件路径"}
+                        "filepath": {"type": "string", "description": "XMind文件路径"},
+                        "sheet_index": {"type": "integer", "description": "可选。顶层结果对应的工作表索引，默认 0"}
                     },
                     "required": ["filepath"]
                 }
@@ -86,11 +171,94 @@ class XMindCoreEngine:
                     "type": "object",
                     "properties": {
                         "source_filepath": {"type": "string", "description": "源文件路径（支持 .txt/.md/.html/.docx/.xlsx 等）", "examples": ["D:/project/XmindMcp/examples/test_outline.md", "D:/project/XmindMcp/examples/test_outline.txt"]},
-                        "output_filepath": {"type": "string", "description": "可选。输出XMind文件绝对路径；未指定时自动输出到 `output/<源文件名>.xmind`", "examples": ["D:/project/XmindMcp/output/my_outline.xmind"]}
+                        "output_filepath": {"type": "string", "description": "可选。输出XMind文件绝对路径；未指定时自动输出到 `output/<源文件名>.xmind`", "examples": ["D:/project/XmindMcp/output/my_outline.xmind"]},
+                        "id_mode": {"type": "string", "enum": list(ID_GENERATORS), "description": "可选。主题ID生成模式：fast（默认，快速随机）、sequential（确定性，可复现构建）、uuid"},
+                        "deterministic": {"type": "boolean", "description": "可选。确定性构建：相同输入生成字节完全相同的文件，内容未变化时跳过写入，默认 false"},
+                        "use_cache": {"type": "boolean", "description": "可选。启用转换缓存时，源文件未变化则直接返回之前的结果，默认 true"}
                     },
                     "required": ["source_filepath"]
                 }
             },
+            {
+                "name": "batch_convert",
+                "description": "并行批量转换目录或glob模式匹配的文件为XMind（进程池并行，返回逐文件结果和吞吐量）",
+                "input_schema": {
+                    "type": "object",
+                    "properties": {
+                        "source": {"type": "string", "description": "源目录、glob模式（如 docs/**/*.md）或单个文件"},
+                        "output_dir": {"type": "string", "description": "可选。输出目录，保留源文件的相对子目录结构，默认 `output`"},
+                        "recursive": {"type": "boolean", "description": "可选。是否递归遍历目录（glob中的 ** 同样受此控制），默认 true"},
+                        "workers": {"type": "integer", "description": "可选。工作进程数，默认CPU核数；1 表示在当前进程顺序转换"},
+                        "chunk_size": {"type": "integer", "description": "可选。每次提交给工作进程的文件数，默认按文件数和进程数自动计算"},
+                        "timeout": {"type": "number", "description": f"可选。单个文件转换超时秒数，默认 {DEFAULT_FILE_TIMEOUT:g}"},
+                        "id_mode": {"type": "string", "enum": list(ID_GENERATORS), "description": "可选。主题ID生成模式：fast（默认，快速随机）、sequential（确定性，可复现构建）、uuid"},
+                        "deterministic": {"type": "boolean", "description": "可选。确定性构建，默认 false"},
+                        "use_cache": {"type": "boolean", "description": "可选。启用转换缓存时跳过未变化的源文件，默认 true"},
+                        "include_results": {"type": "boolean", "description": "可选。返回每个文件的结果（默认只返回失败的文件），默认 false"}
+                    },
+                    "required": ["source"]
+                }
+            },
+            {
+                "name": "sync_directory",
+                "description": "增量同步目录到XMind：按清单只重新转换新增或变化的源文件，并删除已删除源文件的输出",
+                "input_schema": {
+                    "type": "object",
+                    "properties": {
+                        "source_dir": {"type": "string", "description": "源目录"},
+                        "output_dir": {"type": "string", "description": "可选。输出目录，保留源文件的相对子目录结构，默认 `output`"},
+                        "manifest_path": {"type": "string", "description": f"可选。同步清单路径，默认为输出目录下的 `{SYNC_MANIFEST_NAME}`"},
+                        "recursive": {"type": "boolean", "description": "可选。是否递归遍历目录，默认 true"},
+                        "workers": {"type": "integer", "description": "可选。转换变化文件时的工作进程数，默认CPU核数"},
+                        "timeout": {"type": "number", "description": f"可选。单个文件转换超时秒数，默认 {DEFAULT_FILE_TIMEOUT:g}"},
+                        "id_mode": {"type": "string", "enum": list(ID_GENERATORS), "description": "可选。主题ID生成模式：fast（默认，快速随机）、sequential（确定性，可复现构建）、uuid"},
+                        "deterministic": {"type": "boolean", "description": "可选。确定性构建，默认 false"},
+                        "delete_removed": {"type": "boolean", "description": "可选。删除已不存在的源文件对应的输出，默认 true"},
+                        "include_skipped": {"type": "boolean", "description": "可选。在结果中列出跳过（未变化）的文件，默认 false"}
+                    },
+                    "required": ["source_dir"]
+                }
+            },
+            {
+                "name": "start_watch",
+                "description": "监视源目录，源文件变化时自动转换为XMind（inotify或轮询，防抖后放入有界队列转换）",
+                "input_schema": {
+                    "type": "object",
+                    "properties": {
+                        "source_dir": {"type": "string", "description": "要监视的源目录"},
+                        "output_dir": {"type": "string", "description": "可选。输出目录，保留源文件的相对子目录结构，默认 `output`"},
+                        "recursive": {"type": "boolean", "description": "可选。是否监视子目录，默认 true"},
+                        "debounce": {"type": "number", "description": f"可选。防抖秒数，同一文件在此时间内的连续修改只转换一次，默认 {DEFAULT_DEBOUNCE_SECONDS:g}"},
+                        "workers": {"type": "integer", "description": f"可选。转换线程数，默认 {DEFAULT_WATCH_WORKERS}"},
+                        "queue_size": {"type": "integer", "description": f"可选。转换队列容量，默认 {DEFAULT_QUEUE_SIZE}"},
+                        "backend": {"type": "string", "enum": ["auto", "inotify", "polling"], "description": "可选。监视后端，默认 auto（Linux上使用inotify）"},
+                        "poll_interval": {"type": "number", "description": f"可选。轮询后端的扫描间隔秒数，默认 {DEFAULT_POLL_INTERVAL:g}"}
+                    },
+                    "required": ["source_dir"]
+                }
+            },
+            {
+                "name": "stop_watch",
+                "description": "停止监视源目录",
+                "input_schema": {
+                    "type": "object",
+                    "properties": {
+                        "source_dir": {"type": "string", "description": "正在监视的源目录"}
+                    },
+                    "required": ["source_dir"]
+                }
+            },
+            {
+                "name": "get_watch_status",
+                "description": "获取目录监视的状态与指标（队列深度、防抖中的文件数、转换计数、转换延迟分布）",
+                "input_schema": {
+                    "type": "object",
+                    "properties": {
+                        "source_dir": {"type": "string", "description": "可选。只返回该目录的监视状态"}
+                    },
+                    "required": []
+                }
+            },
             {
                 "name": "list_xmind_files",
                 "description": "列出目录中的XMind文件",
@@ -98,8 +266,38 @@ class XMindCoreEngine:
                     "type": "object",
                     "properties": {
                         "directory": {"type": "string", "description": "要遍历的目录，默认当前目录"},
-                        "recursive": {"type": "boolean", "description": "是否递归遍历，默认 true"}
+                        "recursive": {"type": "boolean", "description": "是否递归遍历，默认 true"},
+                        "pattern": {"type": "string", "description": "可选。文件名glob过滤（如 `项目*.xmind`）；包含 `/` 时匹配相对路径"},
+                        "sort": {"type": "string", "enum": list(LIST_SORT_KEYS), "description": "可选。排序方式，默认 path（相对路径）"},
+                        "descending": {"type": "boolean", "description": "可选。是否降序，默认 false"},
+                        "limit": {"type": "integer", "description": "可选。每页最多返回的文件数；有更多结果时返回 next_cursor"},
+                        "cursor": {"type": "string", "description": "可选。上一页返回的 next_cursor"},
+                        "use_index": {"type": "boolean", "description": "可选。使用持久化目录索引加速重复列举，默认 false"}
+                    },
+                    "required": []
+                }
+            },
+            {
+                "name": "search_xmind",
+                "description": "搜索主题标题，找出提到检索词的XMind文件（基于持久化全文索引，无需逐个解析文件）",
+                "input_schema": {
+                    "type": "object",
+                    "properties": {
+                        "query": {"type": "string", "description": "检索词，多个词用空格分隔（同时包含）"},
+                        "directory": {"type": "string", "description": "可选。限定目录；同时扫描该目录更新索引"},
+                        "limit": {"type": "integer", "description": "可选。最多返回的文件数，默认 20"},
+                        "refresh": {"type": "boolean", "description": "可选。搜索前按修改时间刷新索引，默认 true"},
+                        "matches_per_file": {"type": "integer", "description": "可选。每个文件最多返回的匹配主题数，默认 5"}
                     },
+                    "required": ["query"]
+                }
+            },
+            {
+                "name": "get_cache_stats",
+                "description": "获取解析缓存、转换缓存与搜索索引的统计信息（条目数、占用、命中/未命中/淘汰次数）",
+                "input_schema": {
+                    "type": "object",
+                    "properties": {},
                     "required": []
                 }
             }
@@ -122,8 +320,388 @@ class XMindCoreEngine:
         safe_filename = safe_filename.replace(' ', '_')
         return safe_filename
         
-    def read_xmind_file(self, filepath: str) -> Dict[str, Any]:
-        """读取XMind文件内容"""
+    def read_xmind_file(self, filepath: str, sheet_index: int = 0, all_sheets: bool = False,
+                        topic_id: Optional[str] = None, topic_path: Optional[Any] = None,
+                        max_depth: Optional[int] = None, child_counts: bool = True,
+                        structure_format: str = "nested") -> Dict[str, Any]:
+        """读取XMind文件内容
+        
+        返回 sheet_index 指定工作表的结构；sheets 中列出所有工作表的摘要，
+        all_sheets=True 时摘要中同时包含每个工作表的结构。
+        
+        按范围读取：topic_id 或 topic_path（从根主题开始的标题列表，或用 `/` 分隔的字符串）
+        指定只返回某个子树，max_depth 限制返回的层数（0 表示只返回该主题本身）。
+        被截断的主题带 child_count（child_counts=False 时省略）；按范围读取时每个主题带 id，
+        便于继续按 topic_id 展开。未返回的分支不会被转换。
+        
+        structure_format 选择结构的表示方式（见 STRUCTURE_FORMATS）：nested 为嵌套的
+        {"title","children"}；flat 为 {"columns","rows"}，每行 [父行号, 深度, 标题]（先序，根的父行号为 -1；按范围读取时行首加 id）；
+        outline 为每行一个主题、按深度缩进两个空格的文本。flat/outline 直接从解析树生成。
+        """
+        if structure_format not in STRUCTURE_FORMATS:
+            return {
+                "status": "error",
+                "error": f"不支持的结构格式: {structure_format}（可选: {', '.join(STRUCTURE_FORMATS)}）",
+                "filename": os.path.basename(filepath) if filepath else "未知"
+            }
+        
+        loaded = self._load_mind_map(filepath)
+        if loaded["status"] != "success":
+            return loaded
+        
+        sheets = loaded["sheets"]
+        selected = self._select_sheet(sheets, sheet_index, filepath)
+        if selected.get("status") == "error":
+            return selected
+        
+        if max_depth is not None and max_depth < 0:
+            return {
+                "status": "error",
+                "error": f"max_depth 不能为负数: {max_depth}",
+                "filename": os.path.basename(filepath)
+            }
+        
+        scoped = topic_id is not None or topic_path is not None or max_depth is not None
+        scope = None
+        topic = selected["root"]
+        if scoped:
+            found = self._find_topic(selected, topic_id, topic_path, filepath, loaded["signature"])
+            if found is None:
+                return {
+                    "status": "error",
+                    "error": f"未找到主题: {topic_id if topic_id is not None else topic_path}",
+                    "filename": os.path.basename(filepath),
+                    "sheet_index": selected["index"]
+                }
+            topic, path = found
+            structure, returned = self._render_topic(topic, structure_format, max_depth, child_counts, include_ids=True)
+            scope = {
+                "topic_id": topic.get('id', ''),
+                "path": path,
+                "depth": len(path) - 1,
+                "max_depth": max_depth,
+                "returned_nodes": returned
+            }
+        elif structure_format == "nested":
+            structure = self._sheet_structure(selected, filepath, loaded["signature"])
+        else:
+            structure, _ = self._render_topic(topic, structure_format)
+        
+        stats = selected["stats"]
+        summaries = []
+        for sheet in sheets:
+            summary = {
+                "index": sheet["index"],
+                "title": sheet["title"],
+                "root_title": sheet["root"].get('title') or '未命名主题',
+                "total_nodes": sheet["stats"].node_count,
+                "max_depth": sheet["stats"].max_depth
+            }
+            if all_sheets:
+                if max_depth is not None or structure_format != "nested":
+                    summary["structure"], _ = self._render_topic(
+                        sheet["root"], structure_format, max_depth, child_counts, include_ids=max_depth is not None
+                    )
+                else:
+                    summary["structure"] = self._sheet_structure(sheet, filepath, loaded["signature"])
+            summaries.append(summary)
+        
+        data = {
+            "filename": os.path.basename(filepath),
+            "title": topic.get('title', '未命名主题'),
+            "structure": structure,
+            "structure_format": structure_format,
+            "total_nodes": stats.node_count,
+            "max_depth": stats.max_depth,
+            "format": "xmind",
+            "file_size": loaded["file_size"],
+            "sheet_index": selected["index"],
+            "sheet_title": selected["title"],
+            "sheet_count": len(sheets),
+            "sheets": summaries
+        }
+        if scope is not None:
+            data["scope"] = scope
+        return {
+            "status": "success",
+            "data": data
+        }
+    
+    def _render_topic(self, topic: Dict[str, Any], structure_format: str, max_depth: Optional[int] = None,
+                      child_counts: bool = True, include_ids: bool = False):
+        """按指定格式生成主题子树的结构，返回 (结构, 节点数)"""
+        if structure_format == "nested":
+            return self._convert_topic_to_dict(topic, max_depth, child_counts, include_ids, count=True)
+        
+        # flat/outline：先序遍历解析树（与嵌套结构的顺序一致）
+        with_counts = child_counts and max_depth is not None
+        rows = []
+        lines = []
+        flat = structure_format == "flat"
+        stack = [(topic, -1, 0)]
+        while stack:
+            source, parent_index, depth = stack.pop()
+            title = source.get('title', '')
+            children = source.get('children') or []
+            truncated = bool(children) and max_depth is not None and depth >= max_depth
+            if flat:
+                row = [source.get('id', ''), parent_index, depth, title] if include_ids else [parent_index, depth, title]
+                if with_counts:
+                    row.append(len(children))
+                rows.append(row)
+            else:
+                # 大纲每行一个主题，标题中的换行替换为空格
+                line = "  " * depth + title.replace("\r", " ").replace("\n", " ")
+                if truncated and with_counts:
+                    line += f" [+{len(children)}]"
+                lines.append(line)
+            if children and not truncated:
+                own_index = len(rows) - 1 if flat else len(lines) - 1
+                stack.extend((child, own_index, depth + 1) for child in reversed(children))
+        
+        if flat:
+            columns = (["id"] if include_ids else []) + list(FLAT_COLUMNS) + (["child_count"] if with_counts else [])
+            return {"columns": columns, "rows": rows}, len(rows)
+        return "\n".join(lines), len(lines)
+    
+    def read_xmind_page(self, filepath: str, sheet_index: int = 0, cursor: Optional[str] = None,
+                        page_size: Optional[int] = DEFAULT_PAGE_NODES, page_bytes: Optional[int] = DEFAULT_PAGE_BYTES,
+                        topic_id: Optional[str] = None, topic_path: Optional[Any] = None,
+                        max_depth: Optional[int] = None, structure_format: str = "nested") -> Dict[str, Any]:
+        """分页读取XMind文件结构（广度优先）
+        
+        每页返回扁平的节点记录 {"id","parent_id","title","depth","child_count"}（structure_format="flat"
+        时为按 columns 排列的数组 [id, parent_id, depth, title, child_count]），节点数不超过
+        page_size，记录的JSON大小合计不超过 page_bytes（每页至少一个节点）。首次调用不传 cursor，
+        之后把返回的 next_cursor 传回继续读取，next_cursor 为 None 时读取完毕。遍历状态保存在服务端
+        会话中（持有已解析的主题树），每页只转换本页的节点；文件在读取期间变化时会话作废。
+        topic_id/topic_path/max_depth 与 read_xmind_file 相同，depth 相对于起始主题。
+        """
+        try:
+            if (page_size is not None and page_size <= 0) or (page_bytes is not None and page_bytes <= 0):
+                return {
+                    "status": "error",
+                    "error": "page_size 和 page_bytes 必须为正数",
+                    "filename": os.path.basename(filepath) if filepath else "未知"
+                }
+            if structure_format not in ("nested", "flat"):
+                return {
+                    "status": "error",
+                    "error": f"分页读取不支持的结构格式: {structure_format}（可选: nested, flat）",
+                    "filename": os.path.basename(filepath) if filepath else "未知"
+                }
+            flat = structure_format == "flat"
+            record_overhead = PAGE_ROW_OVERHEAD if flat else PAGE_RECORD_OVERHEAD
+            
+
+            if cursor:
+                try:
+                    cursor_data = _decode_cursor(cursor)
+                    session_id, page = cursor_data["session"], cursor_data["page"]
+                except Exception as e:
+                    return {
+                        "status": "error",
+                        "error": f"无效的分页游标: {e}",
+                        "filename": os.path.basename(filepath) if filepath else "未知"
+                    }
+                state = self.read_sessions.get(session_id)
+                if state is None or (filepath and os.path.abspath(filepath) != state["filepath"]):
+                    return {
+                        "status": "error",
+                        "error": "分页会话不存在或已过期，请不带cursor重新开始读取",
+                        "filename": os.path.basename(filepath) if filepath else "未知"
+                    }
+            else:
+                if max_depth is not None and max_depth < 0:
+                    return {
+                        "status": "error",
+                        "error": f"max_depth 不能为负数: {max_depth}",
+                        "filename": os.path.basename(filepath) if filepath else "未知"
+                    }
+                loaded = self._load_mind_map(filepath)
+                if loaded["status"] != "success":
+                    return loaded
+                selected = self._select_sheet(loaded["sheets"], sheet_index, filepath)
+                if selected.get("status") == "error":
+                    return selected
+                found = self._find_topic(selected, topic_id, topic_path, filepath, loaded["signature"])
+                if found is None:
+                    return {
+                        "status": "error",
+                        "error": f"未找到主题: {topic_id if topic_id is not None else topic_path}",
+                        "filename": os.path.basename(filepath),
+                        "sheet_index": selected["index"]
+                    }
+                state = {
+                    "filepath": os.path.abspath(filepath),
+                    "signature": file_signature(filepath),
+                    "sheet": selected,
+                    "root_id": found[0].get('id', ''),
+                    "max_depth": max_depth,
+                    "queue": deque([(found[0], None, 0)]),
+                    "page": 0,
+                    "emitted": 0,
+                    "lock": threading.Lock()
+                }
+                session_id = self.read_sessions.create(state)
+                page = 0
+            
+            with state["lock"]:
+                if page != state["page"]:
+                    return {
+                        "status": "error",
+                        "error": "分页游标已被使用，请使用最近一次返回的 next_cursor",
+                        "filename": os.path.basename(state["filepath"])
+                    }
+                if file_signature(state["filepath"]) != state["signature"]:
+                    self.read_sessions.discard(session_id)
+                    return {
+                        "status": "error",
+                        "error": "文件在分页读取期间已变化，请不带cursor重新开始读取",
+                        "filename": os.path.basename(state["filepath"])
+                    }
+                
+                queue = state["queue"]
+                limit_depth = state["max_depth"]
+                nodes = []
+                size = 2
+                while queue and (page_size is None or len(nodes) < page_size):
+                    topic, parent_id, depth = queue[0]
+                    children = topic.get('children') or []
+                    node_id = topic.get('id', '')
+                    title = topic.get('title', '')
+                    if flat:
+                        record = [node_id, parent_id, depth, title, len(children)]
+                    else:
+                        record = {
+                            "id": node_id,
+                            "parent_id": parent_id,
+                            "title": title,
+                            "depth": depth,
+                            "child_count": len(children)
+                        }
+                    # 按字段长度累计记录的JSON大小（标题用json的C转义函数单独编码），避免逐条序列化
+                    record_size = (
+                        record_overhead + len(node_id) + (len(parent_id) if parent_id is not None else 2)
+                        + len(encode_basestring(title).encode('utf-8'))
+                        + len(str(depth)) + len(str(len(children))) + 1  # 列表中的 "," 分隔符
+                    )
+                    if nodes and page_bytes is not None and size + record_size > page_bytes:
+                        break
+                    queue.popleft()
+                    nodes.append(record)
+                    size += record_size
+                    if children and (limit_depth is None or depth < limit_depth):
+                        queue.extend((child, node_id, depth + 1) for child in children)
+                
+                state["page"] += 1
+                state["emitted"] += len(nodes)
+                next_cursor = None
+                if queue:
+                    next_cursor = _encode_cursor({"session": session_id, "page": state["page"]})
+                else:
+                    self.read_sessions.discard(session_id)
+            
+            sheet = state["sheet"]
+            return {
+                "status": "success",
+                "data": {
+                    "filename": os.path.basename(state["filepath"]),
+                    "sheet_index": sheet["index"],
+                    "sheet_title": sheet["title"],
+                    "total_nodes": sheet["stats"].node_count,
+                    "max_depth": sheet["stats"].max_depth,
+                    "root_id": state["root_id"],
+                    "page": state["page"],
+                    "structure_format": structure_format,
+                    "columns": list(PAGE_COLUMNS) if flat else None,
+                    "nodes": nodes,
+                    "returned": len(nodes),
+                    "emitted": state["emitted"],
+                    "page_bytes": size,
+                    "next_cursor": next_cursor
+                }
+            }
+            
+        except Exception as e:
+            logger.error(f"分页读取XMind文件失败: {filepath} - {str(e)}")
+            return {
+                "status": "error",
+                "error": str(e),
+                "filename": os.path.basename(filepath) if filepath else "未知"
+            }
+    
+    def _find_topic(self, sheet: Dict[str, Any], topic_id: Optional[str] = None,
+                    topic_path: Optional[Any] = None, filepath: Optional[str] = None, signature=None):
+        """在工作表的主题树中定位主题，返回 (主题, 从根开始的标题路径)；找不到时返回 None
+        
+        按 topic_id 查找时使用首次查找时建立的 ID 索引（保存在工作表条目中，随解析缓存复用，
+        占用计入 filepath/signature 对应的缓存条目）；
+        按 topic_path 查找时逐层匹配标题（同名取第一个），只访问路径上各层的子主题。
+        """
+        root = sheet["root"]
+        if topic_id is not None:
+            topic_index = sheet.get("topic_index")
+            if topic_index is None:
+                # ID -> (主题, 父主题ID)
+                topic_index = {}
+                stack = [(root, None)]
+                while stack:
+                    topic, parent_id = stack.pop()
+                    topic_index.setdefault(topic.get('id', ''), (topic, parent_id))
+                    children = topic.get('children')
+                    if children:
+                        own_id = topic.get('id', '')
+                        stack.extend((child, own_id) for child in reversed(children))
+                # 并发建立索引时只保留（并计入）先完成的一份
+                if sheet.setdefault("topic_index", topic_index) is topic_index:
+                    self._add_parsed_cost(filepath, signature, len(topic_index) * TOPIC_INDEX_COST_BYTES)
+                topic_index = sheet["topic_index"]
+            entry = topic_index.get(topic_id)
+            if entry is None:
+                return None
+            path = []
+            current = entry
+            # ID重复的异常文件中父链可能成环，最多回溯节点总数次
+            while current is not None and len(path) <= len(topic_index):
+                path.append(current[0].get('title', ''))
+                current = topic_index.get(current[1]) if current[1] is not None else None
+            return entry[0], path[::-1]
+        
+        if topic_path is None:
+            return root, [root.get('title', '')]
+        if isinstance(topic_path, str):
+            topic_path = [part.strip() for part in topic_path.split('/') if part.strip()]
+        titles = list(topic_path)
+        if not titles or titles[0] != root.get('title', ''):
+            return None
+        topic = root
+        for title in titles[1:]:
+            topic = next((child for child in topic.get('children') or [] if child.get('title') == title), None)
+            if topic is None:
+                return None
+        return topic, titles
+    
+    @staticmethod
+    def _select_sheet(sheets: List[Dict[str, Any]], sheet_index: int, filepath: str) -> Dict[str, Any]:
+        """按位置选择工作表，越界时返回错误结果"""
+        if sheet_index is None:
+            sheet_index = 0
+        if not 0 <= sheet_index < len(sheets):
+            return {
+                "status": "error",
+                "error": f"工作表索引超出范围: {sheet_index}（共 {len(sheets)} 个工作表）",
+                "filename": os.path.basename(filepath)
+            }
+        return sheets[sheet_index]
+    
+    def _load_mind_map(self, filepath: str) -> Dict[str, Any]:
+        """加载并解析XMind文件的所有工作表
+        
+        一次解码得到每个工作表的 {"index","title","root","stats"}：root 为解析得到的主题树
+        （含 id/level），stats 为解析时一次遍历得到的 TreeStats。返回给调用方的结构按需
+        转换（_sheet_structure / _convert_topic_to_dict），只读取子树时其余分支不会被转换。
+        """
         try:
             # 验证文件路径
             if not filepath:
@@ -154,114 +732,231 @@ class XMindCoreEngine:
                     "filename": os.path.basename(filepath)
                 }
             
+            # 文件未变化（路径、修改时间、大小一致）时直接使用缓存的解析结果
+            signature = file_signature(filepath)
+            cached = self.parsed_cache.get(filepath, signature) if self.parsed_cache else None
+            if cached is not None:
+                logger.info(f"XMind文件解析缓存命中: {filepath}")
+                sheets = cached
+            else:
+                loaded = self._parse_mind_map(filepath, signature, file_size)
+                if loaded["status"] != "success":
+                    return loaded
+                sheets = loaded["sheets"]
+            
+            # 顺带更新搜索索引（索引已是最新时只有一次主键查询）
+            if self.search_index is not None and not self.search_index.is_fresh(filepath, signature):
+                try:
+                    self.search_index.update(filepath, signature, sheets)
+                except Exception as e:
+                    logger.warning(f"更新搜索索引失败: {filepath} - {e}")
+            
+            return {
+                "status": "success",
+                "sheets": sheets,
+                "file_size": file_size,
+                "signature": signature
+            }
+            
+        except Exception as e:
+            error_msg = str(e)
+            logger.error(f"读取XMind文件失败: {filepath} - {error_msg}")
+            return {
+                "status": "error",
+                "error": error_msg,
+                "filename": os.path.basename(filepath) if filepath else "未知"
+            }
+    
+    def _parse_mind_map(self, filepath: str, signature, file_size: int) -> Dict[str, Any]:
+        """解析XMind文件并放入解析缓存；同一文件的并发请求只有一个线程解析，其余等待后复用结果"""
+        with self._load_locks[hash(filepath) % LOAD_LOCK_STRIPES]:
+            cached = self.parsed_cache.get(filepath, signature) if self.parsed_cache else None
+            if cached is not None:
+                return {"status": "success", "sheets": cached}
+            
             logger.info(f"开始读取XMind文件: {filepath} (大小: {file_size} 字节)")
             
-            # 创建验证器实例
-            self.validator = XMindValidator(filepath)
+            # 每次调用使用自己的验证器实例（只解压解析结构所需的条目）
+            validator = XMindValidator(filepath, structure_only=True)
             
             # 使用现有的验证工具读取文件
-            if not self.validator.extract_xmind_content():
+            if not validator.extract_xmind_content():
                 return {
                     "status": "error",
                     "error": "无法提取XMind文件内容",
                     "filename": os.path.basename(filepath)
                 }
-                
-            # 解析JSON结构
-            if not self.validator.parse_json_structure():
+            
+            # 解析所有工作表的结构
+            if not validator.parse_all_sheets():
                 return {
                     "status": "error",
                     "error": "无法解析XMind结构",
                     "filename": os.path.basename(filepath)
                 }
             
-            # 构建主题结构（验证器返回的已经是根主题结构）
-            structure = self._convert_topic_to_dict(self.validator.structure)
-            
-            # 获取统计信息
-            total_nodes = self.validator.count_nodes()
-            max_depth = self.validator.get_max_depth()
-            
-            logger.info(f"XMind文件读取成功: {filepath} (节点数: {total_nodes}, 深度: {max_depth})")
-            
-            return {
-                "status": "success",
-                "data": {
-                    "filename": os.path.basename(filepath),
-                    "title": structure.get('title', '未命名主题'),
-                    "structure": structure,
-                    "total_nodes": total_nodes,
-                    "max_depth": max_depth,
-                    "format": "xmind",
-                    "file_size": file_size
+            # 保留验证器返回的根主题结构，统计信息已在解析时一次遍历算出
+            sheets = [
+                {
+                    "index": sheet["index"],
+                    "title": sheet["title"],
+                    "root": sheet["structure"],
+                    "stats": sheet["stats"]
                 }
-            }
+                for sheet in validator.sheets
+            ]
+            total_nodes = sum(sheet["stats"].node_count for sheet in sheets)
             
-        except Exception as e:
-            error_msg = str(e)
-            logger.error(f"读取XMind文件失败: {filepath} - {error_msg}")
-            return {
-                "status": "error",
-                "error": error_msg,
-                "filename": os.path.basename(filepath) if filepath else "未知"
-            }
+            if self.parsed_cache:
+                self.parsed_cache.put(filepath, signature, sheets, total_nodes * PARSED_NODE_COST_BYTES)
+            
+            logger.info(f"XMind文件读取成功: {filepath} (工作表: {len(sheets)}, 节点数: {total_nodes})")
+            return {"status": "success", "sheets": sheets}
     
-    def _build_topic_structure(self, structure: Dict[str, Any]) -> Dict[str, Any]:
-        """构建主题结构"""
-        if not structure:
-            return {"title": "空主题", "children": []}
+    def _convert_topic_to_dict(self, topic: Dict[str, Any], max_depth: Optional[int] = None,
+                               child_counts: bool = True, include_ids: bool = False, count: bool = False):
+        """转换主题为字典格式（显式栈遍历，支持任意深度）
         
-        # 验证器返回的结构已经是根主题结构，直接转换即可
-        return self._convert_topic_to_dict(structure)
-    
-    def _convert_topic_to_dict(self, topic: Dict[str, Any]) -> Dict[str, Any]:
-        """转换主题为字典格式"""
-        result = {
-            "title": topic.get('title', '未命名主题'),
-            "children": []
-        }
+        max_depth 限制转换的层数，更深的子主题不会被访问；被截断的主题在 child_counts=True 时
+        带 child_count。count=True 时返回 (结构, 转换的节点数)。
+        """
+        def _new(source):
+            node = {"title": source.get('title', '未命名主题'), "children": []}
+            if include_ids:
+                node["id"] = source.get('id', '')
+            return node
         
-        # 添加子主题 - 验证器返回的children已经是列表格式
-        children = topic.get('children', [])
-        if children and isinstance(children, list):
-            for child in children:
-                result["children"].append(self._convert_topic_to_dict(child))
+        root = _new(topic)
+        converted_count = 1
+        stack = [(topic, root, 0)]
+        while stack:
+            source, result, depth = stack.pop()
+            # 添加子主题 - 验证器返回的children已经是列表格式
+            children = source.get('children', [])
+            if children and isinstance(children, list):
+                if max_depth is not None and depth >= max_depth:
+                    if child_counts:
+                        result["child_count"] = len(children)
+                    continue
+                target = result["children"]
+                for child in children:
+                    converted = _new(child)
+                    target.append(converted)
+                    stack.append((child, converted, depth + 1))
+                converted_count += len(children)
+        return (root, converted_count) if count else root
+    
+    def _sheet_structure(self, sheet: Dict[str, Any], filepath: Optional[str] = None, signature=None) -> Dict[str, Any]:
+        """工作表的完整结构，首次需要时转换并保存在工作表条目中（随解析缓存复用，调用方只读）
         
-        return result
+        转换出的结构按节点数计入 filepath/signature 对应的解析缓存条目，缓存预算包含这部分内存。
+        """
+        structure = sheet.get("structure")
+        if structure is None:
+            structure, count = self._convert_topic_to_dict(sheet["root"], count=True)
+            if sheet.setdefault("structure", structure) is structure:
+                self._add_parsed_cost(filepath, signature, count * STRUCTURE_NODE_COST_BYTES)
+            structure = sheet["structure"]
+        return structure
+    
+    def _add_parsed_cost(self, filepath: Optional[str], signature, extra: int):
+        """把附加到已解析工作表上的派生数据计入解析缓存占用"""
+        if self.parsed_cache and filepath and signature is not None:
+            self.parsed_cache.add_cost(filepath, signature, extra)
     
-    def create_mind_map(self, title: str, topics_json: str, output_path: Optional[str] = None) -> Dict[str, Any]:
-        """创建新的思维导图"""
+    def configure_conversion_cache(self, directory: Optional[str] = None,
+                                   max_bytes: int = DEFAULT_CONVERSION_CACHE_BYTES,
+                                   link: bool = False, enabled: bool = True) -> Optional[ConversionCache]:
+        """配置转换结果磁盘缓存（enabled=False 时关闭）"""
+        self.conversion_cache = ConversionCache(directory, max_bytes, link) if enabled else None
+        return self.conversion_cache
+    
+    def configure_parsed_cache(self, max_bytes: int = DEFAULT_PARSED_CACHE_BYTES,
+                               enabled: bool = True) -> Optional[ParsedMapCache]:
+        """配置已解析思维导图的内存缓存（enabled=False 时关闭）"""
+        self.parsed_cache = ParsedMapCache(max_bytes) if enabled else None
+        return self.parsed_cache
+    
+    def configure_search_index(self, path: Optional[str] = None, enabled: bool = True) -> Optional[SearchIndex]:
+        """配置主题标题搜索索引（enabled=False 时关闭）"""
+        if self.search_index is not None:
+            self.search_index.close()
+        self.search_index = SearchIndex(path) if enabled else None
+        return self.search_index
+    
+    def get_cache_stats(self) -> Dict[str, Any]:
+        """获取解析缓存、转换缓存和搜索索引的统计信息"""
+        return {
+            "status": "success",
+            "parsed_maps": self.parsed_cache.stats() if self.parsed_cache else {"enabled": False},
+            "conversions": self.conversion_cache.stats() if self.conversion_cache else {"enabled": False},
+            "search_index": self.search_index.stats() if self.search_index else {"enabled": False},
+            "read_sessions": self.read_sessions.stats()
+        }
+    
+    def _id_context(self, id_mode: Optional[str]):
+        """为单次转换选择主题ID生成器；未指定时沿用当前生成器"""
+        return use_id_generator(id_mode) if id_mode else nullcontext()
+    
+    def create_mind_map(self, title: str, topics_json: Any, output_path: Optional[str] = None,
+                        id_mode: Optional[str] = None, deterministic: bool = False,
+                        sheets_json: Optional[Any] = None) -> Dict[str, Any]:
+        """创建新的思维导图
+        
+        topics_json 构成第一个工作表；sheets_json 可选，为追加工作表的JSON数组，
+        每项形如 {"title": 中心主题, "sheet_title": 工作表标题, "topics": [...]}。
+        所有工作表一次写入同一个XMind文件。两者也可以直接传入已解析的列表/字典，省去一次序列化和解析。
+        """
         try:
             # 解析JSON格式的主题
             try:
-                topics = json.loads(topics_json)
+                topics = xmind_json.loads(topics_json) if isinstance(topics_json, (str, bytes)) else topics_json
             except json.JSONDecodeError as e:
                 return {
                     "status": "error",
                     "error": f"主题JSON格式无效: {str(e)}",
                     "title": title
                 }
-            
-            # 构建文本大纲结构
-            outline_content = self._build_outline_structure(title, topics)
-            
-            # 创建临时文件 - 使用安全的文件名
-            safe_title = self._sanitize_filename(title)
-            
-            # 确定临时文件路径 - 使用当前工作目录
-            current_dir = os.getcwd()
-            temp_file = os.path.join(current_dir, f"temp_{safe_title}.txt")
-            
-            try:
-                with open(temp_file, 'w', encoding='utf-8') as f:
-                    f.write(outline_content)
-            except Exception as e:
+            except RecursionError:
                 return {
                     "status": "error",
-                    "error": f"无法创建临时文件: {str(e)}",
+                    "error": "主题JSON嵌套过深，无法解析",
                     "title": title
                 }
             
+            if isinstance(topics, dict):
+                topics = [topics]
+            elif not isinstance(topics, list):
+                topics = [{"title": str(topics)}]
+            
+            extra_sheets: List[Dict[str, Any]] = []
+            if sheets_json:
+                try:
+                    extra_sheets = xmind_json.loads(sheets_json) if isinstance(sheets_json, (str, bytes)) else sheets_json
+                except json.JSONDecodeError as e:
+                    return {
+                        "status": "error",
+                        "error": f"工作表JSON格式无效: {str(e)}",
+                        "title": title
+                    }
+                except RecursionError:
+                    return {
+                        "status": "error",
+                        "error": "工作表JSON嵌套过深，无法解析",
+                        "title": title
+                    }
+                if isinstance(extra_sheets, dict):
+                    extra_sheets = [extra_sheets]
+                if not isinstance(extra_sheets, list) or not all(isinstance(sheet, dict) for sheet in extra_sheets):
+                    return {
+                        "status": "error",
+                        "error": "工作表JSON必须是对象数组",
+                        "title": title
+                    }
+            
+            safe_title = self._sanitize_filename(title)
+            current_dir = os.getcwd()
+            
             # 确定输出文件路径
             if output_path:
                 # 如果指定了输出路径，使用指定的路径
@@ -269,7 +964,7 @@ class XMindCoreEngine:
                 output_dir = os.path.dirname(output_file)
                 if output_dir and not os.path.exists(output_dir):
                     try:
-                        os.makedirs(output_dir)
+                        os.makedirs(output_dir, exist_ok=True)
                     except Exception as e:
                         return {
                             "status": "error",
@@ -281,7 +976,7 @@ class XMindCoreEngine:
                 output_dir = os.path.join(current_dir, "output")
                 if not os.path.exists(output_dir):
                     try:
-                        os.makedirs(output_dir)
+                        os.makedirs(output_dir, exist_ok=True)
                     except Exception as e:
                         return {
                             "status": "error",
@@ -290,39 +985,44 @@ class XMindCoreEngine:
                         }
                 output_file = os.path.join(output_dir, f"{safe_title}.xmind")
             
-            # 转换为XMind
+            # 直接在内存中构建工作表结构并写入XMind（不再经过临时大纲文件）
             try:
-                parser = ParserFactory.get_parser(temp_file)
-                json_structure = parser.parse()
-                create_xmind_file(json_structure, output_file)
+                with self._id_context(id_mode):
+                    json_structure = [self._build_json_structure(title, topics)]
+                    for position, sheet in enumerate(extra_sheets, start=2):
+                        sheet_root = str(sheet.get('title') or f"画布 {position}")
+                        sheet_topics = self._get_topic_children(sheet) or []
+                        if isinstance(sheet_topics, dict):
+                            sheet_topics = [sheet_topics]
+                        json_structure.append(self._build_json_structure(
+                            sheet_root, sheet_topics, str(sheet.get('sheet_title') or sheet_root)))
+                    build_info = create_xmind_file(json_structure, output_file, streaming=True, deterministic=deterministic)
                 success = True
             except Exception as e:
                 success = False
                 error_msg = str(e)
                 logger.error(f"XMind转换失败: {error_msg}")
-            finally:
-                # 清理临时文件
-                if os.path.exists(temp_file):
-                    try:
-                        os.remove(temp_file)
-                    except Exception as e:
-                        logger.warning(f"清理临时文件失败: {str(e)}")
             
             if success:
                 # 验证文件是否真的被创建
                 if os.path.exists(output_file):
                     file_size = os.path.getsize(output_file)
                     abs_path = os.path.abspath(output_file)
-                    return {
+                    result = {
                         "status": "success",
                         "filename": os.path.basename(output_file),
                         "title": title,
                         "topics_count": len(topics),
+                        "sheet_count": 1 + len(extra_sheets),
                         "message": f"思维导图已创建: {abs_path} (大小: {file_size} 字节)",
                         "absolute_path": abs_path,
                         "output_path": output_file,
                         "file_size": file_size
                     }
+                    if build_info:
+                        result["content_hash"] = build_info["content_hash"]
+                        result["unchanged"] = not build_info["written"]
+                    return result
                 else:
                     return {
                         "status": "error",
@@ -345,68 +1045,68 @@ class XMindCoreEngine:
                 "title": title
             }
     
-    def _build_outline_structure(self, title: str, topics: List[Dict[str, Any]]) -> str:
-        """构建文本大纲结构"""
-        lines = [title]
+    @staticmethod
+    def _get_topic_children(topic: Dict[str, Any]) -> Optional[List[Any]]:
+        """获取子主题列表（兼容 children/topics/subtopics 别名）"""
+        return (
+            topic.get('children')
+            or topic.get('topics')
+            or topic.get('subtopics')
+            or None
+        )
+    
+    def _build_json_structure(self, title: str, topics: List[Dict[str, Any]],
+                              sheet_title: str = "画布 1") -> Dict[str, Any]:
+        """将主题树直接构建为content.json工作表结构
         
-        def _get_children(topic: Dict[str, Any]):
-            return (
-                topic.get('children')
-                or topic.get('topics')
-                or topic.get('subtopics')
-                or None
-            )
-
-        def add_topics(parent_line: str, topics_list: List[Dict[str, Any]], level: int = 1):
+        与文本大纲往返不同，标题原样保留（包括以 `-`/`*` 开头的标题），
+        也不会产生任何临时文件。
+        """
+        root_children: List[Dict[str, Any]] = []
+        pending = [(topics, root_children)]
+        while pending:
+            topics_list, attached = pending.pop()
             for topic in topics_list:
-                indent = "    " * level  # 使用4个空格作为一级缩进
-                line = f"{indent}- {topic.get('title', '未命名主题')}"
-                lines.append(line)
+                if not isinstance(topic, dict):
+                    topic = {"title": str(topic)}
+                node = create_topic(str(topic.get('title', '未命名主题')))
+                attached.append(node)
                 
-                # 递归添加子主题（兼容别名）
-                children = _get_children(topic)
+                children = self._get_topic_children(topic)
                 if children:
-                    add_topics(line, children, level + 1)
+                    if isinstance(children, dict):
+                        children = [children]
+                    node["children"] = {"attached": []}
+                    pending.append((children, node["children"]["attached"]))
         
-        add_topics(title, topics)
-        return "\n".join(lines)
+        return create_json_structure(title, root_children, sheet_title)
     
-    def analyze_mind_map(self, filepath: str) -> Dict[str, Any]:
-        """分析思维导图"""
+    def analyze_mind_map(self, filepath: str, sheet_index: int = 0) -> Dict[str, Any]:
+        """分析思维导图
+        
+        顶层字段为 sheet_index 指定工作表的分析结果，sheets 中包含每个工作表的分析。
+        """
         try:
-            # 首先读取文件
-            read_result = self.read_xmind_file(filepath)
-            if read_result["status"] != "success":
-                return read_result
-            
-            # 获取根主题结构
-            root_structure = read_result["data"]["structure"]
+            # 首先读取文件（所有工作表一次解码，统计信息在解析时已一次遍历算出）
+            loaded = self._load_mind_map(filepath)
+            if loaded["status"] != "success":
+                return loaded
             
-            # 构建统计信息
-            stats = {
-                'total_nodes': read_result["data"]["total_nodes"],
-                'max_depth': read_result["data"]["max_depth"],
-                'leaf_nodes': self._count_leaf_nodes(root_structure),
-                'branch_count': len(root_structure.get('children', []))
-            }
+            sheets = loaded["sheets"]
+            selected = self._select_sheet(sheets, sheet_index, filepath)
+            if selected.get("status") == "error":
+                return selected
             
-            # 分析结构
-            analysis = {
-                "complexity": self._calculate_complexity(stats),
-                "balance": self._calculate_balance(root_structure),
-                "completeness": self._calculate_completeness(root_structure),
-                "suggestions": self._generate_suggestions(stats, root_structure)
-            }
+            sheet_analyses = [self._analyze_sheet(sheet) for sheet in sheets]
             
-            return {
+            result = {
                 "status": "success",
-                "filename": os.path.basename(filepath),
-                "total_nodes": stats.get('total_nodes', 0),
-                "max_depth": stats.get('max_depth', 0),
-                "leaf_nodes": stats.get('leaf_nodes', 0),
-                "branch_count": stats.get('branch_count', 0),
-                "structure_analysis": analysis
+                "filename": os.path.basename(filepath)
             }
+            result.update(sheet_analyses[sheet_index or 0])
+            result["sheet_count"] = len(sheets)
+            result["sheets"] = sheet_analyses
+            return result
             
         except Exception as e:
             return {
@@ -415,18 +1115,38 @@ class XMindCoreEngine:
                 "filename": os.path.basename(filepath)
             }
     
-    def _count_leaf_nodes(self, structure: Dict[str, Any]) -> int:
-        """计算叶子节点数量"""
-        if not structure.get('children'):
-            return 1
+    def _analyze_sheet(self, sheet: Dict[str, Any]) -> Dict[str, Any]:
+        """分析单个工作表"""
+        root_structure = sheet["root"]
+        tree_stats = sheet["stats"]
         
-        count = 0
-        for child in structure.get('children', []):
-            if not child.get('children'):
-                count += 1
-            else:
-                count += self._count_leaf_nodes(child)
-        return count
+        # 构建统计信息
+        stats = {
+            'total_nodes': tree_stats.node_count,
+            'max_depth': tree_stats.max_depth,
+            'leaf_nodes': tree_stats.leaf_count,
+            'branch_count': len(tree_stats.branch_sizes)
+        }
+        
+        # 分析结构
+        analysis = {
+            "complexity": self._calculate_complexity(stats),
+            "balance": self._calculate_balance(root_structure),
+            "completeness": self._calculate_completeness(root_structure),
+            "suggestions": self._generate_suggestions(stats, root_structure)
+        }
+        
+        return {
+            "sheet_index": sheet["index"],
+            "sheet_title": sheet["title"],
+            "total_nodes": stats.get('total_nodes', 0),
+            "max_depth": stats.get('max_depth', 0),
+            "leaf_nodes": stats.get('leaf_nodes', 0),
+            "branch_count": stats.get('branch_count', 0),
+            "level_widths": list(tree_stats.level_widths),
+            "branch_sizes": list(tree_stats.branch_sizes),
+            "structure_analysis": analysis
+        }
     
     def _calculate_complexity(self, stats: Dict[str, Any]) -> str:
         """计算复杂度"""
@@ -472,7 +1192,9 @@ class XMindCoreEngine:
         
         return suggestions
     
-    def convert_to_xmind(self, source_filepath: str, output_filepath: Optional[str] = None) -> Dict[str, Any]:
+    def convert_to_xmind(self, source_filepath: str, output_filepath: Optional[str] = None,
+                         id_mode: Optional[str] = None, deterministic: bool = False,
+                         use_cache: bool = True) -> Dict[str, Any]:
         """转换文件为XMind"""
         try:
             if not os.path.exists(source_filepath):
@@ -482,23 +1204,55 @@ class XMindCoreEngine:
             if not output_filepath:
                 base_name = os.path.splitext(os.path.basename(source_filepath))[0]
                 output_dir = "output"
-                if not os.path.exists(output_dir):
-                    os.makedirs(output_dir)
+                os.makedirs(output_dir, exist_ok=True)
                 output_filepath = os.path.join(output_dir, f"{base_name}.xmind")
             
+            # 源文件未变化时直接使用缓存的转换结果
+            cache = self.conversion_cache if use_cache else None
+            cache_key = None
+            if cache is not None:
+                parser_class = ParserFactory.get_parser_class(source_filepath)
+                cache_key = cache.make_key(source_filepath, PARSER_VERSION, {
+                    "parser": parser_class.__name__,
+                    "id_mode": id_mode,
+                    "deterministic": deterministic
+                })
+                if cache.fetch(cache_key, output_filepath):
+                    stats = cache.stats()
+                    return {
+                        "status": "success",
+                        "source_file": source_filepath,
+                        "output_file": output_filepath,
+                        "message": f"源文件未变化，使用缓存结果: {output_filepath}",
+                        "cache": {"hit": True, "hits": stats["hits"], "misses": stats["misses"]}
+                    }
+            
             # 使用转换器转换
-            parser = ParserFactory.get_parser(source_filepath)
-            json_structure = parser.parse()
-            create_xmind_file(json_structure, output_filepath)
+            with self._id_context(id_mode):
+                parser = ParserFactory.get_parser(source_filepath)
+                json_structure = parser.parse()
+                build_info = create_xmind_file(json_structure, output_filepath, streaming=True, deterministic=deterministic)
             success = True
             
+            if cache is not None:
+                cache.store(cache_key, output_filepath)
+            
             if success:
-                return {
+                result = {
                     "status": "success",
                     "source_file": source_filepath,
                     "output_file": output_filepath,
                     "message": f"文件转换成功: {output_filepath}"
                 }
+                if build_info:
+                    result["content_hash"] = build_info["content_hash"]
+                    result["unchanged"] = not build_info["written"]
+                    if not build_info["written"]:
+                        result["message"] = f"内容未变化，跳过写入: {output_filepath}"
+                if cache is not None:
+                    stats = cache.stats()
+                    result["cache"] = {"hit": False, "hits": stats["hits"], "misses": stats["misses"]}
+                return result
             else:
                 return {
                     "status": "error",
@@ -513,8 +1267,313 @@ class XMindCoreEngine:
                 "source_file": source_filepath
             }
     
-    def list_xmind_files(self, directory: str = ".", recursive: bool = True) -> Dict[str, Any]:
-        """列出XMind文件"""
+    def iter_batch_convert(self, source: str, output_dir: Optional[str] = None, recursive: bool = True,
+                           workers: Optional[int] = None, chunk_size: Optional[int] = None,
+                           timeout: Optional[float] = DEFAULT_FILE_TIMEOUT, id_mode: Optional[str] = None,
+                           deterministic: bool = False, use_cache: bool = True) -> Iterator[Dict[str, Any]]:
+        """批量转换目录、glob模式或单个文件，按完成顺序逐个产出每个文件的结果
+        
+        解析和写入在 workers 个进程中并行执行（默认CPU核数，1表示在当前进程顺序执行）。
+        启用转换缓存时由当前进程查询和写入缓存，命中的文件不会提交给工作进程。
+        """
+        base, files = collect_sources(source, recursive)
+        tasks = plan_outputs(base, files, output_dir or "output")
+        workers = workers if workers is not None else (os.cpu_count() or 1)
+        
+        cache = self.conversion_cache if use_cache else None
+        cache_keys = {}
+        if cache is not None:
+            misses = []
+            for source_file, output_file in tasks:
+                key = cache.make_key(source_file, PARSER_VERSION, {
+                    "parser": ParserFactory.get_parser_class(source_file).__name__,
+                    "id_mode": id_mode,
+                    "deterministic": deterministic
+                })
+                os.makedirs(os.path.dirname(output_file), exist_ok=True)
+                if cache.fetch(key, output_file):
+                    yield {
+                        "status": "success",
+                        "source_file": source_file,
+                        "output_file": output_file,
+                        "message": f"源文件未变化，使用缓存结果: {output_file}",
+                        "cache": {"hit": True}
+                    }
+                    continue
+                cache_keys[source_file] = key
+                misses.append((source_file, output_file))
+            tasks = misses
+        
+        for result in iter_convert(tasks, workers, chunk_size, timeout, id_mode, deterministic, engine=self):
+            key = cache_keys.get(result.get("source_file"))
+            if key is not None and result.get("status") == "success":
+                cache.store(key, result["output_file"])
+                result["cache"] = {"hit": False}
+            yield result
+    
+    def batch_convert(self, source: str, output_dir: Optional[str] = None, recursive: bool = True,
+                      workers: Optional[int] = None, chunk_size: Optional[int] = None,
+                      timeout: Optional[float] = DEFAULT_FILE_TIMEOUT, id_mode: Optional[str] = None,
+                      deterministic: bool = False, use_cache: bool = True, include_results: bool = False,
+                      on_result: Optional[Callable[[Dict[str, Any]], None]] = None) -> Dict[str, Any]:
+        """批量转换并汇总吞吐量
+        
+        on_result 在每个文件完成时被调用，可用于流式上报进度；
+        汇总中默认只列出失败的文件，include_results=True 时返回全部结果。
+        """
+        workers = workers if workers is not None else (os.cpu_count() or 1)
+        output_dir = os.path.abspath(output_dir or "output")
+        summary = {
+            "status": "success",
+            "source": source,
+            "output_dir": output_dir,
+            "workers": workers,
+            "total_files": 0,
+            "succeeded": 0,
+            "failed": 0,
+            "timed_out": 0,
+            "cache_hits": 0,
+            "input_bytes": 0,
+            "failures": []
+        }
+        results = []
+        start = time.perf_counter()
+        try:
+            for result in self.iter_batch_convert(source, output_dir, recursive, workers, chunk_size,
+                                                  timeout, id_mode, deterministic, use_cache):
+                summary["total_files"] += 1
+                try:
+                    summary["input_bytes"] += os.path.getsize(result["source_file"])
+                except OSError:
+                    pass
+                if result.get("status") == "success":
+                    summary["succeeded"] += 1
+                    if result.get("cache", {}).get("hit"):
+                        summary["cache_hits"] += 1
+                else:
+                    summary["failed"] += 1
+                    summary["timed_out"] += 1 if result.get("timed_out") else 0
+                    summary["failures"].append(result)
+                if include_results:
+                    results.append(result)
+                if on_result is not None:
+                    on_result(result)
+        except Exception as e:
+            return {
+                "status": "error",
+                "error": str(e),
+                "source": source
+            }
+        
+        elapsed = time.perf_counter() - start
+        summary["chunk_size"] = chunk_size or default_chunk_size(summary["total_files"] - summary["cache_hits"], workers)
+        summary["elapsed_seconds"] = elapsed
+        summary["files_per_second"] = summary["total_files"] / elapsed if elapsed > 0 else 0.0
+        summary["megabytes_per_second"] = summary["input_bytes"] / 1048576 / elapsed if elapsed > 0 else 0.0
+        if summary["total_files"] and not summary["succeeded"]:
+            summary["status"] = "error"
+            summary["error"] = "所有文件转换失败"
+        if include_results:
+            summary["results"] = results
+        return summary
+    
+    def sync_directory(self, source_dir: str, output_dir: Optional[str] = None, manifest_path: Optional[str] = None,
+                       recursive: bool = True, workers: Optional[int] = None,
+                       timeout: Optional[float] = DEFAULT_FILE_TIMEOUT, id_mode: Optional[str] = None,
+                       deterministic: bool = False, delete_removed: bool = True,
+                       include_skipped: bool = False) -> Dict[str, Any]:
+        """增量同步目录：只重新转换新增或有变化的源文件
+        
+        清单（默认为输出目录下的 .xmind-sync.json）记录每个源文件的 mtime、大小、
+        内容哈希和输出路径。mtime和大小均未变化的文件直接跳过；只有mtime变化时
+        再比较内容哈希。源文件被删除时同时删除对应的输出文件（delete_removed）。
+        解析器版本或转换选项变化时全部重新转换。
+        """
+        start = time.perf_counter()
+        try:
+            if not os.path.isdir(source_dir):
+                return {
+                    "status": "error",
+                    "error": f"源目录不存在: {source_dir}",
+                    "source_dir": source_dir
+                }
+            source_dir = os.path.abspath(source_dir)
+            output_dir = os.path.abspath(output_dir or "output")
+            manifest_path = os.path.abspath(manifest_path or os.path.join(output_dir, SYNC_MANIFEST_NAME))
+            
+            manifest = load_manifest(manifest_path)
+            options = {"parser_version": PARSER_VERSION, "id_mode": id_mode, "deterministic": deterministic}
+            old_files = manifest["files"]
+            same_setup = (
+                manifest.get("options") == options
+                and manifest.get("source_dir") == source_dir
+                and manifest.get("output_dir") == output_dir
+            )
+            previous = old_files if same_setup else {}
+            
+            base, files = collect_sources(source_dir, recursive)
+            entries: Dict[str, Dict[str, Any]] = {}
+            pending: Dict[str, Dict[str, Any]] = {}
+            skipped: List[str] = []
+            current = set()
+            for source_file, output_file in plan_outputs(base, files, output_dir):
+                relative = os.path.relpath(source_file, base)
+                current.add(relative)
+                st = os.stat(source_file)
+                entry = previous.get(relative)
+                if entry is not None and entry["output"] == output_file and os.path.exists(output_file):
+                    if entry["mtime_ns"] == st.st_mtime_ns and entry["size"] == st.st_size:
+                        entries[relative] = entry
+                        skipped.append(relative)
+                        continue
+                    digest = hash_file(source_file) if entry["size"] == st.st_size else None
+                    if digest == entry["sha256"]:
+                        # 仅修改时间变化（如重新检出），内容未变
+                        entries[relative] = dict(entry, mtime_ns=st.st_mtime_ns)
+                        skipped.append(relative)
+                        continue
+                else:
+                    digest = None
+                # 转换前记录签名和哈希：转换期间源文件再次变化时，下次同步仍会发现
+                pending[source_file] = {
+                    "relative": relative,
+                    "mtime_ns": st.st_mtime_ns,
+                    "size": st.st_size,
+                    "sha256": digest or hash_file(source_file),
+                    "output": output_file
+                }
+            
+            converted: List[str] = []
+            failed: List[Dict[str, Any]] = []
+            if pending:
+                tasks = [(source_file, info["output"]) for source_file, info in pending.items()]
+                workers = workers if workers is not None else (os.cpu_count() or 1)
+                workers = min(workers, len(tasks))
+                for result in iter_convert(tasks, workers, None, timeout, id_mode, deterministic, engine=self):
+                    info = pending[result["source_file"]]
+                    relative = info.pop("relative")
+                    if result.get("status") == "success":
+                        entries[relative] = info
+                        converted.append(relative)
+                    else:
+                        # 失败的文件不写入清单，下次同步时重试
+                        failed.append({"source": relative, "error": result.get("error")})
+            
+            removed: List[str] = []
+            for relative, entry in old_files.items():
+                if relative in current:
+                    continue
+                if delete_removed and os.path.exists(entry["output"]):
+                    os.remove(entry["output"])
+                removed.append(relative)
+            
+            save_manifest(manifest_path, {
+                "version": manifest["version"],
+                "source_dir": source_dir,
+                "output_dir": output_dir,
+                "options": options,
+                "updated": time.time(),
+                "files": entries
+            })
+            
+            result = {
+                "status": "success",
+                "source_dir": source_dir,
+                "output_dir": output_dir,
+                "manifest": manifest_path,
+                "total_files": len(files),
+                "converted": sorted(converted),
+                "skipped": len(skipped),
+                "removed": sorted(removed),
+                "failed": failed,
+                "full_rebuild": bool(old_files) and not same_setup,
+                "elapsed_seconds": time.perf_counter() - start
+            }
+            if include_skipped:
+                result["skipped_files"] = skipped
+            return result
+        except Exception as e:
+            return {
+                "status": "error",
+                "error": str(e),
+                "source_dir": source_dir
+            }
+    
+    def start_watch(self, source_dir: str, output_dir: Optional[str] = None, recursive: bool = True,
+                    debounce: float = DEFAULT_DEBOUNCE_SECONDS, workers: int = DEFAULT_WATCH_WORKERS,
+                    queue_size: int = DEFAULT_QUEUE_SIZE, backend: str = "auto",
+                    poll_interval: float = DEFAULT_POLL_INTERVAL, id_mode: Optional[str] = None,
+                    deterministic: bool = False, delete_removed: bool = True,
+                    initial_scan: bool = True) -> Dict[str, Any]:
+        """开始监视源目录，源文件变化时自动转换到输出目录
+        
+        backend 为 auto（Linux上使用inotify，否则轮询）、inotify 或 polling。
+        initial_scan=True 时启动后先转换输出缺失或过期的源文件。
+        """
+        try:
+            key = os.path.abspath(source_dir)
+            with self._lock:
+                existing = self.watchers.get(key)
+                if existing is not None and existing.running:
+                    return {
+                        "status": "error",
+                        "error": f"目录已在监视中: {key}",
+                        "source_dir": key
+                    }
+                watcher = DirectoryWatcher(
+                    key, output_dir or "output", engine=self, recursive=recursive, debounce=debounce,
+                    workers=workers, queue_size=queue_size, backend=backend, poll_interval=poll_interval,
+                    id_mode=id_mode, deterministic=deterministic, delete_removed=delete_removed,
+                    initial_scan=initial_scan
+                )
+                watcher.start()
+                self.watchers[key] = watcher
+            return {"status": "success", **watcher.metrics()}
+        except Exception as e:
+            return {
+                "status": "error",
+                "error": str(e),
+                "source_dir": source_dir
+            }
+    
+    def stop_watch(self, source_dir: str) -> Dict[str, Any]:
+        """停止监视源目录"""
+        watcher = self.watchers.pop(os.path.abspath(source_dir), None)
+        if watcher is None:
+            return {
+                "status": "error",
+                "error": f"目录未在监视中: {source_dir}",
+                "source_dir": source_dir
+            }
+        watcher.stop()
+        return {"status": "success", **watcher.metrics()}
+    
+    def get_watch_status(self, source_dir: Optional[str] = None) -> Dict[str, Any]:
+        """获取目录监视的状态与指标（队列深度、转换延迟等）"""
+        if source_dir:
+            watcher = self.watchers.get(os.path.abspath(source_dir))
+            if watcher is None:
+                return {
+                    "status": "error",
+                    "error": f"目录未在监视中: {source_dir}",
+                    "source_dir": source_dir
+                }
+            return {"status": "success", **watcher.metrics()}
+        return {
+            "status": "success",
+            "watchers": [watcher.metrics() for watcher in self.watchers.values()]
+        }
+    
+    def list_xmind_files(self, directory: str = ".", recursive: bool = True, pattern: Optional[str] = None,
+                         sort: str = "path", descending: bool = False, limit: Optional[int] = None,
+                         cursor: Optional[str] = None, use_index: bool = False) -> Dict[str, Any]:
+        """列出XMind文件
+        
+        基于os.scandir遍历（每个文件只stat一次）。pattern 为文件名glob（包含 `/` 时匹配相对路径）；
+        sort 可选 path/name/size/modified；指定 limit 时分页返回，next_cursor 传回 cursor 获取下一页
+        （游标记录上一页最后一项的排序键，列举期间文件增删不会导致重复或遗漏）。
+        use_index=True 时使用持久化目录索引，未变化的目录不再重新读取。
+        """
         try:
             # 验证目录路径
             if not directory:
@@ -538,42 +1597,91 @@ class XMindCoreEngine:
                     "directory": directory
                 }
             
-            xmind_files = []
+            if sort not in LIST_SORT_KEYS:
+                return {
+                    "status": "error",
+                    "error": f"不支持的排序方式: {sort}（可选: {', '.join(LIST_SORT_KEYS)}）",
+                    "directory": directory
+                }
+            
+            after = None
+            if cursor:
+                try:
+                    cursor_data = _decode_cursor(cursor)
+                    if cursor_data["sort"] != sort or cursor_data["descending"] != descending:
+                        raise ValueError("游标与排序参数不一致")
+                    after = tuple(cursor_data["key"])
+                except Exception as e:
+                    return {
+                        "status": "error",
+                        "error": f"无效的分页游标: {e}",
+                        "directory": directory
+                    }
             
-            if recursive:
-                # 递归搜索
-                for root, dirs, files in os.walk(directory):
-                    for file in files:
-                        if file.endswith('.xmind'):
-                            full_path = os.path.join(root, file)
-                            rel_path = os.path.relpath(full_path, directory)
-                            xmind_files.append({
-                                "name": file,
-                                "path": full_path,
-                                "relative_path": rel_path,
-                                "size": os.path.getsize(full_path),
-                                "modified": os.path.getmtime(full_path)
-                            })
+            index = self._get_directory_index(directory) if use_index else None
+            walker = index.walk(recursive) if index is not None else self._walk_xmind_files(directory, recursive)
+            match_path = pattern is not None and '/' in pattern
+            sort_key = LIST_SORT_KEYS[sort]
+            seen = [] if self.search_index is not None else None
+            
+            def _matches():
+                for dir_path, files in walker:
+                    rel_dir = os.path.relpath(dir_path, directory)
+                    for name, size, mtime_ns in files:
+                        if seen is not None:
+                            seen.append((os.path.join(dir_path, name), size, mtime_ns))
+                        rel_path = name if rel_dir == os.curdir else os.path.join(rel_dir, name)
+                        if pattern is not None:
+                            target = rel_path.replace(os.sep, '/') if match_path else name
+                            if not fnmatch.fnmatch(target, pattern):
+                                continue
+                        yield {
+                            "name": name,
+                            "path": os.path.join(dir_path, name),
+                            "relative_path": rel_path,
+                            "size": size,
+                            "modified": mtime_ns / 1e9
+                        }
+            
+            matched = 0
+            page_candidates = []
+            for item in _matches():
+                matched += 1
+                if after is not None:
+                    key = sort_key(item)
+                    if (key <= after) if not descending else (key >= after):
+                        continue
+                page_candidates.append(item)
+            if index is not None:
+                index.save()
+            if seen:
+                # 发现的文件记入搜索索引；签名变化的文件在下次搜索时重新索引
+                self.search_index.record_files(seen)
+            
+            # 只需要一页时用堆选出前limit项，避免对全部文件排序
+            if limit is not None and limit >= 0:
+                select = heapq.nlargest if descending else heapq.nsmallest
+                xmind_files = select(limit, page_candidates, key=sort_key)
             else:
-                # 仅搜索当前目录
-                for file in os.listdir(directory):
-                    if file.endswith('.xmind'):
-                        full_path = os.path.join(directory, file)
-                        xmind_files.append({
-                            "name": file,
-                            "path": full_path,
-                            "relative_path": file,
-                            "size": os.path.getsize(full_path),
-                            "modified": os.path.getmtime(full_path)
-                        })
+                xmind_files = sorted(page_candidates, key=sort_key, reverse=descending)
             
-            return {
+            result = {
                 "status": "success",
                 "directory": directory,
                 "recursive": recursive,
-                "file_count": len(xmind_files),
-                "files": xmind_files
+                "file_count": matched,
+                "returned": len(xmind_files),
+                "sort": sort,
+                "descending": descending,
+                "files": xmind_files,
+                "next_cursor": None
             }
+            if limit is not None and len(page_candidates) > len(xmind_files) and xmind_files:
+                last_key = list(sort_key(xmind_files[-1]))
+                result["next_cursor"] = _encode_cursor({"sort": sort, "descending": descending, "key": last_key})
+            if index is not None:
+                result["index"] = index.stats()
+            return result
             
         except Exception as e:
             logger.error(f"列出XMind文件失败: {str(e)}")
@@ -582,39 +1690,221 @@ class XMindCoreEngine:
                 "error": str(e),
                 "directory": directory
             }
+    
+    def search_xmind(self, query: str, directory: Optional[str] = None, limit: int = 20,
+                     refresh: bool = True, matches_per_file: int = 5) -> Dict[str, Any]:
+        """搜索主题标题，返回提到检索词的XMind文件
+        
+        使用持久化的SQLite FTS5索引，不再逐个解压解析XMind文件。refresh=True 时先按
+        mtime/大小检查索引：指定 directory 时扫描该目录（新增/修改的文件重新索引，删除的文件移出索引），
+        否则只检查已索引的文件。
+        """
+        try:
+            if not query or not query.strip():
+                return {"status": "error", "error": "检索词不能为空", "query": query}
+            if directory is not None:
+                directory = os.path.abspath(directory)
+                if not os.path.isdir(directory):
+                    return {"status": "error", "error": f"目录不存在: {directory}", "query": query}
+            
+            index = self.search_index or self._default_search_index()
+            start = time.perf_counter()
+            refreshed = self._refresh_search_index(directory) if refresh else None
+            refresh_seconds = time.perf_counter() - start
+            
+            results = index.search(query, max(1, limit), directory, matches_per_file)
+            result = {
+                "status": "success",
+                "query": query,
+                "directory": directory,
+                "mode": index.mode,
+                "file_count": len(results),
+                "results": results,
+                "refresh_ms": round(refresh_seconds * 1000, 3),
+                "search_ms": round((time.perf_counter() - start - refresh_seconds) * 1000, 3)
+            }
+            if refreshed is not None:
+                result["refresh"] = refreshed
+            return result
+            
+        except Exception as e:
+            logger.error(f"搜索XMind文件失败: {str(e)}")
+            return {
+                "status": "error",
+                "error": str(e),
+                "query": query
+            }
+    
+    def _default_search_index(self) -> SearchIndex:
+        """search_xmind 首次调用且未配置索引时启用默认索引（并发调用只创建一个）"""
+        with self._lock:
+            if self.search_index is None:
+                self.configure_search_index()
+            return self.search_index
+    
+    def _refresh_search_index(self, directory: Optional[str]) -> Dict[str, int]:
+        """按文件签名刷新搜索索引，返回检查/重新索引/移除/失败的文件数"""
+        index = self.search_index
+        indexed = index.files(directory)
+        current = {}
+        if directory is not None:
+            for dir_path, files in self._walk_xmind_files(directory, True):
+                for name, size, mtime_ns in files:
+                    current[os.path.join(dir_path, name)] = (mtime_ns, size)
+        else:
+            for path in indexed:
+                try:
+                    current[path] = file_signature(path)
+                except OSError:
+                    continue
+        
+        removed = [path for path in indexed if path not in current]
+        if removed:
+            index.remove(removed)
+        
+        reindexed = failed = 0
+        for path, signature in current.items():
+            entry = indexed.get(path)
+            if entry is not None and (entry[0], entry[1]) == tuple(signature) and entry[2] != INDEXED_NONE:
+                continue
+            loaded = self._load_mind_map(path)
+            if loaded["status"] == "success":
+                reindexed += 1
+            else:
+                # 解析失败的文件记录下来，文件变化前不再重试
+                index.mark_failed(path, signature)
+                failed += 1
+        return {"checked": len(current), "reindexed": reindexed, "removed": len(removed), "failed": failed}
+    
+    @staticmethod
+    def _walk_xmind_files(directory: str, recursive: bool):
+        """不使用索引时逐个目录scandir，产出 (目录路径, [[文件名, 大小, mtime_ns], ...])"""
+        stack = [directory]
+        while stack:
+            current = stack.pop()
+            try:
+                files, dirs = scan_directory(current, ".xmind")
+            except (FileNotFoundError, NotADirectoryError, PermissionError):
+                continue
+            yield current, files
+            if recursive:
+                stack.extend(os.path.join(current, name) for name in reversed(dirs))
+    
+    def _get_directory_index(self, directory: str) -> DirectoryIndex:
+        """同一目录的持久化索引在进程内只加载一次"""
+        index = self.directory_indexes.get(directory)
+        if index is None:
+            with self._lock:
+                index = self.directory_indexes.get(directory)
+                if index is None:
+                    index = self.directory_indexes[directory] = DirectoryIndex(directory)
+        return index
 
 
 # 全局引擎实例
 _engine = None
+_engine_lock = threading.Lock()
 
 def get_engine() -> XMindCoreEngine:
     """获取全局引擎实例"""
     global _engine
     if _engine is None:
-        _engine = XMindCoreEngine()
+        with _engine_lock:
+            if _engine is None:
+                _engine = XMindCoreEngine()
     return _engine
 
 
+def init_worker(conversion_cache: Optional[Dict[str, Any]] = None):
+    """进程池工作进程的初始化：按父进程的设置配置转换缓存（None 表示不使用缓存）"""
+    if conversion_cache:
+        get_engine().configure_conversion_cache(**conversion_cache)
+    else:
+        get_engine().configure_conversion_cache(enabled=False)
+
+
 # 工具函数
-def read_xmind_file(filepath: str) -> Dict[str, Any]:
+def read_xmind_file(filepath: str, sheet_index: int = 0, all_sheets: bool = False,
+                    topic_id: Optional[str] = None, topic_path: Optional[Any] = None,
+                    max_depth: Optional[int] = None, child_counts: bool = True,
+                    structure_format: str = "nested") -> Dict[str, Any]:
     """读取XMind文件"""
-    return get_engine().read_xmind_file(filepath)
+    return get_engine().read_xmind_file(filepath, sheet_index, all_sheets, topic_id, topic_path, max_depth,
+                                        child_counts, structure_format)
+
+def read_xmind_page(filepath: str, sheet_index: int = 0, cursor: Optional[str] = None,
+                    page_size: Optional[int] = DEFAULT_PAGE_NODES, page_bytes: Optional[int] = DEFAULT_PAGE_BYTES,
+                    topic_id: Optional[str] = None, topic_path: Optional[Any] = None,
+                    max_depth: Optional[int] = None, structure_format: str = "nested") -> Dict[str, Any]:
+    """分页读取XMind文件结构"""
+    return get_engine().read_xmind_page(filepath, sheet_index, cursor, page_size, page_bytes,
+                                        topic_id, topic_path, max_depth, structure_format)
 
-def create_mind_map(title: str, topics_json: str, output_path: Optional[str] = None) -> Dict[str, Any]:
+def create_mind_map(title: str, topics_json: Any, output_path: Optional[str] = None,
+                    id_mode: Optional[str] = None, deterministic: bool = False,
+                    sheets_json: Optional[Any] = None) -> Dict[str, Any]:
     """创建思维导图"""
-    return get_engine().create_mind_map(title, topics_json, output_path)
+    return get_engine().create_mind_map(title, topics_json, output_path, id_mode, deterministic, sheets_json)
 
-def analyze_mind_map(filepath: str) -> Dict[str, Any]:
+def analyze_mind_map(filepath: str, sheet_index: int = 0) -> Dict[str, Any]:
     """分析思维导图"""
-    return get_engine().analyze_mind_map(filepath)
+    return get_engine().analyze_mind_map(filepath, sheet_index)
 
-def convert_to_xmind(source_filepath: str, output_filepath: Optional[str] = None) -> Dict[str, Any]:
+def convert_to_xmind(source_filepath: str, output_filepath: Optional[str] = None,
+                     id_mode: Optional[str] = None, deterministic: bool = False,
+                     use_cache: bool = True) -> Dict[str, Any]:
     """转换文件为XMind"""
-    return get_engine().convert_to_xmind(source_filepath, output_filepath)
+    return get_engine().convert_to_xmind(source_filepath, output_filepath, id_mode, deterministic, use_cache)
+
+def batch_convert(source: str, output_dir: Optional[str] = None, recursive: bool = True,
+                  workers: Optional[int] = None, chunk_size: Optional[int] = None,
+                  timeout: Optional[float] = DEFAULT_FILE_TIMEOUT, id_mode: Optional[str] = None,
+                  deterministic: bool = False, use_cache: bool = True, include_results: bool = False,
+                  on_result: Optional[Callable[[Dict[str, Any]], None]] = None) -> Dict[str, Any]:
+    """批量转换文件为XMind"""
+    return get_engine().batch_convert(source, output_dir, recursive, workers, chunk_size, timeout,
+                                      id_mode, deterministic, use_cache, include_results, on_result)
+
+def sync_directory(source_dir: str, output_dir: Optional[str] = None, manifest_path: Optional[str] = None,
+                   recursive: bool = True, workers: Optional[int] = None,
+                   timeout: Optional[float] = DEFAULT_FILE_TIMEOUT, id_mode: Optional[str] = None,
+                   deterministic: bool = False, delete_removed: bool = True,
+                   include_skipped: bool = False) -> Dict[str, Any]:
+    """增量同步目录"""
+    return get_engine().sync_directory(source_dir, output_dir, manifest_path, recursive, workers, timeout,
+                                       id_mode, deterministic, delete_removed, include_skipped)
+
+def start_watch(source_dir: str, output_dir: Optional[str] = None, recursive: bool = True,
+                debounce: float = DEFAULT_DEBOUNCE_SECONDS, workers: int = DEFAULT_WATCH_WORKERS,
+                queue_size: int = DEFAULT_QUEUE_SIZE, backend: str = "auto",
+                poll_interval: float = DEFAULT_POLL_INTERVAL, id_mode: Optional[str] = None,
+                deterministic: bool = False, delete_removed: bool = True, initial_scan: bool = True) -> Dict[str, Any]:
+    """开始监视目录并自动转换"""
+    return get_engine().start_watch(source_dir, output_dir, recursive, debounce, workers, queue_size, backend,
+                                    poll_interval, id_mode, deterministic, delete_removed, initial_scan)
+
+def stop_watch(source_dir: str) -> Dict[str, Any]:
+    """停止监视目录"""
+    return get_engine().stop_watch(source_dir)
 
-def list_xmind_files(directory: str = ".", recursive: bool = True) -> Dict[str, Any]:
+def get_watch_status(source_dir: Optional[str] = None) -> Dict[str, Any]:
+    """获取目录监视状态"""
+    return get_engine().get_watch_status(source_dir)
+
+def list_xmind_files(directory: str = ".", recursive: bool = True, pattern: Optional[str] = None,
+                     sort: str = "path", descending: bool = False, limit: Optional[int] = None,
+                     cursor: Optional[str] = None, use_index: bool = False) -> Dict[str, Any]:
     """列出XMind文件"""
-    return get_engine().list_xmind_files(directory, recursive)
+    return get_engine().list_xmind_files(directory, recursive, pattern, sort, descending, limit, cursor, use_index)
+
+def search_xmind(query: str, directory: Optional[str] = None, limit: int = 20,
+                 refresh: bool = True, matches_per_file: int = 5) -> Dict[str, Any]:
+    """搜索主题标题"""
+    return get_engine().search_xmind(query, directory, limit, refresh, matches_per_file)
+
+def get_cache_stats() -> Dict[str, Any]:
+    """获取缓存统计信息"""
+    return get_engine().get_cache_stats()
 
 def get_available_tools() -> List[Dict[str, Any]]:
     """获取可用工具列表"""
@@ -623,7 +1913,17 @@ def get_available_tools() -> List[Dict[str, Any]]:
             "name": "read_xmind_file",
             "description": "读取XMind文件内容",
             "parameters": {
-                "filepath": {"type": "string", "description": "XMind文件路径"}
+                "filepath": {"type": "string", "description": "XMind文件路径"},
+                "sheet_index": {"type": "integer", "description": "工作表索引（可选）"},
+                "all_sheets": {"type": "boolean", "description": "是否返回所有工作表的结构（可选）"},
+                "topic_id": {"type": "string", "description": "子树根主题ID（可选）"},
+                "topic_path": {"type": "string", "description": "子树根主题的标题路径（可选）"},
+                "max_depth": {"type": "integer", "description": "最多返回的层数（可选）"},
+                "child_counts": {"type": "boolean", "description": "是否返回被截断主题的子主题数（可选）"},
+                "cursor": {"type": "string", "description": "分页游标（可选）"},
+                "page_size": {"type": "integer", "description": "分页读取每页节点数（可选）"},
+                "page_bytes": {"type": "integer", "description": "分页读取每页字节数（可选）"},
+                "structure_format": {"type": "string", "description": "结构格式（可选）：nested/flat/outline"}
             }
         },
         {
@@ -631,14 +1931,18 @@ def get_available_tools() -> List[Dict[str, Any]]:
             "description": "创建新的思维导图",
             "parameters": {
                 "title": {"type": "string", "description": "思维导图标题"},
-                "topics_json": {"type": "string", "description": "主题JSON结构"}
+                "topics_json": {"type": "string", "description": "主题JSON结构"},
+                "id_mode": {"type": "string", "description": "主题ID生成模式（可选）：fast/sequential/uuid"},
+                "deterministic": {"type": "boolean", "description": "确定性构建（可选）"},
+                "sheets_json": {"type": "string", "description": "追加工作表的JSON数组（可选）"}
             }
         },
         {
             "name": "analyze_mind_map",
             "description": "分析思维导图结构",
             "parameters": {
-                "filepath": {"type": "string", "description": "XMind文件路径"}
+                "filepath": {"type": "string", "description": "XMind文件路径"},
+                "sheet_index": {"type": "integer", "description": "工作表索引（可选）"}
             }
         },
         {
@@ -646,7 +1950,70 @@ def get_available_tools() -> List[Dict[str, Any]]:
             "description": "转换文件为XMind格式",
             "parameters": {
                 "source_filepath": {"type": "string", "description": "源文件路径"},
-                "output_filepath": {"type": "string", "description": "输出文件路径（可选）"}
+                "output_filepath": {"type": "string", "description": "输出文件路径（可选）"},
+                "id_mode": {"type": "string", "description": "主题ID生成模式（可选）：fast/sequential/uuid"},
+                "deterministic": {"type": "boolean", "description": "确定性构建（可选）"},
+                "use_cache": {"type": "boolean", "description": "是否使用转换缓存（可选）"}
+            }
+        },
+        {
+            "name": "batch_convert",
+            "description": "并行批量转换文件为XMind格式",
+            "parameters": {
+                "source": {"type": "string", "description": "源目录、glob模式或文件"},
+                "output_dir": {"type": "string", "description": "输出目录（可选）"},
+                "recursive": {"type": "boolean", "description": "是否递归搜索（可选）"},
+                "workers": {"type": "integer", "description": "工作进程数（可选）"},
+                "chunk_size": {"type": "integer", "description": "每个任务块的文件数（可选）"},
+                "timeout": {"type": "number", "description": "单个文件超时秒数（可选）"},
+                "id_mode": {"type": "string", "description": "主题ID生成模式（可选）：fast/sequential/uuid"},
+                "deterministic": {"type": "boolean", "description": "确定性构建（可选）"},
+                "use_cache": {"type": "boolean", "description": "是否使用转换缓存（可选）"},
+                "include_results": {"type": "boolean", "description": "是否返回每个文件的结果（可选）"}
+            }
+        },
+        {
+            "name": "sync_directory",
+            "description": "增量同步目录（只重新转换变化的文件）",
+            "parameters": {
+                "source_dir": {"type": "string", "description": "源目录"},
+                "output_dir": {"type": "string", "description": "输出目录（可选）"},
+                "manifest_path": {"type": "string", "description": "同步清单路径（可选）"},
+                "recursive": {"type": "boolean", "description": "是否递归搜索（可选）"},
+                "workers": {"type": "integer", "description": "工作进程数（可选）"},
+                "timeout": {"type": "number", "description": "单个文件超时秒数（可选）"},
+                "id_mode": {"type": "string", "description": "主题ID生成模式（可选）：fast/sequential/uuid"},
+                "deterministic": {"type": "boolean", "description": "确定性构建（可选）"},
+                "delete_removed": {"type": "boolean", "description": "是否删除已删除源文件的输出（可选）"},
+                "include_skipped": {"type": "boolean", "description": "是否列出跳过的文件（可选）"}
+            }
+        },
+        {
+            "name": "start_watch",
+            "description": "监视目录并自动转换变化的文件",
+            "parameters": {
+                "source_dir": {"type": "string", "description": "源目录"},
+                "output_dir": {"type": "string", "description": "输出目录（可选）"},
+                "recursive": {"type": "boolean", "description": "是否递归监视（可选）"},
+                "debounce": {"type": "number", "description": "防抖秒数（可选）"},
+                "workers": {"type": "integer", "description": "转换线程数（可选）"},
+                "queue_size": {"type": "integer", "description": "转换队列容量（可选）"},
+                "backend": {"type": "string", "description": "监视后端（可选）：auto/inotify/polling"},
+                "poll_interval": {"type": "number", "description": "轮询间隔秒数（可选）"}
+            }
+        },
+        {
+            "name": "stop_watch",
+            "description": "停止监视目录",
+            "parameters": {
+                "source_dir": {"type": "string", "description": "源目录"}
+            }
+        },
+        {
+            "name": "get_watch_status",
+            "description": "获取目录监视状态与指标",
+            "parameters": {
+                "source_dir": {"type": "string", "description": "源目录（可选）"}
             }
         },
         {
@@ -654,8 +2021,30 @@ def get_available_tools() -> List[Dict[str, Any]]:
             "description": "列出XMind文件",
             "parameters": {
                 "directory": {"type": "string", "description": "搜索目录"},
-                "recursive": {"type": "boolean", "description": "是否递归搜索"}
+                "recursive": {"type": "boolean", "description": "是否递归搜索"},
+                "pattern": {"type": "string", "description": "文件名glob过滤（可选）"},
+                "sort": {"type": "string", "description": "排序方式（可选）：path/name/size/modified"},
+                "descending": {"type": "boolean", "description": "是否降序（可选）"},
+                "limit": {"type": "integer", "description": "每页文件数（可选）"},
+                "cursor": {"type": "string", "description": "分页游标（可选）"},
+                "use_index": {"type": "boolean", "description": "是否使用目录索引（可选）"}
             }
+        },
+        {
+            "name": "search_xmind",
+            "description": "搜索主题标题",
+            "parameters": {
+                "query": {"type": "string", "description": "检索词"},
+                "directory": {"type": "string", "description": "限定目录（可选）"},
+                "limit": {"type": "integer", "description": "最多返回的文件数（可选）"},
+                "refresh": {"type": "boolean", "description": "是否先刷新索引（可选）"},
+                "matches_per_file": {"type": "integer", "description": "每个文件的匹配主题数（可选）"}
+            }
+        },
+        {
+            "name": "get_cache_stats",
+            "description": "获取缓存统计信息",
+            "parameters": {}
         }
     ]
 
@@ -0,0 +1,192 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+XMind工具执行器组件
+MCP工具在事件循环中只负责调度，解析、压缩和磁盘I/O在有界线程池中执行；
+每个工具有独立的并发上限，超出上限的调用在事件循环中排队，不占用工作线程。
+CPU密集的转换可选放入进程池，避免与其他请求争用GIL。
+"""
+
+import os
+import time
+import asyncio
+import functools
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import TYPE_CHECKING, Any, Callable, Dict, Optional, Sequence
+
+if TYPE_CHECKING:
+    from concurrent.futures import ProcessPoolExecutor
+
+logger = logging.getLogger(__name__)
+
+# 工具线程池默认大小（至少8个线程，保证长耗时工具达到并发上限后轻量工具仍有空闲线程）
+DEFAULT_TOOL_WORKERS = max(8, min(32, (os.cpu_count() or 1) + 4))
+# 各工具默认并发上限：转换类工具耗时长，限制其同时占用的线程数；未列出的工具只受线程池大小限制
+DEFAULT_TOOL_LIMITS = {
+    "convert_to_xmind": 2,
+    "batch_convert": 1,
+    "sync_directory": 1,
+    "create_mind_map": 4,
+}
+
+
+def process_pool_context():
+    """进程池使用的多进程上下文：forkserver（平台不支持时 spawn）
+
+    服务器进程中有工具线程、事件循环和监视线程，fork 会把其他线程持有的锁原样复制到子进程，
+    工作进程可能因此死锁；forkserver/spawn 从单线程的干净进程启动工作进程。
+    """
+    # 只在创建进程池时导入（multiprocessing 导入较慢）
+    import multiprocessing
+    if "forkserver" in multiprocessing.get_all_start_methods():
+        context = multiprocessing.get_context("forkserver")
+        # fork服务进程预先导入引擎，工作进程启动时无需重新导入
+        context.set_forkserver_preload(["xmind_core_engine"])
+        return context
+    return multiprocessing.get_context("spawn")
+
+
+class ToolExecutor:
+    """MCP工具执行器 - 有界线程池 + 每个工具的并发上限 + 可选进程池
+
+    用法: 工具函数保持同步实现，用 @executor.offload 包装成异步函数注册到MCP服务器。
+    """
+
+    def __init__(self, max_workers: Optional[int] = None, process_workers: int = 0,
+                 limits: Optional[Dict[str, Optional[int]]] = None,
+                 process_initializer: Optional[Callable] = None, initargs: Sequence[Any] = ()):
+        self._lock = threading.Lock()
+        self._thread_pool: Optional[ThreadPoolExecutor] = None
+        self._process_pool: Optional["ProcessPoolExecutor"] = None
+        self.configure(max_workers, process_workers, limits, process_initializer, initargs)
+
+    def configure(self, max_workers: Optional[int] = None, process_workers: int = 0,
+                  limits: Optional[Dict[str, Optional[int]]] = None,
+                  process_initializer: Optional[Callable] = None, initargs: Sequence[Any] = ()):
+        """重新配置线程池、进程池和并发上限（已在执行的调用不受影响）
+
+        limits 与 DEFAULT_TOOL_LIMITS 合并，值为 None 或 0 表示该工具不设上限。
+        process_workers > 0 时启用进程池，供 run_isolated 使用。
+        """
+        merged = dict(DEFAULT_TOOL_LIMITS)
+        merged.update(limits or {})
+        max_workers = max(1, int(max_workers or DEFAULT_TOOL_WORKERS))
+        process_workers = max(0, int(process_workers or 0))
+        # 在锁外创建新的线程池和进程池，锁内只交换引用
+        thread_pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="xmind-tool")
+        process_pool = None
+        if process_workers:
+            # 只在启用进程池时导入（multiprocessing 导入较慢）
+            from concurrent.futures import ProcessPoolExecutor
+            process_pool = ProcessPoolExecutor(
+                max_workers=process_workers, mp_context=process_pool_context(),
+                initializer=process_initializer, initargs=tuple(initargs)
+            )
+        with self._lock:
+            old_threads, old_processes = self._thread_pool, self._process_pool
+            self.max_workers = max_workers
+            self.process_workers = process_workers
+            self.limits = {tool: int(limit) for tool, limit in merged.items() if limit}
+            self._thread_pool = thread_pool
+            self._process_pool = process_pool
+            # 信号量绑定到调用时的事件循环，按需创建
+            self._semaphores: Dict[str, asyncio.Semaphore] = {}
+            self._metrics: Dict[str, Dict[str, Any]] = {}
+        for pool in (old_threads, old_processes):
+            if pool is not None:
+                pool.shutdown(wait=False)
+
+    def _metric(self, tool: str) -> Dict[str, Any]:
+        metric = self._metrics.get(tool)
+        if metric is None:
+            metric = self._metrics[tool] = {
+                "active": 0, "waiting": 0, "peak_active": 0,
+                "completed": 0, "failed": 0, "total_seconds": 0.0, "max_seconds": 0.0
+            }
+        return metric
+
+    async def run(self, tool: str, func: Callable, *args, **kwargs) -> Any:
+        """在线程池中执行 func，同一工具同时执行的调用数不超过其并发上限"""
+        limit = self.limits.get(tool)
+        semaphore = None
+        if limit:
+            semaphore = self._semaphores.get(tool)
+            if semaphore is None:
+                semaphore = self._semaphores[tool] = asyncio.Semaphore(limit)
+        metric = self._metric(tool)
+        start = time.perf_counter()
+        metric["waiting"] += 1
+        try:
+            if semaphore is not None:
+                await semaphore.acquire()
+        finally:
+            metric["waiting"] -= 1
+        try:
+            metric["active"] += 1
+            metric["peak_active"] = max(metric["peak_active"], metric["active"])
+            loop = asyncio.get_running_loop()
+            result = await loop.run_in_executor(self._thread_pool, functools.partial(func, *args, **kwargs))
+            metric["completed"] += 1
+            return result
+        except BaseException:
+            metric["failed"] += 1
+            raise
+        finally:
+            metric["active"] -= 1
+            if semaphore is not None:
+                semaphore.release()
+            elapsed = time.perf_counter() - start
+            metric["total_seconds"] += elapsed
+            metric["max_seconds"] = max(metric["max_seconds"], elapsed)
+
+    def run_isolated(self, func: Callable, *args, **kwargs) -> Any:
+        """在进程池中同步执行 func（未启用进程池时直接在当前线程执行）
+
+        func 及参数必须可以pickle（模块级函数）；在工具线程中调用，等待期间不占用事件循环。
+        """
+        pool = self._process_pool
+        if pool is None:
+            return func(*args, **kwargs)
+        return pool.submit(func, *args, **kwargs).result()
+
+    def offload(self, func: Callable = None, *, tool: Optional[str] = None) -> Callable:
+        """装饰器：把同步工具函数包装为在线程池中执行的异步函数（保留函数签名和文档）"""
+        if func is None:
+            return functools.partial(self.offload, tool=tool)
+        name = tool or func.__name__
+
+        @functools.wraps(func)
+        async def wrapper(*args, **kwargs):
+            return await self.run(name, func, *args, **kwargs)
+
+        return wrapper
+
+    def stats(self) -> Dict[str, Any]:
+        """线程池、进程池配置和每个工具的执行统计"""
+        tools = {}
+        for tool, metric in list(self._metrics.items()):
+            calls = metric["completed"] + metric["failed"]
+            tools[tool] = {
+                "limit": self.limits.get(tool),
+                "active": metric["active"],
+                "waiting": metric["waiting"],
+                "peak_active": metric["peak_active"],
+                "completed": metric["completed"],
+                "failed": metric["failed"],
+                "avg_ms": round(metric["total_seconds"] / calls * 1000, 2) if calls else 0.0,
+                "max_ms": round(metric["max_seconds"] * 1000, 2)
+            }
+        return {
+            "max_workers": self.max_workers,
+            "process_workers": self.process_workers,
+            "limits": dict(self.limits),
+            "tools": tools
+        }
+
+    def shutdown(self, wait: bool = True):
+        """关闭线程池和进程池"""
+        for pool in (self._thread_pool, self._process_pool):
+            if pool is not None:
+                pool.shutdown(wait=wait)
@@ -0,0 +1,127 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+XMind JSON后端组件
+统一项目中热点路径的JSON编解码：安装了orjson（或ujson）时使用，否则回退到标准库json。
+可用环境变量 XMIND_MCP_JSON=orjson/ujson/json 指定后端。
+
+约定：输出不转义非ASCII字符；不缩进时使用紧凑分隔符 (',', ':')，indent=2 时与
+json.dumps(obj, ensure_ascii=False, indent=2) 逐字节一致（仅带指数的浮点数写法可能不同，
+项目生成的XMind内容中没有浮点数）。快速后端无法处理的数据（如超深嵌套、超大整数、
+非字符串键）自动回退到标准库，异常类型与标准库一致。
+"""
+
+import os
+import json
+import logging
+from typing import Any, Callable, Dict, Optional, Union
+
+logger = logging.getLogger(__name__)
+
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+except ImportError:
+    ORJSON_AVAILABLE = False
+
+try:
+    import ujson
+    UJSON_AVAILABLE = True
+except ImportError:
+    UJSON_AVAILABLE = False
+
+BACKENDS = ("orjson", "ujson", "json")
+_COMPACT_SEPARATORS = (',', ':')
+_INDENT_SEPARATORS = (',', ': ')
+
+
+def _stdlib_dumps(obj: Any, indent: Optional[int] = None) -> str:
+    return json.dumps(obj, ensure_ascii=False, indent=indent,
+                      separators=_INDENT_SEPARATORS if indent else _COMPACT_SEPARATORS)
+
+
+def _stdlib_loads(data: Union[str, bytes]) -> Any:
+    return json.loads(data)
+
+
+def _orjson_dumps(obj: Any, indent: Optional[int] = None) -> str:
+    if indent not in (None, 2):
+        return _stdlib_dumps(obj, indent)
+    try:
+        return orjson.dumps(obj, option=orjson.OPT_INDENT_2 if indent else 0).decode('utf-8')
+    except orjson.JSONEncodeError:
+        return _stdlib_dumps(obj, indent)
+
+
+def _orjson_loads(data: Union[str, bytes]) -> Any:
+    try:
+        return orjson.loads(data)
+    except orjson.JSONDecodeError:
+        # orjson 对嵌套深度有限制；交给标准库给出结果或一致的异常（含 RecursionError）
+        return _stdlib_loads(data)
+
+
+def _ujson_dumps(obj: Any, indent: Optional[int] = None) -> str:
+    if indent:
+        # ujson 的缩进格式与标准库不同
+        return _stdlib_dumps(obj, indent)
+    try:
+        return ujson.dumps(obj, ensure_ascii=False, escape_forward_slashes=False)
+    except (OverflowError, TypeError, ValueError):
+        return _stdlib_dumps(obj, indent)
+
+
+def _ujson_loads(data: Union[str, bytes]) -> Any:
+    try:
+        return ujson.loads(data)
+    except (ValueError, RecursionError):
+        return _stdlib_loads(data)
+
+
+_IMPLEMENTATIONS: Dict[str, Dict[str, Callable]] = {
+    "orjson": {"dumps": _orjson_dumps, "loads": _orjson_loads},
+    "ujson": {"dumps": _ujson_dumps, "loads": _ujson_loads},
+    "json": {"dumps": _stdlib_dumps, "loads": _stdlib_loads},
+}
+_AVAILABLE = {"orjson": ORJSON_AVAILABLE, "ujson": UJSON_AVAILABLE, "json": True}
+
+backend = "json"
+_dumps = _stdlib_dumps
+_loads = _stdlib_loads
+
+
+def available_backends():
+    """当前环境可用的后端（按优先级排列）"""
+    return [name for name in BACKENDS if _AVAILABLE[name]]
+
+
+def set_backend(name: Optional[str] = None) -> str:
+    """选择JSON后端，未指定时使用可用的最快后端；返回实际使用的后端名"""
+    global backend, _dumps, _loads
+    if name is None:
+        name = available_backends()[0]
+    if name not in _IMPLEMENTATIONS:
+        raise ValueError(f"不支持的JSON后端: {name}（可选: {', '.join(BACKENDS)}）")
+    if not _AVAILABLE[name]:
+        raise ValueError(f"JSON后端未安装: {name}")
+    backend = name
+    _dumps = _IMPLEMENTATIONS[name]["dumps"]
+    _loads = _IMPLEMENTATIONS[name]["loads"]
+    return backend
+
+
+def dumps(obj: Any, indent: Optional[int] = None) -> str:
+    """序列化为JSON字符串（非ASCII字符原样输出；indent=None 时为紧凑格式）"""
+    return _dumps(obj, indent)
+
+
+def loads(data: Union[str, bytes]) -> Any:
+    """解析JSON字符串或UTF-8字节串"""
+    return _loads(data)
+
+
+_requested = os.environ.get("XMIND_MCP_JSON")
+try:
+    set_backend(_requested or None)
+except ValueError as e:
+    logger.warning(f"{e}，使用 {set_backend()}")
@@ -0,0 +1,199 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+XMind MCP 请求分发
+
+与传输方式无关的MCP/JSON-RPC处理：STDIO和HTTP传输只负责收发消息，
+消息校验、initialize/ping/tools 方法和工具调用都在这里完成。工具在工具执行器中执行，
+参数定义来自引擎的 get_tools，调用规则（别名、路径校验、默认值）与FastMCP工具共用 xmind_tools。
+"""
+
+import os
+import sys
+import asyncio
+import logging
+from typing import Any, Dict, List, Optional
+
+# python -m xmind_mcp.xxx 时保证可以导入项目根目录的模块
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if PROJECT_ROOT not in sys.path:
+    sys.path.insert(0, PROJECT_ROOT)
+
+import xmind_json
+import xmind_tools
+import xmind_core_engine
+from xmind_executor import ToolExecutor
+
+logger = logging.getLogger(__name__)
+
+SERVER_NAME = "XMindMCP"
+# 客户端请求的协议版本不在此列表中时，回复我们支持的最新版本
+SUPPORTED_PROTOCOL_VERSIONS = ("2024-11-05", "2025-03-26", "2025-06-18")
+
+# JSON-RPC 错误码
+PARSE_ERROR = -32700
+INVALID_REQUEST = -32600
+METHOD_NOT_FOUND = -32601
+INVALID_PARAMS = -32602
+INTERNAL_ERROR = -32603
+
+# 与FastMCP工具一致的参数别名 -> 引擎参数名
+ARGUMENT_ALIASES = {
+    "file_path": "filepath",
+    "source_file": "source_filepath",
+    "output_file": "output_filepath",
+}
+
+
+def server_version() -> str:
+    try:
+        from xmind_mcp import __version__
+        return __version__
+    except Exception:
+        return "0.0.0"
+
+
+class RpcError(Exception):
+    """可直接作为JSON-RPC错误响应返回的异常"""
+
+    def __init__(self, code: int, message: str):
+        super().__init__(message)
+        self.code = code
+        self.message = message
+
+
+def error_response(request_id: Any, code: int, message: str) -> Dict[str, Any]:
+    return {"jsonrpc": "2.0", "id": request_id, "error": {"code": code, "message": message}}
+
+
+def call_tool(name: str, arguments: Dict[str, Any]) -> Dict[str, Any]:
+    """按与FastMCP工具相同的规则调用工具（在工具线程中执行）"""
+    return getattr(xmind_tools, name)(**arguments)
+
+
+class McpDispatcher:
+    """MCP请求分发器 - 处理JSON-RPC消息并在工具执行器中调用工具"""
+
+    def __init__(self, executor: Optional[ToolExecutor] = None):
+        self.executor = executor or ToolExecutor()
+        self.tools = {tool["name"]: tool for tool in xmind_core_engine.get_engine().get_tools()}
+
+    async def handle_payload(self, payload: Any, pending: Dict[Any, asyncio.Task]) -> Optional[Any]:
+        """处理单条消息或批量消息，返回要写回的响应（全是通知时返回 None）
+
+        pending 为该传输连接上在途请求 id -> 任务，用于检测重复id和处理取消通知。
+        """
+        if isinstance(payload, list):
+            if not payload:
+                return error_response(None, INVALID_REQUEST, "批量请求不能为空")
+            responses = await asyncio.gather(*(self.handle_message(item, pending) for item in payload))
+            responses = [response for response in responses if response is not None]
+            return responses or None
+        return await self.handle_message(payload, pending)
+
+    async def handle_message(self, message: Any, pending: Dict[Any, asyncio.Task]) -> Optional[Dict[str, Any]]:
+        """处理一条JSON-RPC消息，返回响应（通知和已取消的请求返回 None）"""
+        if not isinstance(message, dict) or message.get("jsonrpc") != "2.0":
+            return error_response(message.get("id") if isinstance(message, dict) else None,
+                                  INVALID_REQUEST, "不是有效的JSON-RPC 2.0消息")
+        if "method" not in message:
+            # 本服务器不向客户端发起请求，客户端发来的响应直接忽略
+            return None
+        method = message["method"]
+        params = message.get("params") or {}
+        is_request = "id" in message
+        request_id = message.get("id")
+        if not isinstance(method, str) or not isinstance(params, dict):
+            return error_response(request_id, INVALID_REQUEST, "method 必须是字符串，params 必须是对象") if is_request else None
+        if is_request and (isinstance(request_id, bool) or not isinstance(request_id, (str, int))):
+            return error_response(None, INVALID_REQUEST, "id 必须是字符串或整数")
+
+        if not is_request:
+            self._handle_notification(method, params, pending)
+            return None
+
+        if request_id in pending:
+            return error_response(request_id, INVALID_REQUEST, f"请求id重复: {request_id}")
+        pending[request_id] = asyncio.current_task()
+        try:
+            return {"jsonrpc": "2.0", "id": request_id, "result": await self._dispatch(method, params)}
+        except asyncio.CancelledError:
+            # 客户端已取消：不再发送响应（工具线程中已开始的工作会执行完，但结果丢弃）
+            return None
+        except RpcError as e:
+            return error_response(request_id, e.code, e.message)
+        except Exception as e:
+            logger.error(f"处理请求失败: {method} - {e}")
+            return error_response(request_id, INTERNAL_ERROR, str(e))
+        finally:
+            pending.pop(request_id, None)
+
+    def _handle_notification(self, method: str, params: Dict[str, Any], pending: Dict[Any, asyncio.Task]):
+        if method == "notifications/cancelled":
+            task = pending.get(params.get("requestId"))
+            if task is not None:
+                task.cancel()
+        elif method != "notifications/initialized":
+            logger.debug(f"忽略通知: {method}")
+
+    async def _dispatch(self, method: str, params: Dict[str, Any]) -> Dict[str, Any]:
+        if method == "initialize":
+            # 分发器可能被多个客户端共享（HTTP），协商结果不保存为状态
+            requested = params.get("protocolVersion")
+            if requested not in SUPPORTED_PROTOCOL_VERSIONS:
+                requested = SUPPORTED_PROTOCOL_VERSIONS[-1]
+            return {
+                "protocolVersion": requested,
+                "capabilities": {"tools": {"listChanged": False}},
+                "serverInfo": {"name": SERVER_NAME, "version": server_version()}
+            }
+        if method == "ping":
+            return {}
+        if method == "tools/list":
+            return {"tools": self.list_tools()}
+        if method == "tools/call":
+            return await self._call_tool_rpc(params)
+        raise RpcError(METHOD_NOT_FOUND, f"不支持的方法: {method}")
+
+    def list_tools(self) -> List[Dict[str, Any]]:
+        """MCP格式的工具列表（参数定义来自引擎的 get_tools）"""
+        return [
+            {"name": name, "description": tool["description"], "inputSchema": tool["input_schema"]}
+            for name, tool in self.tools.items()
+        ]
+
+    async def _call_tool_rpc(self, params: Dict[str, Any]) -> Dict[str, Any]:
+        name = params.get("name")
+        arguments = params.get("arguments") or {}
+        if not isinstance(arguments, dict):
+            raise RpcError(INVALID_PARAMS, "arguments 必须是对象")
+        try:
+            result = await self.call(name, arguments)
+        except (RpcError, asyncio.CancelledError):
+            raise
+        except Exception as e:
+            logger.error(f"工具调用错误: {name} - {e}")
+            return {"content": [{"type": "text", "text": f"错误: {str(e)}"}], "isError": True}
+        return {
+            "content": [{"type": "text", "text": xmind_json.dumps(result)}],
+            "isError": isinstance(result, dict) and result.get("status") == "error"
+        }
+
+    async def call(self, name: str, arguments: Dict[str, Any]) -> Any:
+        """校验参数后在工具执行器中调用工具，返回工具结果（参数无效时抛出 RpcError）"""
+        if name not in self.tools:
+            raise RpcError(INVALID_PARAMS, f"未知工具: {name}")
+        arguments = self.prepare_arguments(name, arguments)
+        return await self.executor.run(name, call_tool, name, arguments)
+
+    def prepare_arguments(self, name: str, arguments: Dict[str, Any]) -> Dict[str, Any]:
+        """参数别名转换并按工具的参数定义校验"""
+        schema = self.tools[name]["input_schema"]
+        prepared = {ARGUMENT_ALIASES.get(key, key): value for key, value in arguments.items()}
+        unknown = [key for key in prepared if key not in schema["properties"]]
+        if unknown:
+            raise RpcError(INVALID_PARAMS, f"{name} 不支持的参数: {', '.join(unknown)}")
+        missing = [key for key in schema.get("required", []) if prepared.get(key) is None]
+        if missing:
+            raise RpcError(INVALID_PARAMS, f"{name} 缺少必填参数: {', '.join(missing)}")
+        return prepared
@@ -0,0 +1,690 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+XMind MCP HTTP传输
+
+基于asyncio的HTTP/1.1服务器（只使用标准库）：
+- POST /mcp：MCP Streamable HTTP 传输（无状态，每个请求直接返回JSON响应，不使用SSE流）
+- POST /tools/<工具名>、/read-file、/convert-to-xmind、/batch：REST端点，参数来自JSON请求体、
+  表单或查询字符串，支持multipart文件上传
+- GET /health、GET /tools
+
+连接默认保持（keep-alive），空闲超过 keepalive_timeout 后关闭。workers > 1 时主进程绑定端口，
+启动多个工作进程共享同一个监听套接字，工作进程异常退出后自动重启。收到 SIGTERM/SIGINT 后
+停止接受新连接、关闭空闲连接，等待在途请求完成（最多 drain_timeout 秒）后退出。
+"""
+
+import os
+import sys
+import time
+import shutil
+import signal
+import socket
+import asyncio
+import logging
+import tempfile
+import subprocess
+import threading
+from email.message import Message
+from email.parser import BytesParser
+from email.policy import HTTP as HTTP_POLICY
+from http import HTTPStatus
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+from urllib.parse import parse_qsl, quote, urlsplit
+
+# python -m xmind_mcp.http_server 时保证可以导入项目根目录的模块
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if PROJECT_ROOT not in sys.path:
+    sys.path.insert(0, PROJECT_ROOT)
+
+import xmind_json
+from xmind_executor import ToolExecutor
+from xmind_mcp.dispatcher import (
+    McpDispatcher, RpcError, ARGUMENT_ALIASES, PARSE_ERROR, INVALID_PARAMS, error_response, server_version
+)
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_HOST = "127.0.0.1"
+DEFAULT_PORT = 8080
+# 空闲连接保持秒数
+DEFAULT_KEEPALIVE_TIMEOUT = 5.0
+# 停止时等待在途请求完成的最长秒数
+DEFAULT_DRAIN_TIMEOUT = 30.0
+# 请求体上限（上传文件）
+DEFAULT_MAX_BODY_BYTES = 64 * 1024 * 1024
+# 请求行/单个请求头的长度上限和请求头数量上限
+MAX_HEADER_LINE = 64 * 1024
+MAX_HEADERS = 100
+# 读取请求头和请求体的超时秒数（防止慢速客户端长期占用连接）
+REQUEST_READ_TIMEOUT = 60.0
+# 拒绝请求后关闭连接前丢弃客户端仍在发送的数据的最长秒数和字节数
+LINGER_TIMEOUT = 2.0
+LINGER_MAX_BYTES = 16 * 1024 * 1024
+# 工作进程启动后这么短时间内退出视为启动失败，连续失败达到上限时主进程退出
+WORKER_MIN_UPTIME = 1.0
+WORKER_MAX_FAST_FAILURES = 5
+
+# 旧版REST路径 -> 工具名
+REST_ROUTES = {
+    "/read-file": "read_xmind_file",
+    "/convert-to-xmind": "convert_to_xmind",
+}
+# /tools/<名称> 中兼容的工具别名
+TOOL_ALIASES = {"read_xmind": "read_xmind_file"}
+# 上传的文件作为哪个参数传给工具
+UPLOAD_ARGUMENTS = {
+    "read_xmind_file": "filepath",
+    "analyze_mind_map": "filepath",
+    "convert_to_xmind": "source_filepath",
+}
+LOCAL_ORIGIN_HOSTS = ("localhost", "127.0.0.1", "::1")
+XMIND_CONTENT_TYPE = "application/vnd.xmind.workbook"
+TRUE_VALUES = ("1", "true", "yes", "on")
+FALSE_VALUES = ("0", "false", "no", "off", "")
+
+
+class HttpError(Exception):
+    """直接转换为HTTP错误响应的异常"""
+
+    def __init__(self, status: int, message: str, headers: Sequence[Tuple[str, str]] = ()):
+        super().__init__(message)
+        self.status = status
+        self.message = message
+        self.headers = list(headers)
+
+
+class HttpRequest:
+    """已读取完整请求体的HTTP请求"""
+
+    __slots__ = ("method", "path", "query", "version", "headers", "body", "keep_alive")
+
+    def __init__(self, method: str, target: str, version: str, headers: Dict[str, str], body: bytes = b""):
+        url = urlsplit(target)
+        self.method = method
+        self.path = url.path
+        self.query = dict(parse_qsl(url.query, keep_blank_values=True))
+        self.version = version
+        self.headers = headers
+        self.body = body
+        connection = headers.get("connection", "").lower()
+        if version == "HTTP/1.0":
+            self.keep_alive = "keep-alive" in connection
+        else:
+            self.keep_alive = "close" not in connection
+
+
+Response = Tuple[int, List[Tuple[str, str]], bytes]
+
+
+def json_response(status: int, data: Any, headers: Sequence[Tuple[str, str]] = ()) -> Response:
+    return status, [("Content-Type", "application/json; charset=utf-8"), *headers], xmind_json.dumps(data).encode('utf-8')
+
+
+def _content_type(value: str) -> Message:
+    message = Message()
+    message["Content-Type"] = value or "application/octet-stream"
+    return message
+
+
+def _coerce(value: str, schema: Dict[str, Any]) -> Any:
+    """把查询字符串/表单中的字符串值按参数定义转换类型"""
+    kind = schema.get("type")
+    if kind == "integer":
+        return int(value)
+    if kind == "number":
+        return float(value)
+    if kind == "boolean":
+        lowered = value.strip().lower()
+        if lowered in TRUE_VALUES:
+            return True
+        if lowered in FALSE_VALUES:
+            return False
+        raise ValueError(f"无效的布尔值: {value}")
+    return value
+
+
+def _save_upload(directory: str, filename: Optional[str], data: bytes) -> str:
+    """把上传文件保存到临时目录（保留原文件名，转换器按扩展名选择解析器）"""
+    name = os.path.basename((filename or "").replace("\\", "/")).strip() or "upload"
+    if name in (".", ".."):
+        name = "upload"
+    path = os.path.join(directory, name)
+    stem, ext = os.path.splitext(name)
+    index = 1
+    while os.path.exists(path):
+        path = os.path.join(directory, f"{stem}_{index}{ext}")
+        index += 1
+    with open(path, "wb") as f:
+        f.write(data)
+    return path
+
+
+def _save_uploads(directory: str, uploads: List[Tuple[str, bytes]]):
+    """依次保存多个上传文件"""
+    for filename, data in uploads:
+        _save_upload(directory, filename, data)
+
+
+def _read_file(path: str) -> bytes:
+    with open(path, "rb") as f:
+        return f.read()
+
+
+class HttpServer:
+    """XMind MCP HTTP服务器 - 一个事件循环处理全部连接，工具在工具执行器中执行"""
+
+    def __init__(self, executor: Optional[ToolExecutor] = None,
+                 keepalive_timeout: float = DEFAULT_KEEPALIVE_TIMEOUT,
+                 drain_timeout: float = DEFAULT_DRAIN_TIMEOUT,
+                 max_body_bytes: int = DEFAULT_MAX_BODY_BYTES,
+                 allowed_origins: Optional[Sequence[str]] = None):
+        self.dispatcher = McpDispatcher(executor)
+        self.keepalive_timeout = float(keepalive_timeout)
+        self.drain_timeout = float(drain_timeout)
+        self.max_body_bytes = int(max_body_bytes)
+        self.allowed_origins = set(allowed_origins or ())
+        self.draining = False
+        self.requests_served = 0
+        self.in_flight = 0
+        self._server: Optional[asyncio.AbstractServer] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._stop: Optional[asyncio.Event] = None
+        self._connections = set()
+        self._idle = set()
+
+    # ---------- 生命周期 ----------
+
+    async def start(self, host: str = DEFAULT_HOST, port: int = DEFAULT_PORT,
+                    sock: Optional[socket.socket] = None) -> List[Tuple]:
+        """开始接受连接（sock 为已绑定的监听套接字时直接使用），返回监听地址"""
+        self._loop = asyncio.get_running_loop()
+        self._stop = asyncio.Event()
+        if sock is not None:
+            self._server = await asyncio.start_server(self._handle_connection, sock=sock, limit=MAX_HEADER_LINE)
+        else:
+            self._server = await asyncio.start_server(self._handle_connection, host, port, limit=MAX_HEADER_LINE)
+        return [s.getsockname() for s in self._server.sockets]
+
+    async def serve(self, host: str = DEFAULT_HOST, port: int = DEFAULT_PORT,
+                    sock: Optional[socket.socket] = None, parent_pid: Optional[int] = None):
+        """运行直到收到 SIGTERM/SIGINT 或调用 shutdown，然后排空连接
+
+        parent_pid 指定时（多进程模式的工作进程），主进程退出后自动停止。
+        """
+        await self.start(host, port, sock)
+        for sig in (signal.SIGTERM, signal.SIGINT):
+            try:
+                self._loop.add_signal_handler(sig, self._stop.set)
+            except (NotImplementedError, RuntimeError, ValueError):
+                # Windows 或非主线程中无法注册信号处理，只能通过 shutdown 停止
+                pass
+        watchdog = asyncio.ensure_future(self._watch_parent(parent_pid)) if parent_pid else None
+        try:
+            await self._stop.wait()
+        finally:
+            if watchdog is not None:
+                watchdog.cancel()
+            await self.drain()
+
+    def shutdown(self):
+        """请求停止（可在其他线程中调用），serve 排空连接后返回"""
+        if self._loop is not None and self._stop is not None and not self._loop.is_closed():
+            self._loop.call_soon_threadsafe(self._stop.set)
+
+    async def drain(self, timeout: Optional[float] = None):
+        """停止接受新连接，关闭空闲连接，等待在途请求完成后关闭其连接"""
+        self.draining = True
+        if self._server is not None:
+            self._server.close()
+        for writer in list(self._idle):
+            writer.close()
+        if self._connections:
+            timeout = self.drain_timeout if timeout is None else timeout
+            _, pending = await asyncio.wait(set(self._connections), timeout=timeout)
+            if pending:
+                logger.warning(f"排空超时，强制关闭 {len(pending)} 个连接")
+                for task in pending:
+                    task.cancel()
+                await asyncio.gather(*pending, return_exceptions=True)
+
+    async def _watch_parent(self, parent_pid: int):
+        while os.getppid() == parent_pid:
+            await asyncio.sleep(1.0)
+        logger.warning("主进程已退出，工作进程停止")
+        self._stop.set()
+
+    # ---------- 连接与协议 ----------
+
+    async def _handle_connection(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        task = asyncio.current_task()
+        self._connections.add(task)
+        try:
+            while not self.draining:
+                self._idle.add(writer)
+                try:
+                    request_line = await asyncio.wait_for(reader.readline(), self.keepalive_timeout)
+                except (asyncio.TimeoutError, ConnectionError, ValueError):
+                    break
+                finally:
+                    self._idle.discard(writer)
+                if not request_line:
+                    break
+                if not request_line.strip():
+                    # 容忍请求之间多余的空行
+                    continue
+                try:
+                    request = await asyncio.wait_for(self._read_request(request_line, reader, writer),
+                                                     REQUEST_READ_TIMEOUT)
+                except HttpError as e:
+                    await self._write_response(writer, json_response(
+                        e.status, {"status": "error", "error": e.message}, e.headers), False)
+                    await self._linger(reader, writer)
+                    break
+                except (asyncio.TimeoutError, asyncio.IncompleteReadError, ConnectionError):
+                    break
+                self.in_flight += 1
+                try:
+                    response = await self._route(request)
+                except HttpError as e:
+                    response = json_response(e.status, {"status": "error", "error": e.message}, e.headers)
+                except Exception as e:
+                    logger.error(f"处理HTTP请求失败: {request.method} {request.path} - {e}")
+                    response = json_response(500, {"status": "error", "error": str(e)})
+                finally:
+                    self.in_flight -= 1
+                self.requests_served += 1
+                keep_alive = request.keep_alive and not self.draining
+                logger.debug(f"{request.method} {request.path} -> {response[0]}")
+                await self._write_response(writer, response, keep_alive)
+                if not keep_alive:
+                    break
+        except (ConnectionError, asyncio.CancelledError):
+            pass
+        finally:
+            self._connections.discard(task)
+            writer.close()
+
+    async def _linger(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        """半关闭后丢弃客户端未发送完的请求体
+
+        直接关闭时接收缓冲区里的未读数据会让内核发送RST，客户端可能在读到错误响应前就收到连接重置。
+        """
+        if not writer.can_write_eof():
+            return
+        writer.write_eof()
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + LINGER_TIMEOUT
+        discarded = 0
+        try:
+            while discarded < LINGER_MAX_BYTES:
+                remaining = deadline - loop.time()
+                if remaining <= 0:
+                    break
+                data = await asyncio.wait_for(reader.read(64 * 1024), remaining)
+                if not data:
+                    break
+                discarded += len(data)
+        except (asyncio.TimeoutError, ConnectionError):
+            pass
+
+    async def _read_request(self, request_line: bytes, reader: asyncio.StreamReader,
+                            writer: asyncio.StreamWriter) -> HttpRequest:
+        parts = request_line.decode("latin-1").rstrip("\r\n").split(" ")
+        if len(parts) != 3:
+            raise HttpError(400, "无效的请求行")
+        method, target, version = parts
+        if version not in ("HTTP/1.0", "HTTP/1.1"):
+            raise HttpError(505, f"不支持的HTTP版本: {version}")
+
+        headers: Dict[str, str] = {}
+        for _ in range(MAX_HEADERS + 1):
+            try:
+                line = await reader.readline()
+            except ValueError:
+                raise HttpError(431, "请求头过长")
+            if not line:
+                raise asyncio.IncompleteReadError(b"", None)
+            if line in (b"\r\n", b"\n"):
+                break
+            name, sep, value = line.decode("latin-1").partition(":")
+            if not sep or not name.strip():
+                raise HttpError(400, "无效的请求头")
+            name = name.strip().lower()
+            value = value.strip()
+            headers[name] = f"{headers[name]}, {value}" if name in headers else value
+        else:
+            raise HttpError(431, "请求头过多")
+
+        request = HttpRequest(method, target, version, headers)
+        chunked = "chunked" in headers.get("transfer-encoding", "").lower()
+        length = headers.get("content-length")
+        if not chunked and length is None:
+            return request
+        if length is not None and not chunked:
+            try:
+                length = int(length)
+                if length < 0:
+                    raise ValueError
+            except ValueError:
+                raise HttpError(400, "无效的 Content-Length")
+            if length > self.max_body_bytes:
+                raise HttpError(413, f"请求体超过上限 {self.max_body_bytes} 字节")
+        if headers.get("expect", "").lower() == "100-continue":
+            writer.write(b"HTTP/1.1 100 Continue\r\n\r\n")
+            await writer.drain()
+        request.body = await (self._read_chunked(reader) if chunked else reader.readexactly(length))
+        return request
+
+    async def _read_chunked(self, reader: asyncio.StreamReader) -> bytes:
+        chunks, total = [], 0
+        while True:
+            size_line = await reader.readline()
+            try:
+                size = int(size_line.split(b";", 1)[0].strip(), 16)
+            except ValueError:
+                raise HttpError(400, "无效的分块长度")
+            if size == 0:
+                # 跳过 trailer
+                while (await reader.readline()) not in (b"\r\n", b"\n", b""):
+                    pass
+                return b"".join(chunks)
+            total += size
+            if total > self.max_body_bytes:
+                raise HttpError(413, f"请求体超过上限 {self.max_body_bytes} 字节")
+            chunks.append(await reader.readexactly(size))
+            await reader.readexactly(2)
+
+    async def _write_response(self, writer: asyncio.StreamWriter, response: Response, keep_alive: bool):
+        status, headers, body = response
+        lines = [f"HTTP/1.1 {status} {HTTPStatus(status).phrase}", f"Content-Length: {len(body)}"]
+        if keep_alive:
+            lines.append("Connection: keep-alive")
+            lines.append(f"Keep-Alive: timeout={int(self.keepalive_timeout)}")
+        else:
+            lines.append("Connection: close")
+        lines.extend(f"{name}: {value}" for name, value in headers)
+        head = ("\r\n".join(lines) + "\r\n\r\n").encode("latin-1")
+        if len(body) < 65536:
+            writer.write(head + body)
+        else:
+            writer.write(head)
+            writer.write(body)
+        await writer.drain()
+
+    # ---------- 路由 ----------
+
+    async def _route(self, request: HttpRequest) -> Response:
+        path = request.path.rstrip("/") or "/"
+        if path == "/health":
+            self._require_method(request, "GET")
+            return self._health()
+        if path == "/tools":
+            self._require_method(request, "GET")
+            return json_response(200, {"tools": self.dispatcher.list_tools()})
+        if path == "/mcp":
+            self._require_method(request, "POST")
+            self._check_origin(request)
+            return await self._handle_mcp(request)
+        if path == "/batch":
+            self._require_method(request, "POST")
+            self._check_origin(request)
+            return await self._handle_batch(request)
+        if path in REST_ROUTES or path.startswith("/tools/"):
+            self._require_method(request, "POST")
+            self._check_origin(request)
+            name = REST_ROUTES.get(path) or path[len("/tools/"):]
+            return await self._handle_tool(TOOL_ALIASES.get(name, name), request)
+        raise HttpError(404, f"未找到: {request.path}")
+
+    @staticmethod
+    def _require_method(request: HttpRequest, method: str):
+        if request.method != method:
+            raise HttpError(405, f"不支持的方法: {request.method}", [("Allow", method)])
+
+    def _check_origin(self, request: HttpRequest):
+        """拒绝来自非本机网页的跨站请求（防止DNS重绑定），可用 allowed_origins 放行"""
+        origin = request.headers.get("origin")
+        if not origin or "*" in self.allowed_origins or origin in self.allowed_origins:
+            return
+        if urlsplit(origin).hostname in LOCAL_ORIGIN_HOSTS:
+            return
+        raise HttpError(403, f"不允许的来源: {origin}")
+
+    def _health(self) -> Response:
+        """健康检查：connections/in_flight/requests_served 只统计当前进程
+
+        多工作进程模式下每个请求由接受连接的那个工作进程回答，返回的是该进程（见 pid）的计数，
+        不是整个服务器的汇总。
+        """
+        return json_response(503 if self.draining else 200, {
+            "status": "draining" if self.draining else "ok",
+            "version": server_version(),
+            "pid": os.getpid(),
+            "connections": len(self._connections),
+            "in_flight": self.in_flight,
+            "requests_served": self.requests_served
+        })
+
+    async def _handle_mcp(self, request: HttpRequest) -> Response:
+        """MCP Streamable HTTP：请求体为单条或批量JSON-RPC消息，全是通知/响应时返回 202"""
+        content_type = _content_type(request.headers.get("content-type", "")).get_content_type()
+        if content_type != "application/json":
+            raise HttpError(415, "MCP请求体必须是 application/json")
+        try:
+            payload = xmind_json.loads(request.body)
+        except Exception as e:
+            return json_response(400, error_response(None, PARSE_ERROR, f"JSON解析失败: {e}"))
+        # 无状态：取消通知只能作用于同一HTTP请求中的请求
+        response = await self.dispatcher.handle_payload(payload, {})
+        if response is None:
+            return 202, [], b""
+        return json_response(200, response)
+
+    async def _handle_tool(self, name: str, request: HttpRequest) -> Response:
+        if name not in self.dispatcher.tools:
+            raise HttpError(404, f"未知工具: {name}")
+        upload_dir = None
+        try:
+            arguments, uploads = self._request_arguments(name, request)
+            download = name == "convert_to_xmind" and _coerce(str(arguments.pop("download", "false")), {"type": "boolean"})
+            if uploads:
+                upload_argument = UPLOAD_ARGUMENTS.get(name)
+                if upload_argument is None or len(uploads) > 1:
+                    raise RpcError(INVALID_PARAMS, f"{name} 只接受一个上传文件" if upload_argument else f"{name} 不接受上传文件")
+                upload_dir = tempfile.mkdtemp(prefix="xmind_http_")
+                filename, data = uploads[0]
+                arguments[upload_argument] = await asyncio.get_running_loop().run_in_executor(
+                    None, _save_upload, upload_dir, filename, data)
+            result = await self.dispatcher.call(name, arguments)
+            if download and isinstance(result, dict) and result.get("status") == "success":
+                return await self._download(result["output_file"])
+            return json_response(422 if isinstance(result, dict) and result.get("status") == "error" else 200, result)
+        except (RpcError, ValueError) as e:
+            return json_response(422, {"status": "error", "error": str(e)})
+        finally:
+            if upload_dir is not None:
+                shutil.rmtree(upload_dir, ignore_errors=True)
+
+    async def _handle_batch(self, request: HttpRequest) -> Response:
+        """批量转换上传的文件（multipart 字段 files），结果附带 success_count/total_count
+
+        与 batch_convert 工具走同一套调用规则：output_dir 必须为绝对路径，未指定时使用默认输出目录。
+        """
+        upload_dir = None
+        try:
+            arguments, uploads = self._request_arguments("batch_convert", request)
+            if uploads:
+                upload_dir = tempfile.mkdtemp(prefix="xmind_http_batch_")
+                await asyncio.get_running_loop().run_in_executor(None, _save_uploads, upload_dir, uploads)
+                arguments["source"] = upload_dir
+            result = await self.dispatcher.call("batch_convert", arguments)
+            if result.get("status") == "success" or "total_files" in result:
+                result["success_count"] = result.get("succeeded", 0)
+                result["total_count"] = result.get("total_files", 0)
+            return json_response(422 if result.get("status") == "error" else 200, result)
+        except (RpcError, ValueError) as e:
+            return json_response(422, {"status": "error", "error": str(e)})
+        finally:
+            if upload_dir is not None:
+                shutil.rmtree(upload_dir, ignore_errors=True)
+
+    async def _download(self, output_file: str) -> Response:
+        data = await asyncio.get_running_loop().run_in_executor(None, _read_file, output_file)
+        filename = quote(os.path.basename(output_file))
+        return 200, [
+            ("Content-Type", XMIND_CONTENT_TYPE),
+            ("Content-Disposition", f"attachment; filename*=UTF-8''{filename}")
+        ], data
+
+    def _request_arguments(self, name: str, request: HttpRequest) -> Tuple[Dict[str, Any], List[Tuple[str, bytes]]]:
+        """从查询字符串和请求体中收集工具参数，返回 (参数, [(上传文件名, 内容)])
+
+        JSON请求体中的值原样使用；查询字符串和表单中的字符串值按参数定义转换类型。
+        """
+        properties = self.dispatcher.tools[name]["input_schema"]["properties"]
+        text_values = dict(request.query)
+        arguments: Dict[str, Any] = {}
+        uploads: List[Tuple[str, bytes]] = []
+        if request.body:
+            content_type = _content_type(request.headers.get("content-type", ""))
+            kind = content_type.get_content_type()
+            if kind == "application/json":
+                try:
+                    body = xmind_json.loads(request.body)
+                except Exception as e:
+                    raise HttpError(400, f"JSON解析失败: {e}")
+                if not isinstance(body, dict):
+                    raise HttpError(400, "JSON请求体必须是对象")
+                arguments.update(body)
+            elif kind == "multipart/form-data":
+                fields, uploads = self._parse_multipart(request.headers["content-type"], request.body)
+                text_values.update(fields)
+            elif kind == "application/x-www-form-urlencoded":
+                text_values.update(parse_qsl(request.body.decode("utf-8"), keep_blank_values=True))
+            else:
+                raise HttpError(415, f"不支持的请求体类型: {kind}")
+        for key, value in text_values.items():
+            if key in arguments:
+                continue
+            schema = properties.get(ARGUMENT_ALIASES.get(key, key))
+            try:
+                arguments[key] = _coerce(value, schema) if schema else value
+            except ValueError:
+                raise RpcError(INVALID_PARAMS, f"参数 {key} 的值无效: {value}")
+        return arguments, uploads
+
+    @staticmethod
+    def _parse_multipart(content_type: str, body: bytes) -> Tuple[Dict[str, str], List[Tuple[str, bytes]]]:
+        if not _content_type(content_type).get_param("boundary"):
+            raise HttpError(400, "multipart请求缺少 boundary")
+        message = BytesParser(policy=HTTP_POLICY).parsebytes(
+            b"Content-Type: " + content_type.encode("latin-1") + b"\r\n\r\n" + body
+        )
+        if not message.is_multipart():
+            raise HttpError(400, "无效的multipart请求体")
+        fields: Dict[str, str] = {}
+        uploads: List[Tuple[str, bytes]] = []
+        for part in message.iter_parts():
+            data = part.get_payload(decode=True) or b""
+            filename = part.get_filename()
+            if filename is not None:
+                uploads.append((filename, data))
+            else:
+                name = part.get_param("name", header="content-disposition")
+                if name:
+                    fields[name] = data.decode(part.get_content_charset() or "utf-8")
+        return fields, uploads
+
+
+# ---------- 进程模型 ----------
+
+def bind_socket(host: str = DEFAULT_HOST, port: int = DEFAULT_PORT, backlog: int = 1024) -> socket.socket:
+    """绑定监听套接字（多进程模式下由主进程绑定，传给各工作进程）"""
+    family = socket.AF_INET6 if host and ":" in host else socket.AF_INET
+    return socket.create_server((host, port), family=family, backlog=backlog)
+
+
+def run_worker(sock: socket.socket, executor: Optional[ToolExecutor] = None,
+               parent_pid: Optional[int] = None, **options):
+    """在当前进程中用已绑定的套接字运行HTTP服务器，停止并排空后返回"""
+    asyncio.run(HttpServer(executor, **options).serve(sock=sock, parent_pid=parent_pid))
+
+
+def _run_master(sock: socket.socket, workers: int, worker_args: List[str], drain_timeout: float):
+    """主进程：启动工作进程并在其异常退出时重启；收到信号后通知工作进程排空并等待退出"""
+    fd = sock.fileno()
+    stop = threading.Event()
+    previous = {sig: signal.signal(sig, lambda signum, frame: stop.set()) for sig in (signal.SIGTERM, signal.SIGINT)}
+
+    def spawn() -> Tuple[subprocess.Popen, float]:
+        process = subprocess.Popen(worker_args + ["--worker-fd", str(fd)], pass_fds=(fd,))
+        logger.info(f"HTTP工作进程已启动: {process.pid}")
+        return process, time.monotonic()
+
+    slots: List[Tuple[subprocess.Popen, float]] = []
+    fast_failures = 0
+    try:
+        slots = [spawn() for _ in range(workers)]
+        while not stop.wait(0.5):
+            for index, (process, started) in enumerate(slots):
+                code = process.poll()
+                if code is None:
+                    continue
+                fast_failures = fast_failures + 1 if time.monotonic() - started < WORKER_MIN_UPTIME else 0
+                if fast_failures >= WORKER_MAX_FAST_FAILURES:
+                    logger.error("HTTP工作进程连续启动失败，主进程退出")
+                    stop.set()
+                    break
+                logger.warning(f"HTTP工作进程 {process.pid} 已退出（返回码 {code}），重新启动")
+                slots[index] = spawn()
+    finally:
+        for process, _ in slots:
+            if process.poll() is None:
+                process.send_signal(signal.SIGTERM)
+        deadline = time.monotonic() + drain_timeout + 5
+        for process, _ in slots:
+            try:
+                process.wait(max(0.0, deadline - time.monotonic()))
+            except subprocess.TimeoutExpired:
+                logger.warning(f"HTTP工作进程 {process.pid} 未能按时退出，强制结束")
+                process.kill()
+                process.wait()
+        sock.close()
+        for sig, handler in previous.items():
+            signal.signal(sig, handler)
+
+
+def serve_http(executor: Optional[ToolExecutor] = None, host: str = DEFAULT_HOST, port: int = DEFAULT_PORT,
+               workers: int = 1, worker_args: Optional[List[str]] = None, worker_fd: Optional[int] = None,
+               keepalive_timeout: float = DEFAULT_KEEPALIVE_TIMEOUT, drain_timeout: float = DEFAULT_DRAIN_TIMEOUT,
+               max_body_bytes: int = DEFAULT_MAX_BODY_BYTES, allowed_origins: Optional[Sequence[str]] = None):
+    """运行HTTP传输
+
+    workers > 1 时（仅POSIX）本进程只作为主进程：绑定端口，用 worker_args 加上 `--worker-fd N`
+    启动工作进程，工作进程再以 worker_fd 调用本函数处理请求。
+    """
+    options = {
+        "keepalive_timeout": keepalive_timeout, "drain_timeout": drain_timeout,
+        "max_body_bytes": max_body_bytes, "allowed_origins": allowed_origins
+    }
+    if worker_fd is not None:
+        run_worker(socket.socket(fileno=worker_fd), executor, parent_pid=os.getppid(), **options)
+        return
+    sock = bind_socket(host, int(port))
+    address = sock.getsockname()
+    workers = max(1, int(workers or 1))
+    if workers > 1 and (os.name != "posix" or not worker_args):
+        logger.warning("当前平台不支持多工作进程，使用单进程模式")
+        workers = 1
+    print(f"XMind MCP HTTP服务器监听 http://{address[0]}:{address[1]}（{workers} 个工作进程）", file=sys.stderr, flush=True)
+    if workers == 1:
+        run_worker(sock, executor, **options)
+    else:
+        _run_master(sock, workers, list(worker_args), float(drain_timeout))
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, stream=sys.stderr,
+                        format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+    serve_http()
@@ -0,0 +1,120 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+XMind MCP STDIO传输
+
+在当前进程内实现MCP的STDIO传输：从stdin逐行读取JSON-RPC消息，工具调用交给工具执行器并发执行，
+每个请求完成后立即写回stdout（一行一条消息）。响应顺序可能与请求顺序不同，客户端按id匹配，
+因此可以同时发出多个请求而不必等待前一个响应。stdout只输出协议消息，日志写到stderr。
+"""
+
+import os
+import sys
+import asyncio
+import logging
+import threading
+from typing import Any, BinaryIO, Dict, Optional
+
+# python -m xmind_mcp.stdio_server 时保证可以导入项目根目录的模块
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if PROJECT_ROOT not in sys.path:
+    sys.path.insert(0, PROJECT_ROOT)
+
+import xmind_json
+from xmind_executor import ToolExecutor
+from xmind_mcp.dispatcher import McpDispatcher, PARSE_ERROR, error_response
+
+logger = logging.getLogger(__name__)
+
+
+class StdioServer:
+    """MCP STDIO服务器 - 逐行读取JSON-RPC请求，在工具执行器中并发处理，完成即写回"""
+
+    def __init__(self, executor: Optional[ToolExecutor] = None,
+                 reader: Optional[BinaryIO] = None, writer: Optional[BinaryIO] = None):
+        self.dispatcher = McpDispatcher(executor)
+        self.reader = reader or sys.stdin.buffer
+        self.writer = writer or sys.stdout.buffer
+        self._write_lock = threading.Lock()
+        self._pending: Dict[Any, asyncio.Task] = {}
+
+    async def serve(self):
+        """处理请求直到stdin关闭，返回前等待所有在途请求完成"""
+        loop = asyncio.get_running_loop()
+        lines: "asyncio.Queue[Optional[bytes]]" = asyncio.Queue()
+
+        def read_lines():
+            # 阻塞读取放在单独线程中；每读到一行立即交给事件循环，不等待后续输入
+            try:
+                for line in iter(self.reader.readline, b''):
+                    loop.call_soon_threadsafe(lines.put_nowait, line)
+            except Exception as e:
+                logger.error(f"读取stdin失败: {e}")
+            finally:
+                loop.call_soon_threadsafe(lines.put_nowait, None)
+
+        threading.Thread(target=read_lines, name="xmind-stdio-reader", daemon=True).start()
+        in_flight = set()
+        while True:
+            line = await lines.get()
+            if line is None:
+                break
+            if not line.strip():
+                continue
+            task = asyncio.ensure_future(self._handle_line(line))
+            in_flight.add(task)
+            task.add_done_callback(in_flight.discard)
+        if in_flight:
+            await asyncio.gather(*in_flight, return_exceptions=True)
+
+    def _write(self, message: Any):
+        data = xmind_json.dumps(message).encode('utf-8') + b"\n"
+        with self._write_lock:
+            self.writer.write(data)
+            self.writer.flush()
+
+    async def _handle_line(self, line: bytes):
+        try:
+            payload = xmind_json.loads(line)
+        except Exception as e:
+            self._write(error_response(None, PARSE_ERROR, f"JSON解析失败: {e}"))
+            return
+        response = await self.dispatcher.handle_payload(payload, self._pending)
+        if response is not None:
+            self._write(response)
+
+
+def serve_stdio(executor: Optional[ToolExecutor] = None):
+    """在当前进程中运行STDIO传输，stdin关闭且在途请求全部完成后返回
+
+    协议消息写到原stdout的副本；运行期间文件描述符1和 sys.stdout 都指向stderr，
+    库代码（以及继承描述符的工作进程）的 print 不会混入协议消息。
+    """
+    sys.stdout.flush()
+    previous = sys.stdout
+    try:
+        stdout_fd = sys.stdout.fileno()
+    except (AttributeError, OSError, ValueError):
+        stdout_fd = None
+    saved_fd = None
+    if stdout_fd is not None:
+        saved_fd = os.dup(stdout_fd)
+        writer = os.fdopen(os.dup(saved_fd), "wb")
+        os.dup2(sys.stderr.fileno(), stdout_fd)
+    else:
+        writer = sys.stdout.buffer
+    sys.stdout = sys.stderr
+    try:
+        asyncio.run(StdioServer(executor, writer=writer).serve())
+    finally:
+        sys.stdout = previous
+        if saved_fd is not None:
+            writer.close()
+            os.dup2(saved_fd, stdout_fd)
+            os.close(saved_fd)
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, stream=sys.stderr,
+                        format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+    serve_stdio()
@@ -24,14 +24,11 @@ except Exception:
 # 导入真实的XMind核心引擎
 sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
 try:
-    from xmind_core_engine import (
-        get_engine, 
-        read_xmind_file as core_read_xmind_file, 
-        create_mind_map as core_create_mind_map, 
-        analyze_mind_map as core_analyze_mind_map, 
-        convert_to_xmind as core_convert_to_xmind, 
-        list_xmind_files as core_list_xmind_files
-    )
+    from xmind_core_engine import get_engine, init_worker as core_init_worker
+    import xmind_json
+    import xmind_tools
+    from xmind_tools import DEFAULT_LIST_LIMIT
+    from xmind_executor import ToolExecutor
     REAL_ENGINE_AVAILABLE = True
     logging.info("真实XMind核心引擎已加载")
 except ImportError as e:
@@ -47,10 +44,7 @@ try:
     logging.info("使用FastMCP实现")
 except ImportError:
     FASTMCP_AVAILABLE = False
-    logging.warning("FastMCP不可用，使用标准MCP实现")
-    from mcp.server import Server
-    from mcp.server.stdio import stdio_server
-    from mcp.types import Tool, TextContent, ImageContent, EmbeddedResource
+    logging.warning("FastMCP不可用，使用内置STDIO传输（--mode stdio）")
 
 # 配置日志
 logging.basicConfig(
@@ -72,11 +66,12 @@ class ConfigManager:
         self.default_output_dir = None
         self.config_file_path = None
     
-    def load_config(self, config_file_path: str = None) -> Dict[str, Any]:
+    def load_config(self, config_file_path: str = None, start_watches: bool = True) -> Dict[str, Any]:
         """加载配置文件
         
         Args:
             config_file_path: 配置文件路径，如果为None则使用默认路径
+            start_watches: 是否启动配置中的目录监视（HTTP多进程模式下只由主进程启动）
             
         Returns:
             配置字典
@@ -102,6 +97,25 @@ class ConfigManager:
         # 设置默认输出目录
         self._setup_default_output_dir()
         
+        # 设置转换结果缓存
+        self._setup_conversion_cache()
+        
+        # 设置已解析思维导图缓存
+        self._setup_parsed_cache()
+        
+        # 设置主题标题搜索索引
+        self._setup_search_index()
+        
+        # 设置工具执行线程池/进程池（进程池按已配置的转换缓存初始化）
+        self._setup_tool_executor()
+        
+        # 工具调用规则使用的默认输出目录和执行器（FastMCP、STDIO、HTTP共用）
+        xmind_tools.configure(self.default_output_dir, tool_executor)
+        
+        # 启动配置中的目录监视
+        if start_watches:
+            self._setup_watches()
+        
         return self.config
     
     def _setup_default_output_dir(self):
@@ -123,6 +137,122 @@ class ConfigManager:
             self.default_output_dir = None
             logger.info("未配置默认输出目录，输出路径为必填参数")
     
+    def _setup_conversion_cache(self):
+        """根据配置启用转换结果磁盘缓存
+        
+        配置示例: {"conversion_cache": {"enabled": true, "directory": "cache", "max_bytes": 536870912, "link": false}}
+        """
+        cache_config = self.config.get("conversion_cache") or {}
+        if not cache_config.get("enabled", False):
+            get_engine().configure_conversion_cache(enabled=False)
+            return
+        
+        directory = cache_config.get("directory")
+        if directory and not os.path.isabs(directory):
+            directory = os.path.abspath(os.path.join(PROJECT_ROOT, directory))
+        
+        try:
+            options = {"link": bool(cache_config.get("link", False))}
+            if cache_config.get("max_bytes"):
+                options["max_bytes"] = int(cache_config["max_bytes"])
+            cache = get_engine().configure_conversion_cache(directory, **options)
+            logger.info(f"转换缓存已启用: {cache.directory} (上限: {cache.max_bytes} 字节)")
+        except Exception as e:
+            logger.warning(f"转换缓存启用失败: {e}，将不使用缓存")
+            get_engine().configure_conversion_cache(enabled=False)
+    
+    def _setup_parsed_cache(self):
+        """根据配置调整已解析思维导图的内存缓存（默认启用）
+        
+        配置示例: {"parsed_cache": {"enabled": true, "max_bytes": 268435456}}
+        """
+        cache_config = self.config.get("parsed_cache") or {}
+        try:
+            options = {"enabled": bool(cache_config.get("enabled", True))}
+            if cache_config.get("max_bytes"):
+                options["max_bytes"] = int(cache_config["max_bytes"])
+            get_engine().configure_parsed_cache(**options)
+        except Exception as e:
+            logger.warning(f"解析缓存配置无效: {e}，使用默认配置")
+            get_engine().configure_parsed_cache()
+    
+    def _setup_search_index(self):
+        """根据配置启用主题标题搜索索引（默认启用，读取和列举文件时顺带更新索引）
+        
+        配置示例: {"search_index": {"enabled": true, "path": "cache/search.sqlite3"}}
+        """
+        index_config = self.config.get("search_index") or {}
+        if not index_config.get("enabled", True):
+            get_engine().configure_search_index(enabled=False)
+            return
+        
+        path = index_config.get("path")
+        if path and not os.path.isabs(path):
+            path = os.path.abspath(os.path.join(PROJECT_ROOT, path))
+        
+        try:
+            index = get_engine().configure_search_index(path)
+            logger.info(f"搜索索引已启用: {index.path}（{index.mode}）")
+        except Exception as e:
+            logger.warning(f"搜索索引启用失败: {e}，search_xmind 将在首次调用时使用默认索引")
+            get_engine().configure_search_index(enabled=False)
+    
+    def _setup_tool_executor(self):
+        """根据配置调整MCP工具的执行线程池、进程池和每个工具的并发上限
+        
+        配置示例: {"tool_executor": {"max_workers": 8, "process_workers": 2, "limits": {"convert_to_xmind": 2, "read_xmind_file": null}}}
+        process_workers > 0 时 convert_to_xmind 在独立进程中解析源文件，不与其他请求争用GIL。
+        """
+        executor_config = self.config.get("tool_executor") or {}
+        if not executor_config:
+            return
+        cache = get_engine().conversion_cache
+        cache_options = {"directory": cache.directory, "max_bytes": cache.max_bytes, "link": cache.link} if cache else None
+        try:
+            tool_executor.configure(
+                executor_config.get("max_workers"),
+                executor_config.get("process_workers", 0),
+                executor_config.get("limits"),
+                core_init_worker, (cache_options,)
+            )
+            logger.info(f"工具执行器: {tool_executor.max_workers} 线程, {tool_executor.process_workers} 进程, 并发上限 {tool_executor.limits}")
+        except Exception as e:
+            logger.warning(f"工具执行器配置无效: {e}，使用默认配置")
+            tool_executor.configure()
+    
+    def _setup_watches(self):
+        """根据配置启动目录监视，源文件变化时自动转换
+        
+        配置示例: {"watch": [{"source_dir": "docs", "output_dir": "output/docs", "debounce": 0.5, "backend": "auto"}]}
+        """
+        watch_config = self.config.get("watch") or []
+        if isinstance(watch_config, dict):
+            watch_config = [watch_config]
+        for options in watch_config:
+            options = dict(options)
+            for key in ("source_dir", "output_dir"):
+                if options.get(key) and not os.path.isabs(options[key]):
+                    options[key] = os.path.abspath(os.path.join(PROJECT_ROOT, options[key]))
+            if not options.get("output_dir"):
+                options["output_dir"] = self.default_output_dir
+            result = get_engine().start_watch(**options)
+            if result.get("status") == "success":
+                logger.info(f"目录监视已启动: {result['source_dir']} -> {result['output_dir']}（{result['backend']}）")
+            else:
+                logger.warning(f"目录监视启动失败: {result.get('error')}")
+    
+    def get_http_options(self, host: str = None, port: int = None, workers: int = None) -> Dict[str, Any]:
+        """HTTP传输选项：配置文件中的 http 段，命令行参数优先
+        
+        配置示例: {"http": {"host": "127.0.0.1", "port": 8080, "workers": 4, "keepalive_timeout": 5,
+                           "drain_timeout": 30, "max_body_bytes": 67108864, "allowed_origins": ["https://example.com"]}}
+        """
+        options = dict(self.config.get("http") or {})
+        for key, value in (("host", host), ("port", port), ("workers", workers)):
+            if value is not None:
+                options[key] = value
+        return options
+    
     def get_default_output_dir(self) -> Optional[str]:
         """获取默认输出目录"""
         return self.default_output_dir
@@ -134,6 +264,9 @@ class ConfigManager:
 # 全局配置管理器实例
 config_manager = ConfigManager()
 
+# MCP工具执行器：工具在线程池中执行，不阻塞事件循环
+tool_executor = ToolExecutor()
+
 @dataclass
 class XMindConfig:
     def ensure_data_dir(self):
@@ -157,335 +290,250 @@ if FASTMCP_AVAILABLE:
     mcp = FastMCP("XMindMCP")
 
     @mcp.tool()
-    def read_xmind_file(ctx: Context, file_path: str) -> str:
+    @tool_executor.offload
+    def read_xmind_file(ctx: Context, file_path: str, sheet_index: int = 0, all_sheets: bool = False, topic_id: str = None, topic_path: str = None, max_depth: int = None, child_counts: bool = True, cursor: str = None, page_size: int = None, page_bytes: int = None, structure_format: str = "nested") -> str:
         """读取XMind文件内容（返回结构与统计信息）
         
+        大型思维导图建议先用 max_depth=1~2 浏览顶层，再按 topic_id 或 topic_path 展开需要的分支。
+        需要完整结构时使用分页模式：传入 page_size 或 page_bytes 开始读取，按广度优先顺序返回扁平的
+        节点记录（id/parent_id/title/depth/child_count），再把 next_cursor 作为 cursor 传回读取下一页，
+        直到 next_cursor 为 null。
+        structure_format 为 flat 或 outline 时返回紧凑表示（不重复 "title"/"children" 键，JSON也不带多余空格），
+        大型思维导图的响应通常只有嵌套格式的一半左右。
+        
         Args:
             file_path: XMind文件路径
+            sheet_index: 可选，返回结构的工作表索引（默认 0）
+            all_sheets: 可选，在工作表摘要中同时返回每个工作表的结构
+            topic_id: 可选，只返回该主题ID对应的子树
+            topic_path: 可选，只返回该标题路径对应的子树（从根主题开始，用 `/` 分隔；标题含 `/` 时传JSON数组）
+            max_depth: 可选，最多返回的层数（0 表示只返回该主题本身）
+            child_counts: 可选，为被截断的主题返回 child_count（默认 True）
+            cursor: 可选，分页读取时上一页返回的 next_cursor
+            page_size: 可选，分页读取每页最多节点数（默认 2000）
+            page_bytes: 可选，分页读取每页节点记录的最大JSON字节数（默认 262144，即256KB）
+            structure_format: 可选，结构格式：nested（默认，嵌套 {"title","children"}）、
+                              flat（{"columns","rows"}，每行 [父行号, 深度, 标题]，按范围读取时行首加 id）、outline（缩进大纲文本）；
+                              分页读取支持 nested 和 flat
         """
-        try:
-            # 验证文件路径
-            if not file_path:
-                return json.dumps({
-                    "status": "error",
-                    "error": "文件路径不能为空"
-                }, ensure_ascii=False)
-            
-            # 检查文件是否存在
-            if not os.path.exists(file_path):
-                return json.dumps({
-                    "status": "error",
-                    "error": f"文件不存在: {file_path}",
-                    "file_path": file_path
-                }, ensure_ascii=False)
-            
-            # 检查文件扩展名
-            if not file_path.lower().endswith('.xmind'):
-                logger.warning(f"文件扩展名不是.xmind: {file_path}")
-            
-            # 检查文件大小
-            file_size = os.path.getsize(file_path)
-            if file_size == 0:
-                return json.dumps({
-                    "status": "error",
-                    "error": "文件为空",
-                    "file_path": file_path
-                }, ensure_ascii=False)
-            
-            logger.info(f"读取XMind文件: {file_path}, 大小: {file_size} 字节")
-            
-            # 调用核心引擎读取文件
-            result = core_read_xmind_file(file_path)
-            
-            # 添加文件路径信息到结果中
-            if isinstance(result, dict):
-                result["file_path"] = file_path
-                result["file_size"] = file_size
-            
-            return json.dumps(result, ensure_ascii=False)
-        except Exception as e:
-            logger.error(f"读取XMind文件错误: {e}")
-            return json.dumps({
-                "status": "error",
-                "error": str(e),
-                "file_path": file_path
-            }, ensure_ascii=False)
+        return xmind_json.dumps(xmind_tools.read_xmind_file(
+            file_path, sheet_index, all_sheets, topic_id, topic_path, max_depth, child_counts,
+            cursor, page_size, page_bytes, structure_format
+        ))
 
     @mcp.tool()
-    def create_mind_map(ctx: Context, title: str, topics_json: str, output_path: str = None) -> str:
+    @tool_executor.offload
+    def create_mind_map(ctx: Context, title: str, topics_json: str, output_path: str = None, id_mode: str = None, deterministic: bool = False, sheets_json: str = None) -> str:
         """创建新的思维导图（支持 children/topics/subtopics 等别名，服务器自动归一化）
         
         Args:
             title: 思维导图标题（作为根节点标题）
             topics_json: 主题JSON结构（字符串或Python对象）。每个节点至少包含`title`；子节点推荐使用`children`，也兼容`topics`/`subtopics`/`nodes`/`items`（服务器会自动归一化）。必须为合法JSON结构，不要使用Markdown或纯文本。
             output_path: 可选输出文件绝对路径；未指定时优先使用配置中的 `default_output_dir`
+            id_mode: 可选主题ID生成模式：fast（默认）、sequential（确定性）、uuid
+            deterministic: 可选确定性构建：相同输入生成字节完全相同的文件，内容未变化时跳过写入
+            sheets_json: 可选追加工作表（JSON数组），每项包含中心主题`title`、可选`sheet_title`和`topics`/`children`，所有工作表写入同一文件
         """
         try:
-            # 修复字典参数问题 - 统一处理topics_json格式
-            if isinstance(topics_json, (dict, list)):
-                # 如果已经是Python对象，直接使用
-                topics_data = topics_json
-                logger.info(f"topics_json是Python对象: {type(topics_json)}")
-            elif isinstance(topics_json, str):
-                # 如果是字符串，尝试解析为JSON
-                try:
-                    topics_data = json.loads(topics_json)
-                    logger.info(f"topics_json字符串解析成功")
-                except json.JSONDecodeError:
-                    # 如果解析失败，创建简单的主题结构
-                    topics_data = [{"title": topics_json}]
-                    logger.info(f"topics_json作为简单字符串处理")
-            else:
-                # 其他类型，转换为字符串后处理
-                topics_data = [{"title": str(topics_json)}]
-                logger.info(f"topics_json转换为字符串: {type(topics_json)}")
-            
-            # 使用核心引擎的sanitize方法来处理文件名
-            engine = get_engine()
-            safe_title = engine._sanitize_filename(title)
-            
-            # 确定输出路径 - 新的逻辑
-            if output_path:
-                # 如果指定了输出路径，验证是否为绝对路径
-                if not config_manager.validate_absolute_path(output_path):
-                    return json.dumps({
-                        "status": "error", 
-                        "error": "输出路径必须为绝对路径",
-                        "title": title,
-                        "output_path": output_path
-                    }, ensure_ascii=False)
-                
-                final_output_path = output_path
-                output_dir = os.path.dirname(final_output_path)
-                if output_dir and not os.path.exists(output_dir):
-                    try:
-                        os.makedirs(output_dir)
-                        logger.info(f"创建输出目录: {output_dir}")
-                    except Exception as e:
-                        logger.error(f"创建输出目录失败: {str(e)}")
-                        return json.dumps({
-                            "status": "error",
-                            "error": f"无法创建输出目录: {str(e)}",
-                            "title": title
-                        }, ensure_ascii=False)
-                logger.info(f"使用指定输出路径: {final_output_path}")
-            else:
-                # 未指定输出路径，检查配置文件中的默认输出目录
-                default_output_dir = config_manager.get_default_output_dir()
-                
-                if default_output_dir is None:
-                    # 配置文件中没有指定默认输出目录
-                    return json.dumps({
-                        "status": "error",
-                        "error": "未指定输出路径且配置文件中没有默认输出目录配置",
-                        "title": title,
-                        "suggestion": "请在配置文件中设置default_output_dir或在调用时指定output_path参数"
-                    }, ensure_ascii=False)
-                
-                # 使用配置文件中的默认输出目录
-                final_output_path = os.path.join(default_output_dir, f"{safe_title}.xmind")
-                logger.info(f"使用配置文件默认输出路径: {final_output_path}")
-                
-                # 确保默认输出目录存在
-                if not os.path.exists(default_output_dir):
-                    try:
-                        os.makedirs(default_output_dir)
-                        logger.info(f"创建默认输出目录: {default_output_dir}")
-                    except Exception as e:
-                        logger.error(f"创建默认输出目录失败: {str(e)}")
-                        return json.dumps({
-                            "status": "error",
-                            "error": f"无法创建默认输出目录: {str(e)}",
-                            "title": title,
-                            "default_output_dir": default_output_dir
-                        }, ensure_ascii=False)
-            
-            # 将topics_data归一化为children结构，兼容topics/subtopics
-            def _normalize_children(obj):
-                if isinstance(obj, list):
-                    return [_normalize_children(x) for x in obj]
-                if isinstance(obj, dict):
-                    title_val = obj.get("title") or obj.get("name") or obj.get("text") or ""
-                    children_val = (
-                        obj.get("children")
-                        or obj.get("topics")
-                        or obj.get("subtopics")
-                        or obj.get("nodes")
-                        or obj.get("items")
-                    )
-                    normalized = {"title": title_val}
-                    if children_val:
-                        normalized["children"] = _normalize_children(children_val)
-                    return normalized
-                return {"title": str(obj)}
-
-            normalized_topics = _normalize_children(topics_data) if topics_data else []
-            topics_json_str = json.dumps(normalized_topics, ensure_ascii=False)
-            
-            # 调用核心引擎创建思维导图
-            result = core_create_mind_map(title, topics_json_str, final_output_path)
-            logger.info(f"创建思维导图: {title} -> {final_output_path}")
-            
-            # 验证文件是否真的被创建
-            if os.path.exists(final_output_path):
-                logger.info(f"文件创建成功，大小: {os.path.getsize(final_output_path)} 字节")
-                
-                # 修改返回格式
-                result_data = result
-                if isinstance(result_data, dict) and result_data.get("status") == "success":
-                    # 获取绝对路径
-                    abs_path = os.path.abspath(final_output_path)
-                    # 修改返回数据
-                    result_data["filename"] = os.path.basename(final_output_path)
-                    result_data["message"] = f"思维导图已创建: {abs_path}"
-                    result_data["absolute_path"] = abs_path
-                    result_data["output_path"] = final_output_path
-                    
-                    return json.dumps(result_data, ensure_ascii=False)
-                else:
-                    # 核心引擎返回失败，但仍然返回详细信息
-                    if isinstance(result_data, dict):
-                        result_data["filename"] = os.path.basename(final_output_path)
-                        result_data["absolute_path"] = os.path.abspath(final_output_path)
-                        result_data["output_path"] = final_output_path
-                    return json.dumps(result_data, ensure_ascii=False)
-            else:
-                logger.error(f"文件创建失败，路径: {final_output_path}")
-                return json.dumps({
-                    "status": "error",
-                    "error": f"文件创建失败，路径: {final_output_path}",
-                    "title": title,
-                    "output_path": final_output_path
-                }, ensure_ascii=False)
+            return xmind_json.dumps(xmind_tools.create_mind_map(title, topics_json, output_path, id_mode, deterministic, sheets_json))
         except Exception as e:
             logger.error(f"创建思维导图错误: {e}")
             return f"错误: {str(e)}"
 
     @mcp.tool()
-    def analyze_mind_map(ctx: Context, file_path: str) -> str:
-        """分析思维导图结构（统计节点数、最大层级等）"""
+    @tool_executor.offload
+    def analyze_mind_map(ctx: Context, file_path: str, sheet_index: int = 0) -> str:
+        """分析思维导图结构（统计节点数、最大层级等，多工作表时逐个分析）"""
         try:
-            result = core_analyze_mind_map(file_path)
-            logger.info(f"分析思维导图: {file_path}")
-            return json.dumps(result, ensure_ascii=False)
+            return xmind_json.dumps(xmind_tools.analyze_mind_map(file_path, sheet_index))
         except Exception as e:
             logger.error(f"分析思维导图错误: {e}")
             return f"错误: {str(e)}"
 
     @mcp.tool()
-    def convert_to_xmind(ctx: Context, source_filepath: str = None, output_filepath: str = None, source_file: str = None, output_file: str = None) -> str:
+    @tool_executor.offload
+    def convert_to_xmind(ctx: Context, source_filepath: str = None, output_filepath: str = None, source_file: str = None, output_file: str = None, id_mode: str = None, deterministic: bool = False, use_cache: bool = True) -> str:
         """将纯文本、Markdown、HTML、Word、Excel等文件转换为XMind。
         
         注意：不要传入JSON结构；JSON结构请使用 `create_mind_map`。
         
         Args:
             source_filepath: 源文件路径（支持 .txt/.md/.html/.docx/.xlsx 等）
-            output_filepath: 可选。输出XMind文件绝对路径；未指定时自动输出到 `output/<源文件名>.xmind`
+            output_filepath: 可选。输出XMind文件绝对路径；未指定时输出到配置 `default_output_dir`（未配置时为项目目录下的 `output`）中的 `<源文件名>.xmind`
             source_file: 兼容旧参数名（同 source_filepath）
             output_file: 兼容旧参数名（同 output_filepath）
+            id_mode: 可选主题ID生成模式：fast（默认）、sequential（确定性）、uuid
+            deterministic: 可选确定性构建：相同输入生成字节完全相同的文件，内容未变化时跳过写入
+            use_cache: 启用转换缓存时，源文件未变化则直接返回之前的结果（默认 True）；结果中的 cache 字段包含命中统计
         """
         try:
-            src = source_filepath or source_file
-            out = output_filepath or output_file
-            if not src:
-                return json.dumps({
-                    "status": "error",
-                    "error": "必须提供源文件路径：source_filepath 或 source_file"
-                }, ensure_ascii=False)
-            result = core_convert_to_xmind(src, out)
-            logger.info(f"转换文件为XMind格式: {src}")
-            return json.dumps(result, ensure_ascii=False)
+            return xmind_json.dumps(xmind_tools.convert_to_xmind(
+                source_filepath or source_file, output_filepath or output_file, id_mode, deterministic, use_cache
+            ))
         except Exception as e:
             logger.error(f"文件转换错误: {e}")
             return f"错误: {str(e)}"
 
     @mcp.tool()
-    def list_xmind_files(ctx: Context, directory: str = None, recursive: bool = True) -> str:
-        """列出XMind文件
+    @tool_executor.offload
+    def batch_convert(ctx: Context, source: str, output_dir: str = None, recursive: bool = True, workers: int = None, chunk_size: int = None, timeout: float = None, id_mode: str = None, deterministic: bool = False, use_cache: bool = True, include_results: bool = False) -> str:
+        """并行批量转换目录或glob模式匹配的文件为XMind（进程池并行）
+        
+        Args:
+            source: 源目录、glob模式（如 D:/docs/**/*.md）或单个文件
+            output_dir: 可选输出目录（绝对路径），保留源文件的相对子目录结构；未指定时使用配置 `default_output_dir`
+            recursive: 是否递归遍历目录（默认 True）
+            workers: 可选工作进程数，默认CPU核数；1 表示顺序转换
+            chunk_size: 可选每次提交给工作进程的文件数，默认自动计算
+            timeout: 可选单个文件转换超时秒数
+            id_mode: 可选主题ID生成模式：fast（默认）、sequential（确定性）、uuid
+            deterministic: 可选确定性构建
+            use_cache: 启用转换缓存时跳过未变化的源文件（默认 True）
+            include_results: 返回每个文件的结果（默认只返回失败的文件）
+        """
+        try:
+            return xmind_json.dumps(xmind_tools.batch_convert(
+                source, output_dir, recursive, workers, chunk_size, timeout, id_mode, deterministic, use_cache, include_results
+            ))
+        except Exception as e:
+            logger.error(f"批量转换错误: {e}")
+            return f"错误: {str(e)}"
+
+    @mcp.tool()
+    @tool_executor.offload
+    def sync_directory(ctx: Context, source_dir: str, output_dir: str = None, manifest_path: str = None, recursive: bool = True, workers: int = None, timeout: float = None, id_mode: str = None, deterministic: bool = False, delete_removed: bool = True, include_skipped: bool = False) -> str:
+        """增量同步目录到XMind：只重新转换新增或变化的源文件，并删除已删除源文件的输出
+        
+        Args:
+            source_dir: 源目录
+            output_dir: 可选输出目录（绝对路径）；未指定时使用配置 `default_output_dir`
+            manifest_path: 可选同步清单路径，默认为输出目录下的 .xmind-sync.json
+            recursive: 是否递归遍历目录（默认 True）
+            workers: 可选转换变化文件时的工作进程数，默认CPU核数
+            timeout: 可选单个文件转换超时秒数
+            id_mode: 可选主题ID生成模式：fast（默认）、sequential（确定性）、uuid
+            deterministic: 可选确定性构建
+            delete_removed: 删除已不存在的源文件对应的输出（默认 True）
+            include_skipped: 在结果中列出跳过（未变化）的文件
+        """
+        try:
+            return xmind_json.dumps(xmind_tools.sync_directory(
+                source_dir, output_dir, manifest_path, recursive, workers, timeout, id_mode, deterministic,
+                delete_removed, include_skipped
+            ))
+        except Exception as e:
+            logger.error(f"目录同步错误: {e}")
+            return f"错误: {str(e)}"
+
+    @mcp.tool()
+    @tool_executor.offload
+    def list_xmind_files(ctx: Context, directory: str = None, recursive: bool = True, pattern: str = None, sort: str = "path", descending: bool = False, limit: int = DEFAULT_LIST_LIMIT, cursor: str = None, use_index: bool = False) -> str:
+        """列出XMind文件（分页返回，结果较多时用 next_cursor 获取下一页）
         
         Args:
             directory: 要搜索的目录，如果为None则使用配置文件中的默认输出目录
             recursive: 是否递归遍历目录（默认 True）
+            pattern: 可选文件名glob过滤（如 `项目*.xmind`）；包含 `/` 时匹配相对路径
+            sort: 排序方式：path（默认，相对路径）、name、size、modified
+            descending: 是否降序
+            limit: 每页最多返回的文件数（默认 1000）
+            cursor: 上一页返回的 next_cursor
+            use_index: 使用持久化目录索引加速重复列举
+        """
+        return xmind_json.dumps(xmind_tools.list_xmind_files(
+            directory, recursive, pattern, sort, descending, limit, cursor, use_index
+        ))
+
+    @mcp.tool()
+    @tool_executor.offload
+    def search_xmind(ctx: Context, query: str, directory: str = None, limit: int = 20, refresh: bool = True, matches_per_file: int = 5) -> str:
+        """搜索主题标题，找出提到检索词的XMind文件（基于持久化全文索引，无需逐个解析文件）
+        
+        Args:
+            query: 检索词，多个词用空格分隔（同时包含）
+            directory: 可选限定目录（绝对路径）；同时扫描该目录，新增或修改的文件会先更新索引。
+                       未指定时搜索全部已索引的文件（读取或列举过的文件会自动加入索引）
+            limit: 最多返回的文件数（默认 20）
+            refresh: 搜索前按修改时间刷新索引（默认 True）
+            matches_per_file: 每个文件最多返回的匹配主题数（默认 5）
         """
         try:
-            # 如果未指定目录，检查配置文件中的默认输出目录
-            if directory is None:
-                default_output_dir = config_manager.get_default_output_dir()
-                
-                if default_output_dir is None:
-                    # 配置文件中没有指定默认输出目录
-                    return json.dumps({
-                        "status": "error",
-                        "error": "未指定搜索目录且配置文件中没有默认输出目录配置",
-                        "suggestion": "请在配置文件中设置default_output_dir或在调用时指定directory参数"
-                    }, ensure_ascii=False)
-                
-                directory = default_output_dir
-                logger.info(f"使用配置文件默认输出目录: {directory}")
-            else:
-                # 指定了目录，验证是否为绝对路径
-                if not config_manager.validate_absolute_path(directory):
-                    return json.dumps({
-                        "status": "error",
-                        "error": "搜索目录必须为绝对路径",
-                        "directory": directory
-                    }, ensure_ascii=False)
-                logger.info(f"使用指定目录: {directory}")
-            
-            # 验证目录是否存在
-            if not os.path.exists(directory):
-                return json.dumps({
-                    "status": "error",
-                    "error": f"目录不存在: {directory}",
-                    "directory": directory
-                }, ensure_ascii=False)
-            
-            # 验证是否为目录
-            if not os.path.isdir(directory):
-                return json.dumps({
-                    "status": "error",
-                    "error": f"路径不是目录: {directory}",
-                    "directory": directory
-                }, ensure_ascii=False)
-            
-            logger.info(f"搜索XMind文件，目录: {directory}，递归: {recursive}")
-            
-            # 调用核心引擎列出文件
-            result = core_list_xmind_files(directory, recursive)
-            
-            # 添加目录信息到结果中
-            if isinstance(result, dict):
-                result["directory"] = directory
-                result["recursive"] = recursive
-            
-            return json.dumps(result, ensure_ascii=False)
+            return xmind_json.dumps(xmind_tools.search_xmind(query, directory, limit, refresh, matches_per_file))
         except Exception as e:
-            logger.error(f"列出XMind文件错误: {e}")
-            return json.dumps({
-                "status": "error",
-                "error": str(e),
-                "directory": directory if 'directory' in locals() else None
-            }, ensure_ascii=False)
+            logger.error(f"搜索XMind文件错误: {e}")
+            return f"错误: {str(e)}"
+
+    @mcp.tool()
+    @tool_executor.offload
+    def get_cache_stats(ctx: Context) -> str:
+        """获取缓存统计信息（解析缓存、转换缓存与搜索索引的条目数、占用、命中/未命中/淘汰次数，以及各工具的并发执行统计）"""
+        return xmind_json.dumps(xmind_tools.get_cache_stats())
+
+    @mcp.tool()
+    @tool_executor.offload
+    def start_watch(ctx: Context, source_dir: str, output_dir: str = None, recursive: bool = True, debounce: float = None, workers: int = None, queue_size: int = None, backend: str = "auto", poll_interval: float = None) -> str:
+        """监视源目录，源文件变化时自动转换为XMind（inotify或轮询，防抖后放入有界队列转换）
+        
+        Args:
+            source_dir: 要监视的源目录
+            output_dir: 可选输出目录（绝对路径）；未指定时使用配置 `default_output_dir`
+            recursive: 是否监视子目录（默认 True）
+            debounce: 可选防抖秒数，同一文件在此时间内的连续修改只转换一次
+            workers: 可选转换线程数
+            queue_size: 可选转换队列容量
+            backend: 监视后端：auto（默认，Linux上使用inotify）、inotify、polling
+            poll_interval: 可选轮询后端的扫描间隔秒数
+        """
+        try:
+            return xmind_json.dumps(xmind_tools.start_watch(
+                source_dir, output_dir, recursive, debounce, workers, queue_size, backend, poll_interval
+            ))
+        except Exception as e:
+            logger.error(f"启动目录监视错误: {e}")
+            return f"错误: {str(e)}"
+
+    @mcp.tool()
+    @tool_executor.offload
+    def stop_watch(ctx: Context, source_dir: str) -> str:
+        """停止监视源目录"""
+        try:
+            return xmind_json.dumps(xmind_tools.stop_watch(source_dir))
+        except Exception as e:
+            logger.error(f"停止目录监视错误: {e}")
+            return f"错误: {str(e)}"
+
+    @mcp.tool()
+    @tool_executor.offload
+    def get_watch_status(ctx: Context, source_dir: str = None) -> str:
+        """获取目录监视的状态与指标（队列深度、防抖中的文件数、转换计数、转换延迟分布）"""
+        return xmind_json.dumps(xmind_tools.get_watch_status(source_dir))
 
 def main():
-    """主函数 - 支持 --mode fastmcp|stdio"""
+    """主函数 - 支持 --mode fastmcp|stdio|http"""
     parser = argparse.ArgumentParser(description='XMind MCP服务器')
     parser.add_argument('--version', action='version', version=f'XMind MCP Server {__version__}')
     parser.add_argument('--debug', action='store_true', help='启用调试模式')
-    parser.add_argument('--mode', choices=['fastmcp', 'stdio'], help='选择运行模式：fastmcp 或 stdio')
+    parser.add_argument('--mode', choices=['fastmcp', 'stdio', 'http'], help='选择运行模式：fastmcp、stdio 或 http')
     parser.add_argument('--stdio', action='store_true', help='以 STDIO 模式运行（别名）')
     parser.add_argument('--config', help='指定配置文件路径')
+    parser.add_argument('--host', help='HTTP 模式监听地址，默认 127.0.0.1')
+    parser.add_argument('--port', type=int, help='HTTP 模式监听端口，默认 8080（指定时默认使用 HTTP 模式）')
+    parser.add_argument('--workers', type=int, help='HTTP 模式工作进程数，默认 1')
+    # 内部参数：HTTP 多进程模式下主进程传给工作进程的监听套接字
+    parser.add_argument('--worker-fd', type=int, help=argparse.SUPPRESS)
 
     args = parser.parse_args()
 
     if args.debug:
         logging.getLogger().setLevel(logging.DEBUG)
-        print("调试模式已启用")
+        print("调试模式已启用", file=sys.stderr)
 
-    # 加载配置文件
-    config_manager.load_config(args.config)
+    # 加载配置文件（HTTP 工作进程不重复启动主进程中的目录监视）
+    config_manager.load_config(args.config, start_watches=args.worker_fd is None)
 
     requested_mode = 'fastmcp' if FASTMCP_AVAILABLE else 'stdio'
+    if args.port is not None or args.worker_fd is not None:
+        requested_mode = 'http'
     if args.stdio:
         requested_mode = 'stdio'
     if args.mode:
@@ -495,25 +543,32 @@ def main():
         if not FASTMCP_AVAILABLE:
             logger.error("FastMCP 不可用，请安装 mcp[cli]>=1.3.0 或使用 --mode stdio")
             sys.exit(1)
-        print("启动XMind MCP服务器 (FastMCP模式)")
+        # stdout 用于传输协议消息，提示信息写到stderr
+        print("启动XMind MCP服务器 (FastMCP模式)", file=sys.stderr)
         logger.info("启动XMind MCP服务器 (FastMCP模式)")
         mcp.run()
+    elif requested_mode == 'http':
+        if args.worker_fd is None:
+            logger.info("启动XMind MCP服务器 (HTTP模式)")
+        try:
+            from xmind_mcp.http_server import serve_http
+            # 多进程模式下工作进程以相同的配置重新启动本脚本
+            worker_args = [sys.executable, os.path.abspath(__file__), '--mode', 'http',
+                           '--config', config_manager.config_file_path]
+            if args.debug:
+                worker_args.append('--debug')
+            serve_http(tool_executor, worker_args=worker_args, worker_fd=args.worker_fd,
+                       **config_manager.get_http_options(args.host, args.port, args.workers))
+        except Exception as e:
+            logger.error(f"HTTP 模式启动失败: {e}")
+            sys.exit(1)
     else:
-        print("启动XMind MCP服务器 (STDIO模式)")
+        print("启动XMind MCP服务器 (STDIO模式)", file=sys.stderr)
         logger.info("启动XMind MCP服务器 (STDIO模式)")
         try:
-            # 使用已验证的STDIO实现
-            import subprocess
-            import sys
-            
-            # 运行简化的STDIO MCP服务器
-            cmd = [sys.executable, "-m", "xmind_mcp.stdio_server"]
-            result = subprocess.run(cmd, capture_output=True, text=True)
-            
-            if result.returncode != 0:
-                logger.error(f"STDIO服务器启动失败: {result.stderr}")
-                sys.exit(1)
-                
+            # 进程内的STDIO传输：复用已加载配置的引擎和工具执行器，逐行读写JSON-RPC
+            from xmind_mcp.stdio_server import serve_stdio
+            serve_stdio(tool_executor)
         except Exception as e:
             logger.error(f"STDIO 模式启动失败: {e}")
             sys.exit(1)
@@ -0,0 +1,288 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+XMind搜索索引组件
+用本地SQLite（FTS5全文索引）记录XMind文件元数据和全部主题标题/路径，
+按修改时间和大小判断是否需要重新索引
+"""
+
+import os
+import time
+import sqlite3
+import logging
+import threading
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from xmind_cache import default_cache_dir
+
+logger = logging.getLogger(__name__)
+
+# 主题路径最多保留的祖先层数（超深的图只记录最近的祖先，避免路径长度随深度平方增长）
+TOPIC_PATH_DEPTH = 8
+TOPIC_PATH_SEPARATOR = " / "
+# 三元组分词器要求检索词至少3个字符，更短的词改用LIKE匹配
+TRIGRAM_MIN_CHARS = 3
+SCHEMA_VERSION = 1
+
+# 文件索引状态
+INDEXED_NONE = 0     # 只记录了元数据（如list_xmind_files发现），主题尚未索引
+INDEXED_OK = 1
+INDEXED_FAILED = -1  # 解析失败；文件变化前不再重试
+
+
+def _create_fts(connection: sqlite3.Connection) -> str:
+    """创建全文索引表，返回使用的模式
+
+    优先使用trigram分词器（支持中文等不以空格分词的文字做子串检索），
+    其次使用unicode61；SQLite未编译FTS5时退回普通表+LIKE。
+    """
+    for mode, tokenizer in (("fts5-trigram", "trigram"), ("fts5", "unicode61")):
+        try:
+            connection.execute(
+                f"CREATE VIRTUAL TABLE topics_fts USING fts5(title, content='topics', content_rowid='id', tokenize='{tokenizer}')"
+            )
+        except sqlite3.OperationalError:
+            continue
+        return mode
+    logger.warning("SQLite未启用FTS5，搜索索引改用LIKE匹配")
+    return "like"
+
+
+def iter_topic_rows(sheets: Iterable[Dict[str, Any]]):
+    """遍历工作表的主题树，产出 (工作表索引, 标题, 主题路径)"""
+    for sheet in sheets:
+        stack = [(sheet["root"], ())]
+        while stack:
+            node, ancestors = stack.pop()
+            title = node.get("title") or ""
+            if len(ancestors) > TOPIC_PATH_DEPTH:
+                path = "…" + TOPIC_PATH_SEPARATOR + TOPIC_PATH_SEPARATOR.join(ancestors[-TOPIC_PATH_DEPTH:])
+            else:
+                path = TOPIC_PATH_SEPARATOR.join(ancestors)
+            yield sheet["index"], title, path
+            children = node.get("children")
+            if children:
+                child_ancestors = (ancestors + (title,))[-(TOPIC_PATH_DEPTH + 1):]
+                stack.extend((child, child_ancestors) for child in reversed(children))
+
+
+def _like_pattern(text: str) -> str:
+    return "%" + text.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_") + "%"
+
+
+class SearchIndex:
+    """XMind文件与主题标题的持久化搜索索引
+
+    files 表记录每个文件的路径、mtime_ns、大小和索引状态；topics 表记录每个主题的
+    标题和祖先路径，topics_fts 为其FTS5全文索引（按文件批量同步，比逐行触发器快数倍）。
+    """
+
+    def __init__(self, path: Optional[str] = None):
+        self.path = os.path.abspath(path or os.path.join(default_cache_dir("search"), "index.sqlite3"))
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        self._lock = threading.Lock()
+        self._connection = sqlite3.connect(self.path, check_same_thread=False)
+        self._connection.execute("PRAGMA journal_mode=WAL")
+        self._connection.execute("PRAGMA synchronous=NORMAL")
+        self.mode = self._setup()
+
+    def _setup(self) -> str:
+        with self._lock, self._connection:
+            connection = self._connection
+            connection.execute("CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT)")
+            row = connection.execute("SELECT value FROM meta WHERE key = 'mode'").fetchone()
+            version = connection.execute("SELECT value FROM meta WHERE key = 'schema_version'").fetchone()
+            if row is not None and version is not None and int(version[0]) == SCHEMA_VERSION:
+                return row[0]
+
+            connection.executescript("""
+                DROP TABLE IF EXISTS topics_fts;
+                DROP TABLE IF EXISTS topics;
+                DROP TABLE IF EXISTS files;
+                CREATE TABLE files (
+                    id INTEGER PRIMARY KEY,
+                    path TEXT UNIQUE NOT NULL,
+                    mtime_ns INTEGER NOT NULL,
+                    size INTEGER NOT NULL,
+                    indexed INTEGER NOT NULL DEFAULT 0,
+                    sheet_count INTEGER,
+                    topic_count INTEGER,
+                    root_title TEXT,
+                    indexed_at REAL
+                );
+                CREATE TABLE topics (
+                    id INTEGER PRIMARY KEY,
+                    file_id INTEGER NOT NULL,
+                    sheet INTEGER NOT NULL,
+                    title TEXT NOT NULL,
+                    topic_path TEXT NOT NULL
+                );
+                CREATE INDEX topics_file ON topics(file_id);
+            """)
+            mode = _create_fts(connection)
+            connection.executemany("INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)",
+                                   [("mode", mode), ("schema_version", str(SCHEMA_VERSION))])
+            return mode
+
+    def close(self):
+        with self._lock:
+            self._connection.close()
+
+    def is_fresh(self, file_path: str, signature: Tuple[int, int]) -> bool:
+        """文件签名与索引一致且已索引（或已确认无法解析）"""
+        with self._lock:
+            row = self._connection.execute(
+                "SELECT mtime_ns, size, indexed FROM files WHERE path = ?", (os.path.abspath(file_path),)
+            ).fetchone()
+        return row is not None and (row[0], row[1]) == tuple(signature) and row[2] != INDEXED_NONE
+
+    def _upsert_file(self, file_path: str, signature: Tuple[int, int], indexed: int, **fields) -> int:
+        """写入文件行（调用方持有锁和事务），签名变化时删除旧的主题行，返回文件id"""
+        connection = self._connection
+        row = connection.execute("SELECT id, mtime_ns, size FROM files WHERE path = ?", (file_path,)).fetchone()
+        values = {
+            "mtime_ns": signature[0], "size": signature[1], "indexed": indexed,
+            "sheet_count": fields.get("sheet_count"), "topic_count": fields.get("topic_count"),
+            "root_title": fields.get("root_title"), "indexed_at": fields.get("indexed_at"),
+        }
+        if row is None:
+            cursor = connection.execute(
+                "INSERT INTO files (path, mtime_ns, size, indexed, sheet_count, topic_count, root_title, indexed_at) "
+                "VALUES (:path, :mtime_ns, :size, :indexed, :sheet_count, :topic_count, :root_title, :indexed_at)",
+                dict(values, path=file_path)
+            )
+            return cursor.lastrowid
+        file_id = row[0]
+        self._delete_topics(file_id)
+        connection.execute(
+            "UPDATE files SET mtime_ns = :mtime_ns, size = :size, indexed = :indexed, sheet_count = :sheet_count, "
+            "topic_count = :topic_count, root_title = :root_title, indexed_at = :indexed_at WHERE id = :id",
+            dict(values, id=file_id)
+        )
+        return file_id
+
+    def _delete_topics(self, file_id: int):
+        """删除文件的主题行及其全文索引（调用方持有锁和事务）"""
+        if self.mode != "like":
+            self._connection.execute(
+                "INSERT INTO topics_fts(topics_fts, rowid, title) SELECT 'delete', id, title FROM topics WHERE file_id = ?",
+                (file_id,)
+            )
+        self._connection.execute("DELETE FROM topics WHERE file_id = ?", (file_id,))
+
+    def update(self, file_path: str, signature: Tuple[int, int], sheets: List[Dict[str, Any]]):
+        """用已解析的工作表重建文件的主题索引"""
+        file_path = os.path.abspath(file_path)
+        rows = iter_topic_rows(sheets)
+        with self._lock, self._connection:
+            file_id = self._upsert_file(
+                file_path, signature, INDEXED_OK,
+                sheet_count=len(sheets),
+                topic_count=sum(sheet["stats"].node_count for sheet in sheets),
+                root_title=sheets[0]["root"].get("title") if sheets else None,
+                indexed_at=time.time()
+            )
+            self._connection.executemany(
+                "INSERT INTO topics (file_id, sheet, title, topic_path) VALUES (?, ?, ?, ?)",
+                ((file_id, sheet, title, path) for sheet, title, path in rows)
+            )
+            if self.mode != "like":
+                self._connection.execute(
+                    "INSERT INTO topics_fts(rowid, title) SELECT id, title FROM topics WHERE file_id = ?", (file_id,)
+                )
+
+    def mark_failed(self, file_path: str, signature: Tuple[int, int]):
+        """记录无法解析的文件，文件变化前不再重试"""
+        with self._lock, self._connection:
+            self._upsert_file(os.path.abspath(file_path), signature, INDEXED_FAILED, indexed_at=time.time())
+
+    def record_files(self, files: Iterable[Tuple[str, int, int]]):
+        """记录文件元数据 (路径, 大小, mtime_ns)；签名变化的文件清除旧主题，等待重新索引"""
+        with self._lock, self._connection:
+            connection = self._connection
+            for file_path, size, mtime_ns in files:
+                row = connection.execute("SELECT mtime_ns, size FROM files WHERE path = ?", (file_path,)).fetchone()
+                if row is None or (row[0], row[1]) != (mtime_ns, size):
+                    self._upsert_file(file_path, (mtime_ns, size), INDEXED_NONE)
+
+    def remove(self, paths: Iterable[str]):
+        with self._lock, self._connection:
+            for file_path in paths:
+                row = self._connection.execute("SELECT id FROM files WHERE path = ?", (file_path,)).fetchone()
+                if row is not None:
+                    self._delete_topics(row[0])
+                    self._connection.execute("DELETE FROM files WHERE id = ?", (row[0],))
+
+    def files(self, directory: Optional[str] = None) -> Dict[str, Tuple[int, int, int]]:
+        """索引中的文件 {路径: (mtime_ns, 大小, 索引状态)}，可限定目录"""
+        query = "SELECT path, mtime_ns, size, indexed FROM files"
+        params: Tuple[Any, ...] = ()
+        if directory:
+            query += " WHERE path LIKE ? ESCAPE '\\'"
+            params = (_like_pattern(os.path.join(os.path.abspath(directory), ""))[1:],)
+        with self._lock:
+            return {row[0]: (row[1], row[2], row[3]) for row in self._connection.execute(query, params)}
+
+    def search(self, query: str, limit: int = 20, directory: Optional[str] = None,
+               matches_per_file: int = 5) -> List[Dict[str, Any]]:
+        """按主题标题搜索，按文件分组返回（相关度最高的文件在前）
+
+        多个词之间为“与”关系；每个文件最多返回 matches_per_file 个匹配的主题。
+        """
+        terms = query.split()
+        if not terms:
+            return []
+        use_fts = self.mode != "like" and all(
+            self.mode != "fts5-trigram" or len(term) >= TRIGRAM_MIN_CHARS for term in terms
+        )
+        params: List[Any] = []
+        if use_fts:
+            sql = (
+                "SELECT f.path, f.root_title, t.sheet, t.title, t.topic_path, bm25(topics_fts) AS score "
+                "FROM topics_fts JOIN topics t ON t.id = topics_fts.rowid JOIN files f ON f.id = t.file_id "
+                "WHERE topics_fts MATCH ?"
+            )
+            params.append(" AND ".join('"' + term.replace('"', '""') + '"' for term in terms))
+        else:
+            sql = (
+                "SELECT f.path, f.root_title, t.sheet, t.title, t.topic_path, 0.0 AS score "
+                "FROM topics t JOIN files f ON f.id = t.file_id WHERE "
+                + " AND ".join("t.title LIKE ? ESCAPE '\\'" for _ in terms)
+            )
+            params.extend(_like_pattern(term) for term in terms)
+        if directory:
+            sql += " AND f.path LIKE ? ESCAPE '\\'"
+            params.append(_like_pattern(os.path.join(os.path.abspath(directory), ""))[1:])
+        sql += " ORDER BY score"
+
+        results: Dict[str, Dict[str, Any]] = {}
+        with self._lock:
+            for path, root_title, sheet, title, topic_path, score in self._connection.execute(sql, params):
+                entry = results.get(path)
+                if entry is None:
+                    if len(results) >= limit:
+                        # 结果按相关度排序：已凑够limit个文件后只统计已有文件的匹配数
+                        continue
+                    entry = results[path] = {
+                        "path": path, "root_title": root_title, "score": score, "match_count": 0, "matches": []
+                    }
+                entry["match_count"] += 1
+                if len(entry["matches"]) < matches_per_file:
+                    entry["matches"].append({"sheet": sheet, "title": title, "topic_path": topic_path})
+        return list(results.values())
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            files, indexed, failed = self._connection.execute(
+                "SELECT COUNT(*), SUM(indexed = 1), SUM(indexed = -1) FROM files"
+            ).fetchone()
+            topics = self._connection.execute("SELECT COUNT(*) FROM topics").fetchone()[0]
+        return {
+            "path": self.path,
+            "mode": self.mode,
+            "files": files,
+            "indexed_files": indexed or 0,
+            "failed_files": failed or 0,
+            "topics": topics,
+            "size_bytes": os.path.getsize(self.path) if os.path.exists(self.path) else 0,
+        }
@@ -0,0 +1,360 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+XMind MCP工具的调用规则
+FastMCP封装和内置STDIO/HTTP传输共用的工具实现：参数别名归一化、路径校验、默认输出目录
+和默认分页大小都在这里处理，再调用核心引擎。每个函数返回结果字典，参数名与引擎 get_tools
+的参数定义一致；工具异常直接抛出，由调用方转换为错误响应。
+"""
+
+import os
+import json
+import logging
+from typing import Any, Dict, List, Optional
+
+import xmind_json
+from xmind_core_engine import (
+    get_engine,
+    read_xmind_file as core_read_xmind_file,
+    read_xmind_page as core_read_xmind_page,
+    create_mind_map as core_create_mind_map,
+    analyze_mind_map as core_analyze_mind_map,
+    convert_to_xmind as core_convert_to_xmind,
+    list_xmind_files as core_list_xmind_files,
+    batch_convert as core_batch_convert,
+    sync_directory as core_sync_directory,
+    start_watch as core_start_watch,
+    stop_watch as core_stop_watch,
+    get_watch_status as core_get_watch_status,
+    search_xmind as core_search_xmind,
+    get_cache_stats as core_get_cache_stats,
+    DEFAULT_PAGE_NODES,
+    DEFAULT_PAGE_BYTES
+)
+
+logger = logging.getLogger(__name__)
+
+# list_xmind_files 工具默认每页返回的文件数，避免超大目录返回数MB的结果
+DEFAULT_LIST_LIMIT = 1000
+
+# 子主题和标题的别名（按优先级），create_mind_map 归一化为 children/title
+CHILDREN_KEYS = ("children", "topics", "subtopics", "nodes", "items")
+TITLE_KEYS = ("title", "name", "text")
+
+# 由服务器加载配置时设置：默认输出目录，以及执行 convert_to_xmind 的工具执行器（进程池隔离）
+_default_output_dir: Optional[str] = None
+_executor = None
+
+
+def configure(default_output_dir: Optional[str] = None, executor=None):
+    """设置工具使用的默认输出目录（绝对路径）和工具执行器"""
+    global _default_output_dir, _executor
+    _default_output_dir = default_output_dir
+    _executor = executor
+
+
+def get_default_output_dir() -> Optional[str]:
+    return _default_output_dir
+
+
+def _output_dir_error(output_dir: Optional[str]) -> Optional[Dict[str, Any]]:
+    """输出目录未指定且没有默认输出目录，或不是绝对路径时返回错误结果"""
+    if output_dir is None:
+        return {
+            "status": "error",
+            "error": "未指定输出目录且配置文件中没有默认输出目录配置",
+            "suggestion": "请在配置文件中设置default_output_dir或在调用时指定output_dir参数"
+        }
+    if not os.path.isabs(output_dir):
+        return {"status": "error", "error": "输出目录必须为绝对路径", "output_dir": output_dir}
+    return None
+
+
+def _first_value(obj: Dict[str, Any], keys) -> Any:
+    for key in keys:
+        if obj.get(key):
+            return obj[key]
+    return None
+
+
+def _normalize_node(obj: Any, pending: List) -> Dict[str, Any]:
+    if isinstance(obj, dict):
+        normalized = {"title": _first_value(obj, TITLE_KEYS) or ""}
+        children = _first_value(obj, CHILDREN_KEYS)
+        if children:
+            normalized["children"] = []
+            pending.append((children, normalized["children"]))
+        return normalized
+    return {"title": str(obj)}
+
+
+def normalize_topics(obj: Any) -> Any:
+    """把主题结构归一化为 {"title", "children"}，兼容 topics/subtopics/nodes/items 和 name/text（显式栈，支持任意深度）"""
+    root: List[Dict[str, Any]] = []
+    pending = [(obj, root)]
+    while pending:
+        source, target = pending.pop()
+        if isinstance(source, list):
+            target.extend(_normalize_node(item, pending) for item in source)
+        else:
+            target.append(_normalize_node(source, pending))
+    return root if isinstance(obj, list) else root[0]
+
+
+def normalize_sheets(sheets: Any) -> List[Dict[str, Any]]:
+    """追加工作表的归一化：每项为 {"title", "sheet_title", "children"}"""
+    if isinstance(sheets, str):
+        sheets = xmind_json.loads(sheets)
+    if isinstance(sheets, dict):
+        sheets = [sheets]
+    normalized = []
+    for sheet in sheets:
+        if not isinstance(sheet, dict):
+            sheet = {"title": str(sheet)}
+        children = _first_value(sheet, CHILDREN_KEYS)
+        normalized.append({
+            "title": _first_value(sheet, TITLE_KEYS) or "",
+            "sheet_title": sheet.get("sheet_title"),
+            "children": normalize_topics(children) if children else []
+        })
+    return normalized
+
+
+def _parse_topics(topics_json: Any) -> Any:
+    if isinstance(topics_json, (dict, list)):
+        return topics_json
+    if isinstance(topics_json, str):
+        try:
+            return xmind_json.loads(topics_json)
+        except json.JSONDecodeError:
+            # 不是JSON时作为单个主题的标题
+            return [{"title": topics_json}]
+    return [{"title": str(topics_json)}]
+
+
+def read_xmind_file(filepath: str, sheet_index: int = 0, all_sheets: bool = False, topic_id: str = None,
+                    topic_path: Any = None, max_depth: int = None, child_counts: bool = True, cursor: str = None,
+                    page_size: int = None, page_bytes: int = None, structure_format: str = "nested") -> Dict[str, Any]:
+    """读取XMind文件；带 cursor/page_size/page_bytes 时分页读取"""
+    try:
+        if not filepath:
+            return {"status": "error", "error": "文件路径不能为空"}
+        if not os.path.exists(filepath):
+            return {"status": "error", "error": f"文件不存在: {filepath}", "file_path": filepath}
+        if not filepath.lower().endswith('.xmind'):
+            logger.warning(f"文件扩展名不是.xmind: {filepath}")
+        file_size = os.path.getsize(filepath)
+        if file_size == 0:
+            return {"status": "error", "error": "文件为空", "file_path": filepath}
+
+        logger.info(f"读取XMind文件: {filepath}, 大小: {file_size} 字节")
+        if isinstance(topic_path, str) and topic_path.lstrip().startswith('['):
+            topic_path = xmind_json.loads(topic_path)
+        if cursor or page_size or page_bytes:
+            # 分页模式：遍历状态保存在服务端会话中，每次只序列化一页
+            result = core_read_xmind_page(
+                filepath, sheet_index, cursor, page_size or DEFAULT_PAGE_NODES, page_bytes or DEFAULT_PAGE_BYTES,
+                topic_id, topic_path, max_depth, structure_format
+            )
+        else:
+            result = core_read_xmind_file(filepath, sheet_index, all_sheets, topic_id, topic_path, max_depth,
+                                          child_counts, structure_format)
+        if isinstance(result, dict):
+            result["file_path"] = filepath
+            result["file_size"] = file_size
+        return result
+    except Exception as e:
+        logger.error(f"读取XMind文件错误: {e}")
+        return {"status": "error", "error": str(e), "file_path": filepath}
+
+
+def create_mind_map(title: str, topics_json: Any, output_path: str = None, id_mode: str = None,
+                    deterministic: bool = False, sheets_json: Any = None) -> Dict[str, Any]:
+    """创建思维导图：归一化主题别名，输出路径必须为绝对路径，未指定时写入默认输出目录"""
+    topics_data = _parse_topics(topics_json)
+    if output_path:
+        if not os.path.isabs(output_path):
+            return {"status": "error", "error": "输出路径必须为绝对路径", "title": title, "output_path": output_path}
+        output_dir = os.path.dirname(output_path)
+    else:
+        output_dir = _default_output_dir
+        if output_dir is None:
+            return {
+                "status": "error",
+                "error": "未指定输出路径且配置文件中没有默认输出目录配置",
+                "title": title,
+                "suggestion": "请在配置文件中设置default_output_dir或在调用时指定output_path参数"
+            }
+        output_path = os.path.join(output_dir, f"{get_engine()._sanitize_filename(title)}.xmind")
+    try:
+        os.makedirs(output_dir, exist_ok=True)
+    except OSError as e:
+        logger.error(f"创建输出目录失败: {e}")
+        return {"status": "error", "error": f"无法创建输出目录: {e}", "title": title, "output_dir": output_dir}
+
+    normalized_topics = normalize_topics(topics_data) if topics_data else []
+    normalized_sheets = normalize_sheets(sheets_json) if sheets_json else None
+    # 直接传入归一化后的对象，避免再序列化一次交给引擎解析
+    result = core_create_mind_map(title, normalized_topics, output_path, id_mode, deterministic, normalized_sheets)
+    logger.info(f"创建思维导图: {title} -> {output_path}")
+
+    if not os.path.exists(output_path):
+        logger.error(f"文件创建失败，路径: {output_path}")
+        return {"status": "error", "error": f"文件创建失败，路径: {output_path}", "title": title, "output_path": output_path}
+    if isinstance(result, dict):
+        result["filename"] = os.path.basename(output_path)
+        result["absolute_path"] = output_path
+        result["output_path"] = output_path
+        if result.get("status") == "success":
+            result["message"] = f"思维导图已创建: {output_path}"
+    return result
+
+
+def analyze_mind_map(filepath: str, sheet_index: int = 0) -> Dict[str, Any]:
+    logger.info(f"分析思维导图: {filepath}")
+    return core_analyze_mind_map(filepath, sheet_index)
+
+
+def convert_to_xmind(source_filepath: str, output_filepath: str = None, id_mode: str = None,
+                     deterministic: bool = False, use_cache: bool = True) -> Dict[str, Any]:
+    """转换源文件为XMind；未指定输出路径时写入默认输出目录（未配置时为当前目录下的 output）"""
+    if not source_filepath:
+        return {"status": "error", "error": "必须提供源文件路径：source_filepath 或 source_file"}
+    if not output_filepath and _default_output_dir:
+        stem = os.path.splitext(os.path.basename(source_filepath))[0]
+        output_filepath = os.path.join(_default_output_dir, f"{stem}.xmind")
+    logger.info(f"转换文件为XMind格式: {source_filepath}")
+    args = (source_filepath, output_filepath, id_mode, deterministic, use_cache)
+    if _executor is None:
+        return core_convert_to_xmind(*args)
+    # 启用进程池时源文件在独立进程中解析
+    return _executor.run_isolated(core_convert_to_xmind, *args)
+
+
+def _log_batch_result(result: Dict[str, Any]):
+    # 逐个文件上报结果，长批次也能看到进度
+    if result.get("status") == "success":
+        logger.info(f"批量转换完成: {result.get('source_file')} -> {result.get('output_file')}")
+    else:
+        logger.warning(f"批量转换失败: {result.get('source_file')}: {result.get('error')}")
+
+
+def batch_convert(source: str, output_dir: str = None, recursive: bool = True, workers: int = None,
+                  chunk_size: int = None, timeout: float = None, id_mode: str = None, deterministic: bool = False,
+                  use_cache: bool = True, include_results: bool = False) -> Dict[str, Any]:
+    output_dir = output_dir or _default_output_dir
+    error = _output_dir_error(output_dir)
+    if error:
+        return error
+    options = {"timeout": timeout} if timeout is not None else {}
+    result = core_batch_convert(source, output_dir, recursive, workers, chunk_size, id_mode=id_mode,
+                                deterministic=deterministic, use_cache=use_cache,
+                                include_results=include_results, on_result=_log_batch_result, **options)
+    if "total_files" in result:
+        logger.info(
+            f"批量转换: {source} 共 {result['total_files']} 个文件，成功 {result['succeeded']}，"
+            f"{result['files_per_second']:.1f} 文件/秒"
+        )
+    return result
+
+
+def sync_directory(source_dir: str, output_dir: str = None, manifest_path: str = None, recursive: bool = True,
+                   workers: int = None, timeout: float = None, id_mode: str = None, deterministic: bool = False,
+                   delete_removed: bool = True, include_skipped: bool = False) -> Dict[str, Any]:
+    output_dir = output_dir or _default_output_dir
+    error = _output_dir_error(output_dir)
+    if error:
+        return error
+    options = {"timeout": timeout} if timeout is not None else {}
+    result = core_sync_directory(source_dir, output_dir, manifest_path, recursive, workers,
+                                 id_mode=id_mode, deterministic=deterministic,
+                                 delete_removed=delete_removed, include_skipped=include_skipped, **options)
+    if result.get("status") == "success":
+        logger.info(
+            f"目录同步: {source_dir} 转换 {len(result['converted'])}，跳过 {result['skipped']}，"
+            f"删除 {len(result['removed'])}，失败 {len(result['failed'])}，耗时 {result['elapsed_seconds']:.2f} 秒"
+        )
+    return result
+
+
+def list_xmind_files(directory: str = None, recursive: bool = True, pattern: str = None, sort: str = "path",
+                     descending: bool = False, limit: int = None, cursor: str = None,
+                     use_index: bool = False) -> Dict[str, Any]:
+    """列出XMind文件，未指定 limit 时每页最多 DEFAULT_LIST_LIMIT 个"""
+    try:
+        if directory is None:
+            directory = _default_output_dir
+            if directory is None:
+                return {
+                    "status": "error",
+                    "error": "未指定搜索目录且配置文件中没有默认输出目录配置",
+                    "suggestion": "请在配置文件中设置default_output_dir或在调用时指定directory参数"
+                }
+        elif not os.path.isabs(directory):
+            return {"status": "error", "error": "搜索目录必须为绝对路径", "directory": directory}
+        if not os.path.exists(directory):
+            return {"status": "error", "error": f"目录不存在: {directory}", "directory": directory}
+        if not os.path.isdir(directory):
+            return {"status": "error", "error": f"路径不是目录: {directory}", "directory": directory}
+
+        logger.info(f"搜索XMind文件，目录: {directory}，递归: {recursive}")
+        result = core_list_xmind_files(directory, recursive, pattern, sort, descending,
+                                       DEFAULT_LIST_LIMIT if limit is None else limit, cursor, use_index)
+        if isinstance(result, dict):
+            result["directory"] = directory
+            result["recursive"] = recursive
+        return result
+    except Exception as e:
+        logger.error(f"列出XMind文件错误: {e}")
+        return {"status": "error", "error": str(e), "directory": directory}
+
+
+def search_xmind(query: str, directory: str = None, limit: int = 20, refresh: bool = True,
+                 matches_per_file: int = 5) -> Dict[str, Any]:
+    if directory is not None and not os.path.isabs(directory):
+        return {"status": "error", "error": "搜索目录必须为绝对路径", "directory": directory}
+    result = core_search_xmind(query, directory, limit, refresh, matches_per_file)
+    if result.get("status") == "success":
+        logger.info(f"搜索完成: {query!r}，{result['file_count']} 个文件（{result['search_ms']} ms）")
+    return result
+
+
+def get_cache_stats() -> Dict[str, Any]:
+    """缓存统计，附带工具执行器的并发执行统计"""
+    try:
+        stats = core_get_cache_stats()
+        if _executor is not None:
+            stats["tool_executor"] = _executor.stats()
+        return stats
+    except Exception as e:
+        logger.error(f"获取缓存统计错误: {e}")
+        return {"status": "error", "error": str(e)}
+
+
+def start_watch(source_dir: str, output_dir: str = None, recursive: bool = True, debounce: float = None,
+                workers: int = None, queue_size: int = None, backend: str = "auto",
+                poll_interval: float = None) -> Dict[str, Any]:
+    output_dir = output_dir or _default_output_dir
+    error = _output_dir_error(output_dir)
+    if error:
+        return error
+    options = {
+        key: value for key, value in (
+            ("debounce", debounce), ("workers", workers),
+            ("queue_size", queue_size), ("poll_interval", poll_interval)
+        ) if value is not None
+    }
+    logger.info(f"开始监视目录: {source_dir}")
+    return core_start_watch(source_dir, output_dir, recursive, backend=backend, **options)
+
+
+def stop_watch(source_dir: str) -> Dict[str, Any]:
+    return core_stop_watch(source_dir)
+
+
+def get_watch_status(source_dir: str = None) -> Dict[str, Any]:
+    try:
+        return core_get_watch_status(source_dir)
+    except Exception as e:
+        logger.error(f"获取目录监视状态错误: {e}")
+        return {"status": "error", "error": str(e)}
@@ -0,0 +1,483 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+XMind目录监视组件
+监视源目录的变化并自动重新转换为XMind（Linux上使用inotify，其他平台轮询）
+"""
+
+import os
+import sys
+import time
+import errno
+import queue
+import select
+import struct
+import logging
+import threading
+from collections import deque
+from typing import Any, Deque, Dict, List, Optional, Set, Tuple
+
+from universal_xmind_converter import ParserFactory
+from xmind_batch import plan_outputs
+
+logger = logging.getLogger(__name__)
+
+# 默认防抖时间（秒）：同一文件在此时间内的连续修改只转换一次
+DEFAULT_DEBOUNCE_SECONDS = 0.5
+# 轮询后端默认扫描间隔（秒）
+DEFAULT_POLL_INTERVAL = 1.0
+# 默认转换队列容量与工作线程数
+DEFAULT_QUEUE_SIZE = 256
+DEFAULT_WATCH_WORKERS = 2
+# 延迟统计保留的最近样本数
+LATENCY_SAMPLES = 1024
+
+# inotify 事件掩码（见 inotify(7)）
+IN_MODIFY = 0x00000002
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_FROM = 0x00000040
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_DELETE = 0x00000200
+IN_DELETE_SELF = 0x00000400
+IN_Q_OVERFLOW = 0x00004000
+IN_IGNORED = 0x00008000
+IN_ISDIR = 0x40000000
+WATCH_MASK = IN_CLOSE_WRITE | IN_MOVED_FROM | IN_MOVED_TO | IN_CREATE | IN_DELETE | IN_DELETE_SELF
+EVENT_HEADER = struct.Struct('iIII')
+
+def _load_libc():
+    """直接按glibc的soname加载；ctypes.util.find_library 会启动子进程（约20毫秒），只在其他libc上才使用"""
+    try:
+        return ctypes.CDLL('libc.so.6', use_errno=True)
+    except OSError:
+        from ctypes.util import find_library
+        name = find_library('c')
+        if name is None:
+            raise
+        return ctypes.CDLL(name, use_errno=True)
+
+
+try:
+    import ctypes
+    if not sys.platform.startswith('linux'):
+        raise OSError("inotify仅在Linux上可用")
+    _libc = _load_libc()
+    _libc.inotify_init1.argtypes = [ctypes.c_int]
+    _libc.inotify_add_watch.argtypes = [ctypes.c_int, ctypes.c_char_p, ctypes.c_uint32]
+    _libc.inotify_rm_watch.argtypes = [ctypes.c_int, ctypes.c_int]
+    INOTIFY_AVAILABLE = True
+except (ImportError, OSError, AttributeError):
+    _libc = None
+    INOTIFY_AVAILABLE = False
+
+
+def _is_source(path: str) -> bool:
+    return os.path.splitext(path)[1].lower() in ParserFactory.PARSERS
+
+
+class PollingBackend:
+    """轮询后端 - 每个间隔用os.scandir扫描一次目录树，对比(mtime_ns, size)快照
+
+    scandir在同一次目录读取中返回条目（Windows上同时带回stat信息），
+    每轮对每个目录只做一次系统调用批量获取条目。
+    """
+
+    name = "polling"
+
+    def __init__(self, root: str, recursive: bool = True, interval: float = DEFAULT_POLL_INTERVAL):
+        self.root = root
+        self.recursive = recursive
+        self.interval = interval
+        self._snapshot = self._scan()
+        self._next_scan = time.monotonic() + interval
+
+    def _scan(self) -> Dict[str, Tuple[int, int]]:
+        snapshot = {}
+        stack = [self.root]
+        while stack:
+            directory = stack.pop()
+            try:
+                with os.scandir(directory) as entries:
+                    for entry in entries:
+                        try:
+                            if entry.is_dir(follow_symlinks=False):
+                                if self.recursive:
+                                    stack.append(entry.path)
+                            elif _is_source(entry.name):
+                                st = entry.stat()
+                                snapshot[entry.path] = (st.st_mtime_ns, st.st_size)
+                        except FileNotFoundError:
+                            continue
+            except (FileNotFoundError, NotADirectoryError, PermissionError):
+                continue
+        return snapshot
+
+    def poll(self, timeout: float) -> List[str]:
+        """等待至多timeout秒，返回有变化（新增、修改或删除）的源文件路径"""
+        delay = self._next_scan - time.monotonic()
+        if delay > timeout:
+            time.sleep(timeout)
+            return []
+        if delay > 0:
+            time.sleep(delay)
+        self._next_scan = time.monotonic() + self.interval
+
+        snapshot = self._scan()
+        previous = self._snapshot
+        self._snapshot = snapshot
+        changed = [path for path, signature in snapshot.items() if previous.get(path) != signature]
+        changed.extend(path for path in previous if path not in snapshot)
+        return changed
+
+    def close(self):
+        pass
+
+
+class InotifyBackend:
+    """inotify后端 - 为目录树中的每个目录添加监视，新建的子目录自动加入"""
+
+    name = "inotify"
+
+    def __init__(self, root: str, recursive: bool = True):
+        if not INOTIFY_AVAILABLE:
+            raise OSError("当前平台不支持inotify")
+        self.root = root
+        self.recursive = recursive
+        self._fd = _libc.inotify_init1(os.O_NONBLOCK | os.O_CLOEXEC)
+        if self._fd < 0:
+            error = ctypes.get_errno()
+            raise OSError(error, f"inotify_init1失败: {os.strerror(error)}")
+        self._paths: Dict[int, str] = {}
+        self._add_tree(root)
+
+    def _add_watch(self, directory: str) -> bool:
+        wd = _libc.inotify_add_watch(self._fd, os.fsencode(directory), WATCH_MASK)
+        if wd < 0:
+            error = ctypes.get_errno()
+            if error == errno.ENOSPC:
+                raise OSError(error, "inotify监视数量达到上限（fs.inotify.max_user_watches）")
+            return False
+        self._paths[wd] = directory
+        return True
+
+    def _add_tree(self, directory: str) -> List[str]:
+        """监视目录（递归时包括子目录），返回其中已存在的源文件"""
+        found = []
+        stack = [directory]
+        while stack:
+            current = stack.pop()
+            if not self._add_watch(current):
+                continue
+            try:
+                with os.scandir(current) as entries:
+                    for entry in entries:
+                        if entry.is_dir(follow_symlinks=False):
+                            if self.recursive:
+                                stack.append(entry.path)
+                        elif _is_source(entry.name):
+                            found.append(entry.path)
+            except (FileNotFoundError, NotADirectoryError, PermissionError):
+                continue
+        return found
+
+    def _rescan(self) -> List[str]:
+        """事件队列溢出时重新监视整个目录树，报告其中所有源文件"""
+        for wd in list(self._paths):
+            _libc.inotify_rm_watch(self._fd, wd)
+        self._paths.clear()
+        return self._add_tree(self.root)
+
+    def poll(self, timeout: float) -> List[str]:
+        """等待至多timeout秒，返回有变化（新增、修改或删除）的源文件路径"""
+        ready, _, _ = select.select([self._fd], [], [], timeout)
+        if not ready:
+            return []
+        changed = []
+        while True:
+            try:
+                data = os.read(self._fd, 64 * 1024)
+            except BlockingIOError:
+                break
+            offset = 0
+            while offset < len(data):
+                wd, mask, _, length = EVENT_HEADER.unpack_from(data, offset)
+                offset += EVENT_HEADER.size
+                name = data[offset:offset + length].rstrip(b'\0')
+                offset += length
+
+                if mask & IN_Q_OVERFLOW:
+                    logger.warning("inotify事件队列溢出，重新扫描监视目录")
+                    changed.extend(self._rescan())
+                    continue
+                if mask & IN_IGNORED:
+                    self._paths.pop(wd, None)
+                    continue
+                directory = self._paths.get(wd)
+                if directory is None or not name:
+                    continue
+                path = os.path.join(directory, os.fsdecode(name))
+                if mask & IN_ISDIR:
+                    if self.recursive and mask & (IN_CREATE | IN_MOVED_TO):
+                        # 新目录中的文件可能在添加监视之前就已写入
+                        changed.extend(self._add_tree(path))
+                elif _is_source(path):
+                    changed.append(path)
+        return changed
+
+    def close(self):
+        if self._fd >= 0:
+            os.close(self._fd)
+            self._fd = -1
+
+
+def _latency_summary(samples: Deque[float]) -> Dict[str, Any]:
+    if not samples:
+        return {"count": 0}
+    ordered = sorted(samples)
+    return {
+        "count": len(ordered),
+        "avg_ms": sum(ordered) / len(ordered) * 1000,
+        "p50_ms": ordered[len(ordered) // 2] * 1000,
+        "p95_ms": ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))] * 1000,
+        "max_ms": ordered[-1] * 1000,
+        "last_ms": samples[-1] * 1000
+    }
+
+
+class DirectoryWatcher:
+    """目录监视器 - 源文件变化后经过防抖放入有界队列，由工作线程重新转换
+
+    同一文件在防抖时间内的连续修改合并为一次转换；已在队列中等待的文件
+    不会重复入队（转换时读取的总是最新内容）。队列满时变化保留在待处理
+    集合中，等队列有空位后再入队，不会丢失。
+    """
+
+    def __init__(self, source_dir: str, output_dir: str, engine=None, recursive: bool = True,
+                 debounce: float = DEFAULT_DEBOUNCE_SECONDS, workers: int = DEFAULT_WATCH_WORKERS,
+                 queue_size: int = DEFAULT_QUEUE_SIZE, backend: str = "auto",
+                 poll_interval: float = DEFAULT_POLL_INTERVAL, id_mode: Optional[str] = None,
+                 deterministic: bool = False, delete_removed: bool = True, initial_scan: bool = True):
+        if engine is None:
+            from xmind_core_engine import get_engine
+            engine = get_engine()
+        self.engine = engine
+        self.source_dir = os.path.abspath(source_dir)
+        self.output_dir = os.path.abspath(output_dir)
+        self.recursive = recursive
+        self.debounce = debounce
+        self.workers = max(1, workers)
+        self.backend_name = backend
+        self.poll_interval = poll_interval
+        self.id_mode = id_mode
+        self.deterministic = deterministic
+        self.delete_removed = delete_removed
+        self.initial_scan = initial_scan
+
+        self.backend = None
+        self._queue: "queue.Queue[Optional[Tuple[str, float]]]" = queue.Queue(maxsize=queue_size)
+        self._pending: Dict[str, List[float]] = {}  # 路径 -> [首次事件时间, 最近事件时间]
+        self._queued: Set[str] = set()
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._threads: List[threading.Thread] = []
+        self.started_at = None
+
+        self.events = 0
+        self.converted = 0
+        self.removed = 0
+        self.failed = 0
+        self.in_flight = 0
+        self.backpressure = 0
+        self.last_error = None
+        self._conversion_latency: Deque[float] = deque(maxlen=LATENCY_SAMPLES)
+        self._end_to_end_latency: Deque[float] = deque(maxlen=LATENCY_SAMPLES)
+
+    def _create_backend(self):
+        if self.backend_name in ("auto", "inotify") and INOTIFY_AVAILABLE:
+            try:
+                return InotifyBackend(self.source_dir, self.recursive)
+            except OSError as e:
+                if self.backend_name == "inotify":
+                    raise
+                logger.warning(f"inotify不可用，改用轮询: {e}")
+        elif self.backend_name == "inotify":
+            raise OSError("当前平台不支持inotify")
+        return PollingBackend(self.source_dir, self.recursive, self.poll_interval)
+
+    def output_path(self, source_file: str) -> str:
+        return plan_outputs(self.source_dir, [source_file], self.output_dir)[0][1]
+
+    def _outdated_sources(self) -> List[str]:
+        """输出缺失或早于源文件的源文件（启动时补转换）"""
+        outdated = []
+        stack = [self.source_dir]
+        while stack:
+            directory = stack.pop()
+            try:
+                with os.scandir(directory) as entries:
+                    for entry in entries:
+                        try:
+                            if entry.is_dir(follow_symlinks=False):
+                                if self.recursive:
+                                    stack.append(entry.path)
+                            elif _is_source(entry.name):
+                                source_mtime = entry.stat().st_mtime_ns
+                                try:
+                                    output_mtime = os.stat(self.output_path(entry.path)).st_mtime_ns
+                                except FileNotFoundError:
+                                    output_mtime = -1
+                                if output_mtime < source_mtime:
+                                    outdated.append(entry.path)
+                        except FileNotFoundError:
+                            continue
+            except (FileNotFoundError, NotADirectoryError, PermissionError):
+                continue
+        return outdated
+
+    def start(self):
+        """启动监视线程和转换工作线程"""
+        if not os.path.isdir(self.source_dir):
+            raise FileNotFoundError(f"源目录不存在: {self.source_dir}")
+        os.makedirs(self.output_dir, exist_ok=True)
+        self.backend = self._create_backend()
+        self.started_at = time.time()
+        if self.initial_scan:
+            self._record(self._outdated_sources())
+
+        self._threads = [threading.Thread(target=self._watch_loop, name="xmind-watch", daemon=True)]
+        self._threads.extend(
+            threading.Thread(target=self._work_loop, name=f"xmind-watch-worker-{i}", daemon=True)
+            for i in range(self.workers)
+        )
+        for thread in self._threads:
+            thread.start()
+        logger.info(f"开始监视目录: {self.source_dir} -> {self.output_dir}（{self.backend.name}）")
+
+    def stop(self, timeout: float = 5.0):
+        """停止监视，等待正在进行的转换完成"""
+        self._stop.set()
+        deadline = time.monotonic() + timeout
+        for thread in self._threads:
+            thread.join(max(0.0, deadline - time.monotonic()))
+        if self.backend is not None:
+            self.backend.close()
+        logger.info(f"停止监视目录: {self.source_dir}")
+
+    @property
+    def running(self) -> bool:
+        return any(thread.is_alive() for thread in self._threads) and not self._stop.is_set()
+
+    def _record(self, paths: List[str]):
+        now = time.monotonic()
+        with self._lock:
+            self.events += len(paths)
+            for path in paths:
+                times = self._pending.get(path)
+                if times is None:
+                    self._pending[path] = [now, now]
+                else:
+                    times[1] = now
+
+    def _flush(self):
+        """把已经静默超过防抖时间的变化放入转换队列"""
+        now = time.monotonic()
+        with self._lock:
+            ready = [path for path, (_, last) in self._pending.items() if now - last >= self.debounce]
+            for path in ready:
+                if path in self._queued:
+                    del self._pending[path]
+                    continue
+                try:
+                    self._queue.put_nowait((path, self._pending[path][0]))
+                except queue.Full:
+                    self.backpressure += 1
+                    break
+                self._queued.add(path)
+                del self._pending[path]
+
+    def _watch_loop(self):
+        wait = min(self.debounce, self.poll_interval) / 2 or 0.05
+        while not self._stop.is_set():
+            try:
+                changed = self.backend.poll(wait)
+            except Exception as e:
+                self.last_error = str(e)
+                logger.error(f"目录监视出错: {e}")
+                time.sleep(wait)
+                continue
+            if changed:
+                self._record(changed)
+            self._flush()
+
+    def _work_loop(self):
+        while not self._stop.is_set():
+            try:
+                path, first_event = self._queue.get(timeout=0.2)
+            except queue.Empty:
+                continue
+            with self._lock:
+                self._queued.discard(path)
+                self.in_flight += 1
+            start = time.monotonic()
+            try:
+                self._convert(path)
+            except Exception as e:
+                # 删除旧输出、创建输出目录等可能抛出异常；计入失败，工作线程继续处理后续文件
+                with self._lock:
+                    self.failed += 1
+                    self.last_error = f"{path}: {e}"
+                logger.warning(f"自动转换失败: {self.last_error}")
+            finally:
+                done = time.monotonic()
+                with self._lock:
+                    self.in_flight -= 1
+                    self._conversion_latency.append(done - start)
+                    self._end_to_end_latency.append(done - first_event)
+                self._queue.task_done()
+
+    def _convert(self, path: str):
+        output_file = self.output_path(path)
+        if not os.path.exists(path):
+            if self.delete_removed and os.path.exists(output_file):
+                os.remove(output_file)
+                with self._lock:
+                    self.removed += 1
+            return
+        os.makedirs(os.path.dirname(output_file), exist_ok=True)
+        result = self.engine.convert_to_xmind(path, output_file, self.id_mode, self.deterministic)
+        with self._lock:
+            if result.get("status") == "success":
+                self.converted += 1
+            else:
+                self.failed += 1
+                self.last_error = f"{path}: {result.get('error')}"
+                logger.warning(f"自动转换失败: {self.last_error}")
+
+    def idle(self) -> bool:
+        """没有待处理、排队或正在转换的文件"""
+        with self._lock:
+            return not self._pending and not self._queued and not self.in_flight and self._queue.empty()
+
+    def metrics(self) -> Dict[str, Any]:
+        """监视状态与指标：队列深度、防抖中的文件数、转换计数和延迟分布"""
+        with self._lock:
+            return {
+                "source_dir": self.source_dir,
+                "output_dir": self.output_dir,
+                "backend": self.backend.name if self.backend else None,
+                "running": self.running,
+                "started_at": self.started_at,
+                "events": self.events,
+                "debouncing": len(self._pending),
+                "queue_depth": self._queue.qsize(),
+                "queue_capacity": self._queue.maxsize,
+                "in_flight": self.in_flight,
+                "backpressure": self.backpressure,
+                "converted": self.converted,
+                "removed": self.removed,
+                "failed": self.failed,
+                "last_error": self.last_error,
+                "conversion_latency": _latency_summary(self._conversion_latency),
+                "end_to_end_latency": _latency_summary(self._end_to_end_latency)
+            }